@@ -2,147 +2,653 @@ from collections import deque
 import heapq
 import math
 
+from compiledgraph import CompiledGraph
+from graphstore import GraphStore
+from heuristics import Heuristics
+from hierarchy import ContractionHierarchy
+from pathtree import ShortestPathTree, DynamicShortestPathTree
+from pqueues import PriorityQueues
+from sparsebackend import SparseBackend
+
+
+class SearchCancelled(Exception):
+    """由进度回调抛出，用于中止正在进行的搜索"""
+
+
 class GraphAlgorithms:
+    # runSearch 支持的算法名
+    ALGORITHMS = ("DFS", "BFS", "A*", "Dijkstra", "BiDijkstra", "BiA*", "CH")
+    # DFS 扩展次数上限，防止在大图上无休止地搜索
+    DFS_MAX_EXPANSIONS = 1000000
+    # 每确定这么多个节点调用一次进度回调
+    PROGRESS_INTERVAL = 1024
+    # runSearch 中表示多个起点或终点的类型
+    ID_COLLECTIONS = (list, tuple, set, frozenset)
+
     @staticmethod
-    def runSearch(graph_data, algo, start_id, end_id):
+    def runSearch(graph_data, algo, start_id, end_id, backend="python", progress=None, stats=None,
+                  heuristic="euclidean", queue="binary"):
+        """backend 为 "scipy" 时优先使用 scipy.sparse.csgraph，未安装或算法不支持时使用纯 Python 实现
+
+        progress(已确定节点数) 每 PROGRESS_INTERVAL 个节点调用一次，回调抛出 SearchCancelled 即可中止搜索；
+        scipy 后端在 C 代码中运行，不会调用回调。
+        传入 SearchStats 时记录堆操作、松弛、扫描边数等计数和各阶段耗时；scipy 后端只记录耗时。
+        heuristic 为 A* 和 BiA* 使用的距离函数，见 Heuristics；queue 为 Dijkstra 和 A* 使用的优先队列，见 PriorityQueues。
+        start_id 或 end_id 为ID的列表、元组或集合时求出其中最近的一对起点和终点，见 nearestPair。
+        """
+        if isinstance(start_id, GraphAlgorithms.ID_COLLECTIONS) or isinstance(end_id, GraphAlgorithms.ID_COLLECTIONS):
+            return GraphAlgorithms.nearestPair(graph_data, algo, start_id, end_id, progress, stats, queue)
+        if backend == "scipy" and SparseBackend.available():
+            if stats is not None:
+                stats.begin()
+            result = SparseBackend.runSearch(GraphAlgorithms.compile(graph_data), algo, start_id, end_id)
+            if result is not None:
+                if stats is not None:
+                    stats.mark("scipy")
+                return result
         if algo == "DFS":
-            return GraphAlgorithms.dfs(graph_data, start_id, end_id)
+            return GraphAlgorithms.dfs(graph_data, start_id, end_id, progress, stats=stats)
         elif algo == "BFS":
-            return GraphAlgorithms.bfs(graph_data, start_id, end_id)
+            return GraphAlgorithms.bfs(graph_data, start_id, end_id, progress, stats)
         elif algo == "A*":
-            return GraphAlgorithms.a_star(graph_data, start_id, end_id)
+            return GraphAlgorithms.a_star(graph_data, start_id, end_id, progress, stats, heuristic, queue)
         elif algo == "Dijkstra":
-            return GraphAlgorithms.dijkstra(graph_data, start_id, end_id)
+            return GraphAlgorithms.dijkstra(graph_data, start_id, end_id, progress, stats, queue)
+        elif algo == "BiDijkstra":
+            return GraphAlgorithms.bidirectional_dijkstra(graph_data, start_id, end_id, progress, stats)
+        elif algo == "BiA*":
+            return GraphAlgorithms.bidirectional_a_star(graph_data, start_id, end_id, progress, stats, heuristic)
+        elif algo == "CH":
+            return GraphAlgorithms.contraction_hierarchy(graph_data, start_id, end_id, progress, stats)
         return [], [], 0
 
     @staticmethod
-    def dfs(graph_data, start_id, end_id):
-        visited = []  # 记录所有访问过的节点
-        min_cost = float('infinity')  # 最小权重
-        shortest_path = []  # 最短路径
+    def nearestPair(graph_data, algo, start_ids, end_ids, progress=None, stats=None, queue="binary"):
+        """返回起点集合到终点集合中最近一对的 (visited, path, cost)，path[0]、path[-1] 即为这对起点和终点
+
+        只支持 Dijkstra（单个ID视为只有一个元素的集合），不可达时 path 为空列表。
+        """
+        if algo != "Dijkstra":
+            raise ValueError(f"多起点或多终点查询只支持 Dijkstra，不支持 {algo}")
+        if not isinstance(start_ids, GraphAlgorithms.ID_COLLECTIONS):
+            start_ids = [start_ids]
+        if not isinstance(end_ids, GraphAlgorithms.ID_COLLECTIONS):
+            end_ids = [end_ids]
+        visited, matches = GraphAlgorithms.multi_dijkstra(graph_data, start_ids, end_ids, 1, progress, stats, queue)
+        if not matches:
+            return visited, [], 0
+        _, _, path, cost = matches[0]
+        return visited, path, cost
+
+    @staticmethod
+    def runBatch(graph_data, queries, workers=None, keep_visited=True):
+        """在进程池中执行一组 (算法, 起点, 终点) 查询，按输入顺序返回结果，详见 BatchRunner"""
+        from batchrunner import BatchRunner
+        needs_hierarchy = any(algo == "CH" for algo, _, _ in queries)
+        with BatchRunner(graph_data, workers, hierarchy=needs_hierarchy) as runner:
+            return runner.run(queries, keep_visited)
+
+    @staticmethod
+    def compile(graph_data):
+        """返回 graph_data（字典或 GraphStore）对应的 CompiledGraph
+
+        GraphStore 把编译结果保存在自身（例如二进制文件映射出的 CSR），按版本号判断是否需要重新编译，
+        任何修改（追加、原地修改坐标或边权）都会使版本号递增。普通字典无法得知原地修改，每次调用都重新编译；
+        需要反复查询时先转为 GraphStore，或直接传入 CompiledGraph。
+        """
+        if isinstance(graph_data, CompiledGraph):
+            return graph_data
+        if isinstance(graph_data, GraphStore):
+            if graph_data.compiled is None or graph_data.compiled_revision != graph_data.revision:
+                graph_data.compiled = CompiledGraph.fromStore(graph_data)
+                graph_data.compiled_revision = graph_data.revision
+            return graph_data.compiled
+        return CompiledGraph.fromGraphData(graph_data)
 
-        stack = [(start_id, [start_id], 0, {start_id})]  # (当前节点, 路径, 权重, 当前路径中的节点集合)
+    @staticmethod
+    def dfs(graph_data, start_id, end_id, progress=None, prune=True, max_expansions=None, stats=None):
+        """深度优先搜索
 
-        while stack:
-            current, route, cost, path_visited = stack.pop()
+        prune 为 True 时使用分支限界：累计权重已不小于当前最优解，或不小于此前到达该节点的代价时剪枝；
+        为 False 时枚举所有简单路径。当前路径保存在共享的前驱数组中并通过回溯维护，
+        扩展次数超过 max_expansions（默认 DFS_MAX_EXPANSIONS）时提前返回当前最优结果。
+        统计中的入栈、出栈对应路径栈，确定节点数为访问过的不同节点数。
+        """
+        if stats is not None:
+            stats.begin()
+        graph = GraphAlgorithms.compile(graph_data)
+        s = graph.index.get(start_id)
+        if s is None:
+            return [], [], 0
+        t = graph.index.get(end_id, -1)
+        if s == t:
+            return [start_id], [start_id], 0
+        offsets, targets, weights, ids = graph.offsets, graph.targets, graph.weights, graph.ids
+        if max_expansions is None:
+            max_expansions = GraphAlgorithms.DFS_MAX_EXPANSIONS
+        interval = GraphAlgorithms.PROGRESS_INTERVAL
+        n = graph.nodeCount()
+        parent = [-1] * n  # 当前路径上各节点的前驱
+        best_cost = [math.inf] * n  # 到达各节点的最小代价，用于剪枝
+        best_cost[s] = 0
+        on_path = bytearray(n)  # 当前路径中的节点
+        on_path[s] = 1
+        seen = bytearray(n)
+        seen[s] = 1
+        visited = [start_id]  # 记录所有访问过的节点
+        min_cost = math.inf  # 最小权重
+        shortest_path = []  # 最短路径
+        expansions = 1
 
-            # 记录当前节点为已访问
-            if current not in visited:
-                visited.append(current)
+        # 显式栈：当前路径上的节点、尚未检查的出边位置（逆序遍历以保持原有访问顺序）和累计权重
+        node_stack = [s]
+        edge_stack = [offsets[s + 1]]
+        cost_stack = [0]
+        if stats is not None:
+            stats.pushes += 1
+            stats.peak_frontier = max(stats.peak_frontier, 1)
+            stats.edge_scans += offsets[s + 1] - offsets[s]
+            stats.mark("setup")
+        while node_stack:
+            current = node_stack[-1]
+            i = edge_stack[-1]
+            if i == offsets[current]:
+                # 邻居已全部检查，回溯
+                node_stack.pop()
+                edge_stack.pop()
+                cost_stack.pop()
+                on_path[current] = 0
+                continue
+            i -= 1
+            edge_stack[-1] = i
+            nx = targets[i]
+            if on_path[nx]:  # 避免当前路径中的环路
+                continue
+            cost = cost_stack[-1] + weights[i]
+            if prune:
+                if cost >= min_cost or cost >= best_cost[nx]:
+                    continue
+                best_cost[nx] = cost
+            if expansions >= max_expansions:
+                break
+            expansions += 1
+            if progress is not None and expansions % interval == 0:
+                progress(expansions)
+            parent[nx] = current
+            if not seen[nx]:
+                seen[nx] = 1
+                visited.append(ids[nx])
 
             # 如果到达目标节点，更新最短路径
-            if current == end_id:
+            if nx == t:
                 if cost < min_cost:
                     min_cost = cost
-                    shortest_path = route
-            else:
-                # 探索邻居节点
-                for nx, w in GraphAlgorithms.getNeighbors(graph_data, current):
-                    if nx not in path_visited:  # 避免当前路径中的环路
-                        new_path_visited = path_visited.copy()
-                        new_path_visited.add(nx)
-                        stack.append((nx, route + [nx], cost + w, new_path_visited))
+                    shortest_path = graph.pathTo(parent, t)
+                continue
+            on_path[nx] = 1
+            node_stack.append(nx)
+            edge_stack.append(offsets[nx + 1])
+            cost_stack.append(cost)
+            if stats is not None:
+                stats.pushes += 1
+                stats.edge_scans += offsets[nx + 1] - offsets[nx]
+                if len(node_stack) > stats.peak_frontier:
+                    stats.peak_frontier = len(node_stack)
 
+        if stats is not None:
+            # 入栈时按出弧总数计入扫描数，提前结束时减去栈中节点尚未检查的出弧
+            stats.edge_scans -= sum(edge_stack[k] - offsets[node_stack[k]] for k in range(len(node_stack)))
+            stats.pops += stats.pushes - len(node_stack)
+            stats.finish("search", len(visited), relaxations=expansions - 1)
         # 返回访问过的节点列表、最短路径和最小权重
         if shortest_path:
             return visited, shortest_path, min_cost
         return visited, [], 0
 
     @staticmethod
-    def bfs(graph_data, start_id, end_id):
+    def bfs(graph_data, start_id, end_id, progress=None, stats=None):
+        if stats is not None:
+            stats.begin()
+        graph = GraphAlgorithms.compile(graph_data)
+        s = graph.index.get(start_id)
+        if s is None:
+            return [], [], 0
+        t = graph.index.get(end_id, -1)
+        offsets, targets, weights = graph.offsets, graph.targets, graph.weights
+        n = graph.nodeCount()
+        prev = [-1] * n
+        cost = [0] * n  # 沿 BFS 树到达各节点的路径权重
+        seen = bytearray(n)
+        seen[s] = 1
         visited = []  # 记录所有访问过的节点
-        min_cost = float('infinity')  # 最小权重
-        shortest_path = []  # 最短路径
+        interval = GraphAlgorithms.PROGRESS_INTERVAL
 
-        queue = deque([(start_id, [start_id], 0)])
+        # 入队时即标记，每个节点只入队一次；继续探索即使已经找到目标节点
+        queue = deque([s])
+        if stats is not None:
+            stats.mark("setup")
         while queue:
-            current, route, cost = queue.popleft()
-
-            if current not in visited:
-                visited.append(current)
-
-                # 如果到达目标节点，更新最短路径
-                if current == end_id:
-                    if cost < min_cost:
-                        min_cost = cost
-                        shortest_path = route
-                # 继续探索即使已经找到目标节点
-                for nx, w in GraphAlgorithms.getNeighbors(graph_data, current):
-                    if nx not in visited:
-                        queue.append((nx, route + [nx], cost + w))
+            current = queue.popleft()
+            visited.append(graph.ids[current])
+            if progress is not None and len(visited) % interval == 0:
+                progress(len(visited))
+            if stats is not None:
+                stats.peak_frontier = max(stats.peak_frontier, len(queue) + 1)  # 出队前的长度
+                stats.edge_scans += offsets[current + 1] - offsets[current]
+            for i in range(offsets[current], offsets[current + 1]):
+                nx = targets[i]
+                if not seen[nx]:
+                    seen[nx] = 1
+                    prev[nx] = current
+                    cost[nx] = cost[current] + weights[i]
+                    queue.append(nx)
 
+        if stats is not None:
+            # 每个节点入队、出队各一次，除起点外的入队都是一次松弛
+            stats.pushes += len(visited)
+            stats.pops += len(visited)
+            stats.finish("search", len(visited))
         # 返回访问过的节点列表、最短路径和最小权重
-        if shortest_path:
-            return visited, shortest_path, min_cost
+        if t != -1 and seen[t]:
+            path = graph.pathTo(prev, t)
+            if stats is not None:
+                stats.mark("path")
+            return visited, path, cost[t]
         return visited, [], 0
 
     @staticmethod
-    def dijkstra(graph_data, start_id, end_id):
+    def dijkstra(graph_data, start_id, end_id, progress=None, stats=None, queue="binary"):
+        """queue 为 PriorityQueues.KINDS 之一，dial 和 radix 要求边权为非负整数"""
+        if stats is not None:
+            stats.begin()
+        graph = GraphAlgorithms.compile(graph_data)
+        s = graph.index.get(start_id)
+        if s is None:
+            return [], [], 0
+        t = graph.index.get(end_id, -1)
+        offsets, targets, weights, ids = graph.offsets, graph.targets, graph.weights, graph.ids
+        n = graph.nodeCount()
         visited = []
-        dist = {n["id"]: math.inf for n in graph_data["nodes"]}
-        dist[start_id] = 0
-        prev = {}
-        pq = [(0, start_id)]
+        dist = [math.inf] * n
+        dist[s] = 0
+        prev = [-1] * n
+        settled = bytearray(n)
+        interval = GraphAlgorithms.PROGRESS_INTERVAL
+        push, pop, pq = PriorityQueues.create(queue, graph)
+        if stats is not None:
+            push, pop = stats.countingHeap(push, pop)
+            stats.mark("setup")
+        push(pq, (0, s))
         while pq:
-            current_dist, current = heapq.heappop(pq)
-            if current not in visited:
-                visited.append(current)
-                if current == end_id:
-                    route = GraphAlgorithms.reconstructPath(prev, start_id, end_id)
-                    return visited, route, current_dist
-                for nx, w in GraphAlgorithms.getNeighbors(graph_data, current):
-                    new_dist = current_dist + w
-                    if new_dist < dist[nx]:
-                        dist[nx] = new_dist
-                        prev[nx] = current
-                        heapq.heappush(pq, (new_dist, nx))
+            current_dist, current = pop(pq)
+            if settled[current]:
+                continue  # 过期的堆元素
+            settled[current] = 1
+            visited.append(ids[current])
+            if progress is not None and len(visited) % interval == 0:
+                progress(len(visited))
+            if current == t:
+                if stats is None:
+                    return visited, graph.pathTo(prev, t), current_dist
+                stats.finish("search", len(visited))
+                path = graph.pathTo(prev, t)
+                stats.mark("path")
+                return visited, path, current_dist
+            if stats is not None:
+                stats.edge_scans += offsets[current + 1] - offsets[current]
+            for i in range(offsets[current], offsets[current + 1]):
+                nx = targets[i]
+                new_dist = current_dist + weights[i]
+                if new_dist < dist[nx]:
+                    dist[nx] = new_dist
+                    prev[nx] = current
+                    push(pq, (new_dist, nx))
+        if stats is not None:
+            stats.finish("search", len(visited))
         return visited, [], 0
 
     @staticmethod
-    def a_star(graph_data, start_id, end_id):
+    def multi_dijkstra(graph_data, start_ids, end_ids, k=1, progress=None, stats=None, queue="binary"):
+        """多起点、多终点的 Dijkstra，一次搜索求出离起点集合最近的 k 个终点
+
+        所有起点以距离 0 同时入队，每个节点记录把它扩展出来的起点；依次确定到 k 个终点时停止。
+        返回 (visited, matches)，matches 按代价从小到大排列，每项为 (起点ID, 终点ID, path, cost)，
+        每个终点只出现一次，对应离它最近的起点。不存在的ID被忽略，终点不足 k 个可达时 matches 较短。
+        """
+        if stats is not None:
+            stats.begin()
+        graph = GraphAlgorithms.compile(graph_data)
+        index = graph.index
+        sources = {index[node_id] for node_id in start_ids if node_id in index}
+        if not sources:
+            return [], []
+        n = graph.nodeCount()
+        is_target = bytearray(n)
+        remaining = 0
+        for node_id in end_ids:
+            t = index.get(node_id)
+            if t is not None and not is_target[t]:
+                is_target[t] = 1
+                remaining += 1
+        remaining = min(k, remaining)
+        offsets, targets, weights, ids = graph.offsets, graph.targets, graph.weights, graph.ids
         visited = []
-        dist = {n["id"]: math.inf for n in graph_data["nodes"]}
-        dist[start_id] = 0
-        prev = {}
-        def heuristic(a, b):
-            nodeA = GraphAlgorithms.getNode(graph_data, a)
-            nodeB = GraphAlgorithms.getNode(graph_data, b)
-            if nodeA and nodeB:
-                return math.hypot(nodeA["x"] - nodeB["x"], nodeA["y"] - nodeB["y"])
-            return 0
-        open_set = [(0, start_id)]
+        matches = []
+        dist = [math.inf] * n
+        prev = [-1] * n
+        root = [-1] * n  # 扩展出该节点的起点
+        settled = bytearray(n)
+        interval = GraphAlgorithms.PROGRESS_INTERVAL
+        push, pop, pq = PriorityQueues.create(queue, graph)
+        if stats is not None:
+            push, pop = stats.countingHeap(push, pop)
+            stats.mark("setup")
+        for s in sorted(sources):
+            dist[s] = 0
+            root[s] = s
+            push(pq, (0, s))
+        while pq and remaining:
+            current_dist, current = pop(pq)
+            if settled[current]:
+                continue  # 过期的堆元素
+            settled[current] = 1
+            visited.append(ids[current])
+            if progress is not None and len(visited) % interval == 0:
+                progress(len(visited))
+            if is_target[current]:
+                matches.append((ids[root[current]], ids[current], current, current_dist))
+                remaining -= 1
+                if not remaining:
+                    break
+            if stats is not None:
+                stats.edge_scans += offsets[current + 1] - offsets[current]
+            for i in range(offsets[current], offsets[current + 1]):
+                nx = targets[i]
+                new_dist = current_dist + weights[i]
+                if new_dist < dist[nx]:
+                    dist[nx] = new_dist
+                    prev[nx] = current
+                    root[nx] = root[current]
+                    push(pq, (new_dist, nx))
+        if stats is not None:
+            stats.finish("search", len(visited), len(sources))
+        matches = [(source_id, target_id, graph.pathTo(prev, t), cost)
+                   for source_id, target_id, t, cost in matches]
+        if stats is not None:
+            stats.mark("path")
+        return visited, matches
+
+    @staticmethod
+    def a_star(graph_data, start_id, end_id, progress=None, stats=None, heuristic="euclidean", queue="binary"):
+        """heuristic 为 "euclidean"、"manhattan"、"zero" 或距离函数 d(graph, u, v)，按图的边权标定后保证可采纳
+
+        queue 为 PriorityQueues.KINDS 之一。dial 和 radix 要求整数键值，此时启发式向下取整：
+        边权为整数时，一致启发式取整后仍然一致，出队键值单调不减。
+        """
+        if stats is not None:
+            stats.begin()
+        graph = GraphAlgorithms.compile(graph_data)
+        s = graph.index.get(start_id)
+        if s is None:
+            return [], [], 0
+        t = graph.index.get(end_id, -1)
+        offsets, targets, weights, ids = graph.offsets, graph.targets, graph.weights, graph.ids
+        n = graph.nodeCount()
+        visited = []
+        dist = [math.inf] * n
+        dist[s] = 0
+        prev = [-1] * n
+        settled = bytearray(n)
+        interval = GraphAlgorithms.PROGRESS_INTERVAL
+        # 终点不存在时搜索遍历整个连通分量，启发式不起作用
+        heuristic = Heuristics.toTarget(graph, t, heuristic) if t != -1 else (lambda v: 0)
+        push, pop, open_set = PriorityQueues.create(queue, graph)
+        if queue in PriorityQueues.INTEGER_KINDS:
+            estimate = heuristic
+
+            def heuristic(v):
+                return math.floor(estimate(v))
+        if stats is not None:
+            push, pop = stats.countingHeap(push, pop)
+            heuristic = stats.countingHeuristic(heuristic)
+            stats.mark("setup")
+        push(open_set, (0, s))
         while open_set:
-            _, current = heapq.heappop(open_set)
-            if current not in visited:
-                visited.append(current)
-                if current == end_id:
-                    route = GraphAlgorithms.reconstructPath(prev, start_id, end_id)
-                    return visited, route, dist[end_id]
-                for nx, w in GraphAlgorithms.getNeighbors(graph_data, current):
-                    g_cost = dist[current] + w
-                    if g_cost < dist[nx]:
-                        dist[nx] = g_cost
-                        f_cost = g_cost + heuristic(nx, end_id)
-                        prev[nx] = current
-                        heapq.heappush(open_set, (f_cost, nx))
+            _, current = pop(open_set)
+            if settled[current]:
+                continue
+            settled[current] = 1
+            visited.append(ids[current])
+            if progress is not None and len(visited) % interval == 0:
+                progress(len(visited))
+            if current == t:
+                if stats is None:
+                    return visited, graph.pathTo(prev, t), dist[t]
+                stats.finish("search", len(visited))
+                path = graph.pathTo(prev, t)
+                stats.mark("path")
+                return visited, path, dist[t]
+            if stats is not None:
+                stats.edge_scans += offsets[current + 1] - offsets[current]
+            for i in range(offsets[current], offsets[current + 1]):
+                nx = targets[i]
+                g_cost = dist[current] + weights[i]
+                if g_cost < dist[nx]:
+                    dist[nx] = g_cost
+                    f_cost = g_cost + heuristic(nx)
+                    prev[nx] = current
+                    push(open_set, (f_cost, nx))
+        if stats is not None:
+            stats.finish("search", len(visited))
         return visited, [], 0
 
+    @staticmethod
+    def shortestPathTree(graph_data, source_id):
+        """一次计算 source_id 到所有节点的最短路径，返回可反复查询的 ShortestPathTree"""
+        return ShortestPathTree.build(GraphAlgorithms.compile(graph_data), source_id)
+
+    @staticmethod
+    def oneToMany(graph_data, start_id, end_ids, backend="python"):
+        """一次搜索求出起点到多个终点的 (path, cost) 列表，不可达为 ([], inf)"""
+        graph = GraphAlgorithms.compile(graph_data)
+        if backend == "scipy" and SparseBackend.available():
+            return SparseBackend.oneToMany(graph, start_id, end_ids)
+        tree = ShortestPathTree.build(graph, start_id)
+        return [(tree.pathTo(end_id), tree.distanceTo(end_id)) for end_id in end_ids]
+
+    @staticmethod
+    def bfsLevels(graph_data, start_id, backend="python"):
+        """返回 节点ID -> 从起点出发的最少边数，不可达的节点不出现在结果中"""
+        graph = GraphAlgorithms.compile(graph_data)
+        if backend == "scipy" and SparseBackend.available():
+            return SparseBackend.bfsLevels(graph, start_id)
+        s = graph.index.get(start_id)
+        if s is None:
+            return {}
+        offsets, targets = graph.offsets, graph.targets
+        level = [-1] * graph.nodeCount()
+        level[s] = 0
+        queue = deque([s])
+        while queue:
+            current = queue.popleft()
+            for i in range(offsets[current], offsets[current + 1]):
+                nx = targets[i]
+                if level[nx] == -1:
+                    level[nx] = level[current] + 1
+                    queue.append(nx)
+        return {graph.ids[u]: hops for u, hops in enumerate(level) if hops != -1}
+
+    @staticmethod
+    def dynamicShortestPathTree(graph_data, source_id):
+        """返回可随节点、边的追加增量修复的最短路径树，见 DynamicShortestPathTree.sync"""
+        return DynamicShortestPathTree(graph_data, GraphAlgorithms.shortestPathTree(graph_data, source_id))
+
+    @staticmethod
+    def bidirectional_dijkstra(graph_data, start_id, end_id, progress=None, stats=None):
+        return GraphAlgorithms.bidirectionalSearch(graph_data, start_id, end_id, False, progress, stats)
+
+    @staticmethod
+    def bidirectional_a_star(graph_data, start_id, end_id, progress=None, stats=None, heuristic="euclidean"):
+        return GraphAlgorithms.bidirectionalSearch(graph_data, start_id, end_id, True, progress, stats, heuristic)
+
+    @staticmethod
+    def bidirectionalSearch(graph_data, start_id, end_id, use_heuristic, progress=None, stats=None,
+                            heuristic="euclidean"):
+        """从起点沿正向弧、从终点沿反向弧同时搜索
+
+        use_heuristic 为 True 时使用平均势函数 pf(v) = (h(v, t) - h(s, v)) / 2，反向势为 -pf，
+        两侧都是一致的 A*。势函数只为搜索实际触及的节点计算并缓存，不在搜索前遍历全图。两侧堆顶键值之和不小于当前最优相遇代价 mu 时停止，此时 mu 即最短路径长度。
+        visited 按两侧实际出堆的先后顺序交错记录；统计中的确定节点数是两侧分别确定的节点数之和，
+        队列峰值取单侧堆的最大长度。
+        """
+        graph = GraphAlgorithms.compile(graph_data)
+        s = graph.index.get(start_id)
+        t = graph.index.get(end_id)
+        if s is None or t is None:
+            return GraphAlgorithms.dijkstra(graph, start_id, end_id, progress, stats)
+        if stats is not None:
+            stats.begin()
+        if s == t:
+            return [start_id], [start_id], 0
+        reverse = graph.reverse()
+        ids = graph.ids
+        n = graph.nodeCount()
+
+        potential = {}  # 节点下标 -> 正向势 pf，按需计算
+        if use_heuristic:
+            to_target = Heuristics.toTarget(graph, t, heuristic)
+            to_source = Heuristics.toTarget(graph, s, heuristic)
+            potential[s] = (to_target(s) - to_source(s)) / 2
+            potential[t] = (to_target(t) - to_source(t)) / 2
+        else:
+            potential[s] = potential[t] = 0
+        push, pop = heapq.heappush, heapq.heappop
+        if stats is not None:
+            push, pop = stats.countingHeap(push, pop)
+            stats.mark("setup")
+
+        # 下标 0 为正向搜索，1 为反向搜索
+        sides = (graph, reverse)
+        dist = ([math.inf] * n, [math.inf] * n)
+        prev = ([-1] * n, [-1] * n)
+        settled = (bytearray(n), bytearray(n))
+        sign = (1, -1)
+        dist[0][s] = 0
+        dist[1][t] = 0
+        heaps = ([], [])
+        push(heaps[0], (potential[s], s))
+        push(heaps[1], (-potential[t], t))
+        seen = bytearray(n)
+        visited = []
+        mu = math.inf
+        meet = -1
+        settled_count = 0
+        interval = GraphAlgorithms.PROGRESS_INTERVAL
+
+        while heaps[0] and heaps[1]:
+            top_f = heaps[0][0][0]
+            top_r = heaps[1][0][0]
+            if top_f + top_r >= mu:
+                break
+            side = 0 if top_f <= top_r else 1
+            pq = heaps[side]
+            _, current = pop(pq)
+            done = settled[side]
+            if done[current]:
+                continue  # 过期的堆元素
+            done[current] = 1
+            settled_count += 1
+            if not seen[current]:
+                seen[current] = 1
+                visited.append(ids[current])
+                if progress is not None and len(visited) % interval == 0:
+                    progress(len(visited))
+
+            g = sides[side]
+            d, other_d, p, k = dist[side], dist[1 - side], prev[side], sign[side]
+            current_dist = d[current]
+            offsets, targets, weights = g.offsets, g.targets, g.weights
+            if stats is not None:
+                stats.edge_scans += offsets[current + 1] - offsets[current]
+            for i in range(offsets[current], offsets[current + 1]):
+                nx = targets[i]
+                new_dist = current_dist + weights[i]
+                if new_dist < d[nx]:
+                    d[nx] = new_dist
+                    p[nx] = current
+                    if use_heuristic:
+                        pf = potential.get(nx)
+                        if pf is None:
+                            pf = potential[nx] = (to_target(nx) - to_source(nx)) / 2
+                        push(pq, (new_dist + k * pf, nx))
+                    else:
+                        push(pq, (new_dist, nx))
+                    total = new_dist + other_d[nx]
+                    if total < mu:
+                        mu = total
+                        meet = nx
+
+        if stats is not None:
+            if use_heuristic:
+                stats.heuristic_evals += 2 * len(potential)  # 每个节点的势函数计算两次距离
+            stats.finish("search", settled_count, sources=2)
+        if meet == -1:
+            return visited, [], 0
+        # 正向前驱给出 s -> meet，反向前驱给出 meet -> t
+        route = graph.pathTo(prev[0], meet)
+        current = prev[1][meet]
+        while current != -1:
+            route.append(ids[current])
+            current = prev[1][current]
+        if stats is not None:
+            stats.mark("path")
+        return visited, route, mu
+
+    @staticmethod
+    def prepareHierarchy(graph_data, hierarchy=None, progress=None):
+        """为图准备收缩层次：传入已载入的 hierarchy 时直接使用，否则在首次调用时构建
+
+        构建期间 progress(已收缩节点数) 的调用方式与搜索相同。
+        """
+        graph = GraphAlgorithms.compile(graph_data)
+        if hierarchy is not None:
+            graph.hierarchy = hierarchy
+        elif graph.hierarchy is None:
+            graph.hierarchy = ContractionHierarchy.build(graph, progress)
+        return graph.hierarchy
+
+    @staticmethod
+    def contraction_hierarchy(graph_data, start_id, end_id, progress=None, stats=None):
+        if stats is None:
+            return GraphAlgorithms.prepareHierarchy(graph_data, progress=progress).query(start_id, end_id)
+        stats.begin()
+        hierarchy = GraphAlgorithms.prepareHierarchy(graph_data, progress=progress)
+        stats.mark("preprocess")  # 已有层次时只包含编译检查
+        return hierarchy.query(start_id, end_id, stats)
+
     @staticmethod
     def getNeighbors(graph_data, node_id):
-        neighbors = []
-        for e in graph_data["edges"]:
-            if e["start"] == node_id:
-                neighbors.append((e["end"], e["weight"]))
-            if not e["directed"] and e["end"] == node_id:
-                neighbors.append((e["start"], e["weight"]))
-        return neighbors
+        graph = GraphAlgorithms.compile(graph_data)
+        u = graph.index.get(node_id)
+        if u is None:
+            return []
+        return [(graph.ids[v], w) for v, w in graph.neighbors(u)]
+
+    @staticmethod
+    def resolveId(graph_data, node_id):
+        """把外部输入的ID对应到图中节点ID的类型，多个ID（列表、元组、集合）返回元组，见 CompiledGraph.resolveId"""
+        graph = GraphAlgorithms.compile(graph_data)
+        if isinstance(node_id, GraphAlgorithms.ID_COLLECTIONS):
+            return tuple(graph.resolveId(nid) for nid in node_id)
+        return graph.resolveId(node_id)
 
     @staticmethod
     def getNode(graph_data, node_id):
-        for n in graph_data["nodes"]:
-            if n["id"] == node_id:
-                return n
-        return None
+        graph = GraphAlgorithms.compile(graph_data)
+        i = graph.index.get(node_id)
+        if i is None:
+            return None
+        return graph_data["nodes"][i]
 
     @staticmethod
     def reconstructPath(prev, start, end):
@@ -0,0 +1,119 @@
+"""多进程批量执行最短路径查询
+
+编译后的图按 .graphbin 布局写入一块共享内存，工作进程直接映射这块内存构造图，
+不需要把图序列化后发送给每个进程；查询按块分发，结果按输入顺序返回。
+"""
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import os
+import time
+
+from algorithms import GraphAlgorithms
+from hierarchy import ContractionHierarchy
+from readwrite import GraphIO
+from searchstats import SearchStats
+
+# 工作进程中的共享内存和映射出的图
+_worker_memory = None
+_worker_graph = None
+
+
+def attachGraph(name, hierarchy):
+    """工作进程初始化：映射共享内存中的图，有收缩层次时一并载入"""
+    global _worker_memory, _worker_graph
+    # 进程池中的进程与主进程共用资源跟踪器，共享内存由主进程在 close() 时释放
+    _worker_memory = shared_memory.SharedMemory(name=name)
+    _worker_graph = GraphAlgorithms.compile(GraphIO.unpackBinary(_worker_memory.buf))
+    if hierarchy is not None:
+        _worker_graph.hierarchy = ContractionHierarchy.fromDict(_worker_graph, hierarchy)
+
+
+def timedSearches(graph, queries, keep_visited=True, backend="python", heuristic="euclidean", queue="binary",
+                  stats=False):
+    """依次执行查询，返回 [(visited, path, cost, 耗时毫秒)]；keep_visited 为 False 时 visited 只保留节点数
+
+    stats 为 True 时每项最后附加这次搜索的 SearchStats。
+    """
+    results = []
+    for algo, start_id, end_id in queries:
+        search_stats = SearchStats() if stats else None
+        start_time = time.perf_counter()
+        visited, path, cost = GraphAlgorithms.runSearch(graph, algo, start_id, end_id, backend, stats=search_stats,
+                                                        heuristic=heuristic, queue=queue)
+        elapsed = (time.perf_counter() - start_time) * 1000
+        result = (visited if keep_visited else len(visited), path, cost, elapsed)
+        results.append(result + (search_stats,) if stats else result)
+    return results
+
+
+def runChunk(queries, keep_visited, backend, heuristic, queue, stats):
+    """在工作进程中执行一块查询"""
+    return timedSearches(_worker_graph, queries, keep_visited, backend, heuristic, queue, stats)
+
+
+class BatchRunner:
+    """在进程池中并行执行 (算法, 起点, 终点) 查询
+
+    with BatchRunner(graph_data, workers=8) as runner:
+        results = runner.run(queries)
+
+    graph_data 为字典或 GraphStore。同一个 BatchRunner 可以执行多批查询，进程池和共享内存在 close() 时释放。
+    需要 CH 时在创建前调用 GraphAlgorithms.prepareHierarchy，或传入 hierarchy=True 由主进程构建一次。
+    """
+
+    def __init__(self, graph_data, workers=None, hierarchy=False):
+        graph = GraphAlgorithms.compile(graph_data)
+        if hierarchy:
+            GraphAlgorithms.prepareHierarchy(graph)
+        self.workers = workers or os.cpu_count() or 1
+        size, sections = GraphIO.packBinary(graph_data)
+        self.memory = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        try:
+            for offset, chunk in sections:
+                self.memory.buf[offset:offset + len(chunk)] = chunk
+            del sections
+            # 收缩层次只有少量数组，随初始化参数发送给每个工作进程一次
+            layers = graph.hierarchy.toDict() if graph.hierarchy is not None else None
+            self.has_hierarchy = layers is not None  # 为 False 时工作进程在首次 CH 查询时各自构建
+            self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=attachGraph,
+                                            initargs=(self.memory.name, layers))
+        except BaseException:
+            self.memory.close()
+            self.memory.unlink()
+            raise
+
+    def run(self, queries, keep_visited=True, timed=False, chunksize=None, backend="python", heuristic="euclidean",
+            queue="binary", stats=False):
+        """按输入顺序返回各查询的 (visited, path, cost)
+
+        keep_visited 为 False 时 visited 只返回节点数，减少进程间传输的数据量；
+        timed 为 True 时每项附加在工作进程中测得的耗时（毫秒）；stats 为 True 时每项最后附加 SearchStats。
+        """
+        queries = list(queries)  # ID原样传给工作进程，整数ID和多起点、多终点的元组都不做转换
+        if chunksize is None:
+            # 每个进程分到多块，运行时间不均匀时也能保持负载均衡
+            chunksize = max(1, len(queries) // (self.workers * 8))
+        chunks = [queries[i:i + chunksize] for i in range(0, len(queries), chunksize)]
+        results = []
+        repeat = len(chunks)
+        for chunk in self.pool.map(runChunk, chunks, [keep_visited] * repeat, [backend] * repeat, [heuristic] * repeat,
+                                   [queue] * repeat, [stats] * repeat):
+            results.extend(chunk)
+        if timed:
+            return results
+        return [result[:3] + result[4:] for result in results]
+
+    def submit(self, query, keep_visited=True, backend="python", heuristic="euclidean", queue="binary", stats=False):
+        """提交单个查询，返回 concurrent.futures.Future，结果为 [(visited, path, cost, 耗时毫秒)]，格式同 timedSearches"""
+        return self.pool.submit(runChunk, [tuple(query)], keep_visited, backend, heuristic, queue, stats)
+
+    def close(self):
+        self.pool.shutdown()
+        self.memory.close()
+        self.memory.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
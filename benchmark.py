@@ -0,0 +1,299 @@
+"""性能基准：生成可复现的合成图，测量各搜索算法和图文件读写的耗时、峰值内存和扩展节点数
+
+用法:
+    python benchmark.py                                  # 默认规模约 1k 条边
+    python benchmark.py --sizes 1k 10k 100k 1M           # 更大的规模
+    python benchmark.py --update-baseline                # 把本次结果保存为基准
+    python benchmark.py --queues binary dial             # Dijkstra 和 A* 只比较这两种优先队列
+基准文件默认为 benchmark_baseline.json（仓库中提交了默认参数下的基准），与基准比较发现退化或基准文件不存在时以状态码 1 退出。
+耗时和内存随机器变化，默认容差较宽，主要用于发现成倍的退化；扩展节点数与机器无关，必须完全一致。
+"""
+import argparse
+import gc
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from algorithms import GraphAlgorithms
+from compiledgraph import CompiledGraph
+from graphstore import GraphStore
+from pqueues import PriorityQueues
+from readwrite import GraphIO
+from searchstats import SearchStats
+
+
+class GraphGenerators:
+    """可复现的合成图，均为无向图，坐标单位与画布像素相同，边权为欧氏距离 / 50（与画布添加边时一致）"""
+
+    @staticmethod
+    def grid(edge_count, seed=0):
+        """四邻接网格，边权均为 1"""
+        side = max(2, round(math.sqrt(edge_count / 2)))
+        store = GraphStore()
+        for r in range(side):
+            for c in range(side):
+                store.addNode(str(r * side + c), c * 50, r * 50)
+        for r in range(side):
+            for c in range(side):
+                u = r * side + c
+                if c + 1 < side:
+                    store.addEdge(str(u), str(u + 1), 1.0, False)
+                if r + 1 < side:
+                    store.addEdge(str(u), str(u + side), 1.0, False)
+        return store.finish()
+
+    @staticmethod
+    def geometric(edge_count, seed=0, degree=6, integer=False):
+        """随机几何图：节点均匀分布，距离不超过半径的节点相连，平均度约为 degree
+
+        integer 为 True 时边权为取整的像素距离，而不是像素距离 / 50。
+        """
+        rng = random.Random(seed)
+        n = max(2, edge_count * 2 // degree)
+        size = 50 * math.sqrt(n)  # 平均每 50x50 像素一个节点
+        radius = size * math.sqrt(degree / (math.pi * n))
+        store = GraphStore()
+        points = [(rng.uniform(0, size), rng.uniform(0, size)) for _ in range(n)]
+        cells = {}
+        for i, (x, y) in enumerate(points):
+            store.addNode(str(i), x, y)
+            cells.setdefault((int(x // radius), int(y // radius)), []).append(i)
+        for i, (x, y) in enumerate(points):
+            cx, cy = int(x // radius), int(y // radius)
+            for gx in (cx - 1, cx, cx + 1):
+                for gy in (cy - 1, cy, cy + 1):
+                    for j in cells.get((gx, gy), ()):
+                        if j > i:
+                            d = math.hypot(points[j][0] - x, points[j][1] - y)
+                            if d <= radius:
+                                weight = max(1, round(d)) if integer else max(0.01, round(d / 50, 2))
+                                store.addEdge(str(i), str(j), weight, False)
+        return store.finish()
+
+    @staticmethod
+    def integerGeometric(edge_count, seed=0):
+        """整数边权的随机几何图，与 CSV 导入的整数边权一样可以使用 dial 和 radix 队列"""
+        return GraphGenerators.geometric(edge_count, seed, integer=True)
+
+    @staticmethod
+    def scaleFree(edge_count, seed=0, links=2):
+        """Barabási–Albert 无标度图：每个新节点按度数比例连接 links 个已有节点，坐标随机"""
+        rng = random.Random(seed)
+        n = max(links + 1, edge_count // links)
+        size = 50 * math.sqrt(n)
+        store = GraphStore()
+        points = [(rng.uniform(0, size), rng.uniform(0, size)) for _ in range(n)]
+        for i, (x, y) in enumerate(points):
+            store.addNode(str(i), x, y)
+
+        def connect(u, v):
+            d = math.hypot(points[u][0] - points[v][0], points[u][1] - points[v][1])
+            store.addEdge(str(u), str(v), max(0.01, round(d / 50, 2)), False)
+
+        # 每条边的两个端点各记录一次，均匀抽取即按度数比例选点
+        endpoints = []
+        for u in range(links + 1):
+            for v in range(u):
+                connect(u, v)
+                endpoints += (u, v)
+        for u in range(links + 1, n):
+            targets = set()
+            while len(targets) < links:
+                targets.add(rng.choice(endpoints))
+            for v in targets:
+                connect(u, v)
+                endpoints += (u, v)
+        return store.finish()
+
+
+FAMILIES = {
+    "grid": GraphGenerators.grid,
+    "geometric": GraphGenerators.geometric,
+    "geometric-int": GraphGenerators.integerGeometric,
+    "scalefree": GraphGenerators.scaleFree,
+}
+SIZES = {"1k": 1000, "10k": 10000, "100k": 100000, "1M": 1000000}
+FILE_FORMATS = (".json", ".graphbin")
+
+
+def measure(fn, memory=True, repeat=1):
+    """运行 fn，返回 (结果, 耗时秒, 峰值内存 KB)
+
+    耗时取 repeat 次运行中最短的一次以减小噪声；峰值内存另外运行一次测量，
+    因为 tracemalloc 会显著拖慢 Python 代码，不能与计时同时开启。
+    """
+    elapsed = math.inf
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = fn()
+        elapsed = min(elapsed, time.perf_counter() - start)
+    peak = None
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        fn()
+        peak = tracemalloc.get_traced_memory()[1] // 1024
+        tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def benchmarkGraph(name, store, queries, algorithms, memory=True, repeat=3, queues=("binary",)):
+    """对一张图测量编译、各算法的一组查询和文件读写，返回 名称 -> 指标
+
+    Dijkstra 和 A* 另外用 queues 中除 binary 以外的优先队列各测一次，记为 "名称/算法@队列"；
+    dial 和 radix 只在边权均为整数的图上测量。
+    """
+    results = {}
+    _, elapsed, peak = measure(lambda: CompiledGraph.fromStore(store), memory, repeat)
+    results[f"{name}/compile"] = {"time_s": elapsed, "peak_kb": peak}
+    graph = GraphAlgorithms.compile(store)
+
+    for algo in algorithms:
+        if algo == "CH":
+            graph.hierarchy = None
+            _, elapsed, peak = measure(lambda: GraphAlgorithms.prepareHierarchy(graph), False)
+            results[f"{name}/CH-build"] = {"time_s": elapsed, "peak_kb": peak}
+
+        def run():
+            return [GraphAlgorithms.runSearch(graph, algo, s, t) for s, t in queries]
+        found, elapsed, peak = measure(run, memory, repeat)
+        # 计数在计时之外另跑一遍收集，不影响耗时
+        total = SearchStats()
+        for s, t in queries:
+            stats = SearchStats()
+            GraphAlgorithms.runSearch(graph, algo, s, t, stats=stats)
+            total.add(stats)
+        results[f"{name}/{algo}"] = {
+            "time_s": elapsed,
+            "peak_kb": peak,
+            "expanded": sum(len(visited) for visited, _, _ in found),
+            "stats": total.toDict(),
+        }
+        if algo not in ("Dijkstra", "A*"):
+            continue
+        for queue in queues:
+            if queue == "binary" or (queue in PriorityQueues.INTEGER_KINDS and not graph.integerWeights()):
+                continue
+
+            def runWithQueue():
+                return [GraphAlgorithms.runSearch(graph, algo, s, t, queue=queue) for s, t in queries]
+            found, elapsed, peak = measure(runWithQueue, memory, repeat)
+            results[f"{name}/{algo}@{queue}"] = {
+                "time_s": elapsed,
+                "peak_kb": peak,
+                "expanded": sum(len(visited) for visited, _, _ in found),
+            }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for ext in FILE_FORMATS:
+            fname = os.path.join(tmp, "graph" + ext)
+            _, elapsed, peak = measure(lambda: GraphIO.saveGraph(fname, store), memory, repeat)
+            results[f"{name}/save{ext}"] = {"time_s": elapsed, "peak_kb": peak}
+
+            def load():
+                loaded = GraphIO.loadStore(fname)
+                GraphAlgorithms.compile(loaded)
+                return loaded.nodeCount()
+            _, elapsed, peak = measure(load, memory, repeat)
+            results[f"{name}/load{ext}"] = {"time_s": elapsed, "peak_kb": peak}
+    return results
+
+
+def runBenchmarks(families, sizes, algorithms, query_count=5, seed=0, memory=True, repeat=3, log=None,
+                  queues=("binary",)):
+    results = {}
+    for family in families:
+        for size in sizes:
+            store = FAMILIES[family](SIZES[size], seed)
+            rng = random.Random(seed)
+            ids = store.ids
+            queries = [(rng.choice(ids), rng.choice(ids)) for _ in range(query_count)]
+            name = f"{family}-{size}"
+            if log is not None:
+                log(f"{name}: {store.nodeCount()} 个节点, {store.edgeCount()} 条边")
+            results.update(benchmarkGraph(name, store, queries, algorithms, memory, repeat, queues))
+    return results
+
+
+def compareWithBaseline(results, baseline, tolerance=1.0, min_time=0.005):
+    """返回退化列表 [(名称, 指标, 基准值, 本次值)]
+
+    耗时和峰值内存超过基准的 (1 + tolerance) 倍视为退化，耗时低于 min_time 秒的不比较以避免计时噪声；
+    扩展节点数由算法决定，与基准不同即报告。
+    """
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if max(current["time_s"], base["time_s"]) >= min_time and \
+                current["time_s"] > base["time_s"] * (1 + tolerance):
+            regressions.append((name, "time_s", base["time_s"], current["time_s"]))
+        if current.get("peak_kb") is not None and base.get("peak_kb") is not None and \
+                current["peak_kb"] > base["peak_kb"] * (1 + tolerance):
+            regressions.append((name, "peak_kb", base["peak_kb"], current["peak_kb"]))
+        if "expanded" in base and current.get("expanded") != base["expanded"]:
+            regressions.append((name, "expanded", base["expanded"], current.get("expanded")))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="最短路径算法与图文件读写的性能基准")
+    parser.add_argument("--families", nargs="+", default=list(FAMILIES), choices=list(FAMILIES))
+    parser.add_argument("--sizes", nargs="+", default=["1k"], choices=list(SIZES))
+    parser.add_argument("--algorithms", nargs="+", default=list(GraphAlgorithms.ALGORITHMS),
+                        choices=GraphAlgorithms.ALGORITHMS)
+    parser.add_argument("--queues", nargs="+", default=list(PriorityQueues.KINDS), choices=PriorityQueues.KINDS,
+                        help="Dijkstra 和 A* 比较的优先队列")
+    parser.add_argument("--queries", type=int, default=5, help="每个算法运行的查询数")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="计时重复次数，取最短耗时")
+    parser.add_argument("--no-memory", action="store_true", help="不测量峰值内存")
+    parser.add_argument("--baseline", default="benchmark_baseline.json")
+    parser.add_argument("--update-baseline", action="store_true", help="把本次结果写入基准文件")
+    parser.add_argument("--tolerance", type=float, default=1.0, help="允许的相对退化幅度")
+    parser.add_argument("-o", "--output", help="把本次结果另存为 JSON")
+    args = parser.parse_args(argv)
+
+    results = runBenchmarks(args.families, args.sizes, args.algorithms, args.queries, args.seed,
+                            not args.no_memory, args.repeat, log=print, queues=args.queues)
+    print(f"{'名称':<32}{'耗时(ms)':>12}{'峰值内存(KB)':>14}{'扩展节点':>10}")
+    for name, r in results.items():
+        peak = "-" if r["peak_kb"] is None else r["peak_kb"]
+        print(f"{name:<32}{r['time_s'] * 1000:>12.2f}{peak:>14}{r.get('expanded', '-'):>10}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, "r", encoding="utf-8") as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"基准已更新: {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        # 没有基准时无法判断是否退化，不能当作通过
+        print(f"没有基准文件 {args.baseline}，使用 --update-baseline 创建", file=sys.stderr)
+        return 1
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compareWithBaseline(results, baseline, args.tolerance)
+    for name, metric, base, current in regressions:
+        print(f"退化: {name} {metric} {base} -> {current}")
+    if not regressions:
+        print("与基准相比没有退化")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
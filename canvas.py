@@ -1,16 +1,20 @@
 from PyQt5.QtWidgets import QWidget, QInputDialog, QLineEdit
-from PyQt5.QtGui import QPainter, QPen, QBrush, QColor, QPainterPath
-from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QPainter, QPen, QBrush, QColor, QPainterPath, QPixmap, QRegion
+from PyQt5.QtCore import Qt, QRect, QPoint
 from PyQt5.QtCore import pyqtSignal
 import math
+from graphstore import GraphStore
+from spatialindex import SpatialIndex
 # ...existing code...
 
 class GraphCanvas(QWidget):
-    graphDataChanged = pyqtSignal(dict)
+    graphDataChanged = pyqtSignal(object)  # GraphStore 或 {"nodes", "edges"} 字典
+    # 一次高亮变化涉及的节点和边超过此数时直接整体重绘，不再逐个合并重绘区域
+    MAX_DIRTY_ITEMS = 256
     def __init__(self, parent=None):
         super().__init__(parent)
         self.end_id = None
-        self.graph_data = {"nodes": [], "edges": []}
+        self.graph_data = GraphStore()
         self.showNodeIDs = True
         self.showEdgeWeights = True
         self.showGrid = True  # 默认显示网格
@@ -21,10 +25,47 @@ class GraphCanvas(QWidget):
         self.addEdgeMode = False
         self.edgeDirected = False
         self.selectedNodes = []
+        self.nodeIndex = {}  # 节点ID -> 节点，避免按ID查找时线性扫描
+        self.spatialIndex = SpatialIndex(self.grid_size)  # 按坐标查找节点，用于点选
+        self.nodeEdges = {}  # 节点ID -> 与之相连的边，用于找出路径上的边
+        self.revision = 0  # 图版本号，每次载入或编辑图后递增
+        # 网格和未高亮的图预先绘制到离屏图层，只在图结构或显示选项变化时重绘
+        self.staticLayer = None
+        # 搜索高亮叠加层：节点ID -> 填充颜色，已显示的路径节点，以及需要高亮的边
+        self.nodeColors = {}
+        self.pathNodes = set()
+        self.pathEdges = {}  # id(边) -> 边
     def loadData(self, data):
         self.graph_data = data
+        self.revision += 1
+        self.rebuildNodeIndex()
+        self.invalidateStaticLayer()
+
+    def notifyGraphChanged(self):
+        """递增图版本号并发出 graphDataChanged 信号"""
+        self.revision += 1
+        self.invalidateStaticLayer()
+        self.graphDataChanged.emit(self.graph_data)
+
+    def invalidateStaticLayer(self):
+        self.staticLayer = None
         self.update()
 
+    def rebuildNodeIndex(self):
+        self.nodeIndex = {}
+        self.spatialIndex = SpatialIndex(self.grid_size)
+        self.nodeEdges = {}
+        for node in self.graph_data["nodes"]:
+            self.nodeIndex.setdefault(node["id"], node)
+            self.spatialIndex.insert(node, node["x"], node["y"])
+        for edge in self.graph_data["edges"]:
+            self.indexEdge(edge)
+
+    def indexEdge(self, edge):
+        self.nodeEdges.setdefault(edge["start"], []).append(edge)
+        if edge["end"] != edge["start"]:
+            self.nodeEdges.setdefault(edge["end"], []).append(edge)
+
     def enableAddNodeMode(self, enabled):
         self.addNodeMode = enabled
 
@@ -37,10 +78,7 @@ class GraphCanvas(QWidget):
 
     def isNodeAtPosition(self, x, y):
         """检查指定位置是否已有节点"""
-        for node in self.graph_data["nodes"]:
-            if node["x"] == x and node["y"] == y:
-                return True
-        return False
+        return self.spatialIndex.at(x, y) is not None
 
     def addEdge(self, directed=False):
         """启用添加边模式，允许用户通过点击两个节点来创建边"""
@@ -52,13 +90,16 @@ class GraphCanvas(QWidget):
 
     def getNodeAtPosition(self, x, y):
         """检测给定位置是否有节点，有则返回节点对象"""
-        for node in self.graph_data["nodes"]:
-            # 检查点击位置是否在节点圆形区域内
-            dx = x - node["x"]
-            dy = y - node["y"]
-            if dx*dx + dy*dy <= 100:  # 10*10 节点半径为10
-                return node
-        return None
+        # 检查点击位置是否在节点圆形区域内，节点半径为10
+        return self.spatialIndex.hit(x, y, 10)
+
+    def getNearestNode(self, x, y, max_distance=math.inf):
+        """返回离给定位置最近的节点，没有节点或超出 max_distance 时返回 None"""
+        return self.spatialIndex.nearest(x, y, max_distance)
+
+    def getNodesInRect(self, x1, y1, x2, y2):
+        """返回矩形区域内的全部节点，可用于框选"""
+        return self.spatialIndex.inRect(x1, y1, x2, y2)
 
     def mousePressEvent(self, event):
         if self.addNodeMode:
@@ -66,8 +107,11 @@ class GraphCanvas(QWidget):
             x, y = self.snapToGrid(event.x(), event.y())
             if not self.isNodeAtPosition(x, y):
                 new_id = str(len(self.graph_data["nodes"]) + 1)
-                self.graph_data["nodes"].append({"id": new_id, "x": x, "y": y})
-                self.graphDataChanged.emit(self.graph_data)
+                new_node = {"id": new_id, "x": x, "y": y}
+                self.graph_data["nodes"].append(new_node)
+                self.nodeIndex.setdefault(new_id, new_node)
+                self.spatialIndex.insert(new_node, x, y)
+                self.notifyGraphChanged()
             self.update()
         elif hasattr(self, 'addEdgeMode') and self.addEdgeMode:
             # 处理添加边模式下的点击
@@ -96,7 +140,8 @@ class GraphCanvas(QWidget):
                         "directed": self.edgeDirected
                     }
                     self.graph_data["edges"].append(edge_info)
-                    self.graphDataChanged.emit(self.graph_data)
+                    self.indexEdge(edge_info)
+                    self.notifyGraphChanged()
                     # 重置状态
                     self.selectedNodes = []
                     if hasattr(self.parent(), 'statusBar'):
@@ -105,20 +150,143 @@ class GraphCanvas(QWidget):
 
     def toggleNodeIDs(self):
         self.showNodeIDs = not self.showNodeIDs
-        self.update()
+        self.invalidateStaticLayer()
 
     def toggleEdgeWeights(self):
         self.showEdgeWeights = not self.showEdgeWeights
-        self.update()
+        self.invalidateStaticLayer()
+
+    def resizeEvent(self, event):
+        self.staticLayer = None
+        super().resizeEvent(event)
 
     def updateSearchVisualization(self, order, path, end_id):
-        self.searchOrder = order
-        self.searchPath = path
+        self.searchOrder = list(order)
+        self.searchPath = list(path)
         self.end_id = end_id
-        self.update()
+        # 节点颜色：起点和已探索到的终点为红色，路径节点为蓝色，其余已探索节点为黄色
+        colors = dict.fromkeys(order, Qt.yellow)
+        end_reached = end_id in colors
+        colors.update(dict.fromkeys(path, Qt.blue))
+        if order:
+            colors[order[0]] = Qt.red
+            if end_reached:
+                colors[end_id] = Qt.red
+        # 两端都在路径上的边高亮
+        path_set = set(path)
+        path_edges = {}
+        for nid in path_set:
+            for edge in self.nodeEdges.get(nid, ()):
+                if edge["start"] in path_set and edge["end"] in path_set:
+                    path_edges[id(edge)] = edge
+
+        # 只重绘颜色发生变化的节点和高亮状态发生变化的边
+        changed_nodes = [nid for nid in self.nodeColors.keys() | colors.keys()
+                         if self.nodeColors.get(nid) != colors.get(nid)]
+        old_edges = self.pathEdges
+        changed_edges = [old_edges[key] for key in old_edges.keys() - path_edges.keys()]
+        changed_edges += [path_edges[key] for key in path_edges.keys() - old_edges.keys()]
+        self.nodeColors = colors
+        self.pathNodes = path_set
+        self.pathEdges = path_edges
+        if len(changed_nodes) + len(changed_edges) > self.MAX_DIRTY_ITEMS:
+            self.update()
+            return
+        region = QRegion()
+        for nid in changed_nodes:
+            node = self.getNodeById(nid)
+            if node is not None:
+                region = region.united(self.nodeRect(node))
+        for edge in changed_edges:
+            rect = self.edgeRect(edge)
+            if rect is not None:
+                region = region.united(rect)
+        if not region.isEmpty():
+            self.update(region)
+
+    def addSearchStep(self, node_id, on_path):
+        """回放时追加一个已探索节点，只重绘该节点和新连通的路径边
+
+        与 updateSearchVisualization 的着色规则相同：第一个节点和终点为红色，路径节点为蓝色，其余为黄色。
+        """
+        self.searchOrder.append(node_id)
+        if on_path:
+            self.searchPath.append(node_id)
+        if len(self.searchOrder) == 1 or node_id == self.end_id:
+            color = Qt.red
+        elif on_path:
+            color = Qt.blue
+        else:
+            color = Qt.yellow
+        self.nodeColors[node_id] = color
+        region = QRegion()
+        node = self.getNodeById(node_id)
+        if node is not None:
+            region = region.united(self.nodeRect(node))
+        if on_path and node_id not in self.pathNodes:
+            self.pathNodes.add(node_id)
+            for edge in self.nodeEdges.get(node_id, ()):
+                if (edge["start"] in self.pathNodes and edge["end"] in self.pathNodes
+                        and id(edge) not in self.pathEdges):
+                    self.pathEdges[id(edge)] = edge
+                    rect = self.edgeRect(edge)
+                    if rect is not None:
+                        region = region.united(rect)
+        if not region.isEmpty():
+            self.update(region)
+
+    def nodeRect(self, node):
+        """节点圆和节点ID文字占据的区域"""
+        x, y = node["x"], node["y"]
+        rect = QRect(x - 12, y - 12, 24, 24)
+        if self.showNodeIDs:
+            text = self.fontMetrics().boundingRect(node["id"]).translated(x - 5, y + 20)
+            rect = rect.united(text.adjusted(-2, -2, 2, 2))
+        return rect
+
+    def edgeRect(self, edge):
+        """边（含箭头）和权重文字占据的区域，端点不存在时返回 None"""
+        start_node = self.getNodeById(edge["start"])
+        end_node = self.getNodeById(edge["end"])
+        if not start_node or not end_node:
+            return None
+        x1, y1 = start_node["x"], start_node["y"]
+        x2, y2 = end_node["x"], end_node["y"]
+        rect = QRect(QPoint(x1, y1), QPoint(x2, y2)).normalized().adjusted(-12, -12, 12, 12)
+        if self.showEdgeWeights:
+            text = self.fontMetrics().boundingRect(str(edge["weight"]))
+            rect = rect.united(text.translated((x1 + x2) // 2, (y1 + y2) // 2 - 15).adjusted(-2, -2, 2, 2))
+        return rect
 
     def paintEvent(self, event):
+        if self.staticLayer is None:
+            self.staticLayer = self.renderStaticLayer()
         painter = QPainter(self)
+        # 只有 event.rect() 内的区域需要刷新，QPainter 已按重绘区域裁剪
+        painter.drawPixmap(0, 0, self.staticLayer)
+        painter.setRenderHint(QPainter.Antialiasing)
+
+        # 叠加层：高亮的边和已探索的节点，只绘制与重绘区域相交的部分
+        dirty = event.rect()
+        painter.setPen(QPen(Qt.blue, 3))
+        for edge in self.pathEdges.values():
+            rect = self.edgeRect(edge)
+            if rect is not None and rect.intersects(dirty):
+                self.drawEdge(painter, edge)
+        if self.nodeColors:
+            area = dirty.adjusted(-40, -40, 40, 40)  # 节点ID文字可能超出节点圆
+            for node in self.spatialIndex.inRect(area.left(), area.top(), area.right(), area.bottom()):
+                color = self.nodeColors.get(node["id"])
+                if color is not None:
+                    self.drawNode(painter, node, QBrush(color), overlay=True)
+
+    def renderStaticLayer(self):
+        """把网格点、全部边和未搜索状态的节点绘制到离屏图层"""
+        ratio = self.devicePixelRatioF()
+        layer = QPixmap(self.size() * ratio)
+        layer.setDevicePixelRatio(ratio)
+        layer.fill(self.palette().color(self.backgroundRole()))
+        painter = QPainter(layer)
         painter.setRenderHint(QPainter.Antialiasing)
 
         # 绘制网格点
@@ -130,109 +298,105 @@ class GraphCanvas(QWidget):
             cols = width // self.grid_size + 1
             rows = height // self.grid_size + 1
 
-            # 收集节点位置集合，用于检查是否被节点覆盖
-            node_positions = {(node["x"], node["y"]) for node in self.graph_data["nodes"]}
-
             # 绘制网格点
             for i in range(cols):
                 for j in range(rows):
                     x = i * self.grid_size
                     y = j * self.grid_size
                     # 如果该网格点没有被节点覆盖，则显示
-                    if (x, y) not in node_positions:
+                    if self.spatialIndex.at(x, y) is None:
                         painter.drawEllipse(x - 2, y - 2, 4, 4)
 
         # 先画边
+        painter.setPen(QPen(Qt.black, 2))
         for edge in self.graph_data["edges"]:
-            start_node = self.getNodeById(edge["start"])
-            end_node = self.getNodeById(edge["end"])
-            if not start_node or not end_node:
-                continue
-
-            painter.setPen(QPen(Qt.black, 2))
-            if edge["start"] in self.searchPath and edge["end"] in self.searchPath:
-                painter.setPen(QPen(Qt.blue, 3))
-
-            x1, y1 = start_node["x"], start_node["y"]
-            x2, y2 = end_node["x"], end_node["y"]
-
-            # 计算向量和长度
-            # 计算向量和长度
-            dx = x2 - x1
-            dy = y2 - y1
-            length = math.sqrt(dx * dx + dy * dy)
-
-            if length > 0:
-                # 单位向量
-                ux, uy = dx / length, dy / length
-
-                # 如果是有向边
-                if edge.get("directed", False):
-                    # 绘制线段到节点中心
-                    painter.drawLine(x1, y1, x2, y2)
-
-                    # 绘制箭头
-                    arrow_size = 10
-                    r = 10  # 节点半径
-                    # 箭头底部位置
-                    arrow_base_x = x2 - r * ux
-                    arrow_base_y = y2 - r * uy
-
-                    angle = math.atan2(uy, ux)
-                    ax1 = arrow_base_x - arrow_size * math.cos(angle - math.pi / 6)
-                    ay1 = arrow_base_y - arrow_size * math.sin(angle - math.pi / 6)
-                    ax2 = arrow_base_x - arrow_size * math.cos(angle + math.pi / 6)
-                    ay2 = arrow_base_y - arrow_size * math.sin(angle + math.pi / 6)
-
-                    # 创建并填充箭头三角形，箭头尖端指向节点中心
-                    arrow_path = QPainterPath()
-                    arrow_path.moveTo(x2, y2)  # 箭头尖端在节点中心
-                    arrow_path.lineTo(ax1, ay1)
-                    arrow_path.lineTo(ax2, ay2)
-                    arrow_path.closeSubpath()
-
-                    # 安全地获取画笔颜色
-                    pen = painter.pen()
-                    if pen:
-                        painter.setBrush(QBrush(pen.color()))
-                    else:
-                        painter.setBrush(QBrush(Qt.black))
-
-                    painter.drawPath(arrow_path)
-                else:
-                    # 无向边直接画线
-                    painter.drawLine(x1, y1, x2, y2)
-
-                # 显示边权重
-                if self.showEdgeWeights:
-                    midx = (x1 + x2) // 2
-                    midy = (y1 + y2) // 2
-                    # 权重文本向上偏移，避免被线遮挡
-                    offset = 15
-                    painter.drawText(midx, midy - offset, str(edge["weight"]))
-
-        # 再画节点
-        for node in self.graph_data["nodes"]:
-            r = 10
-            # 默认为空心节点（未搜索的节点）
-            painter.setBrush(Qt.NoBrush)
-            painter.setPen(QPen(Qt.black, 1))
+            self.drawEdge(painter, edge)
 
-            # 如果节点在搜索路径或搜索顺序中，则使用实心并设置对应颜色
-            if self.searchOrder and (node["id"] == self.searchOrder[0] or (node["id"] in self.searchOrder and node["id"] == self.end_id)):
-                painter.setBrush(QBrush(Qt.red))
-            elif node["id"] in self.searchPath:
-                painter.setBrush(QBrush(Qt.blue))
-            elif node["id"] in self.searchOrder:
-                painter.setBrush(QBrush(Qt.yellow))
-
-            painter.drawEllipse(node["x"] - r, node["y"] - r, 2 * r, 2 * r)
-
-            if self.showNodeIDs:
-                painter.drawText(node["x"] - 5, node["y"] + 20, node["id"])
+        # 再画节点，默认为空心节点（未搜索的节点）
+        for node in self.graph_data["nodes"]:
+            self.drawNode(painter, node, Qt.NoBrush)
+        painter.end()
+        return layer
+
+    def drawEdge(self, painter, edge):
+        """用当前画笔绘制一条边、有向边的箭头和权重"""
+        start_node = self.getNodeById(edge["start"])
+        end_node = self.getNodeById(edge["end"])
+        if not start_node or not end_node:
+            return
+
+        x1, y1 = start_node["x"], start_node["y"]
+        x2, y2 = end_node["x"], end_node["y"]
+
+        # 计算向量和长度
+        dx = x2 - x1
+        dy = y2 - y1
+        length = math.sqrt(dx * dx + dy * dy)
+
+        if length > 0:
+            # 单位向量
+            ux, uy = dx / length, dy / length
+
+            # 如果是有向边
+            if edge.get("directed", False):
+                # 绘制线段到节点中心
+                painter.drawLine(x1, y1, x2, y2)
+
+                # 绘制箭头
+                arrow_size = 10
+                r = 10  # 节点半径
+                # 箭头底部位置
+                arrow_base_x = x2 - r * ux
+                arrow_base_y = y2 - r * uy
+
+                angle = math.atan2(uy, ux)
+                ax1 = arrow_base_x - arrow_size * math.cos(angle - math.pi / 6)
+                ay1 = arrow_base_y - arrow_size * math.sin(angle - math.pi / 6)
+                ax2 = arrow_base_x - arrow_size * math.cos(angle + math.pi / 6)
+                ay2 = arrow_base_y - arrow_size * math.sin(angle + math.pi / 6)
+
+                # 创建并填充箭头三角形，箭头尖端指向节点中心
+                arrow_path = QPainterPath()
+                arrow_path.moveTo(x2, y2)  # 箭头尖端在节点中心
+                arrow_path.lineTo(ax1, ay1)
+                arrow_path.lineTo(ax2, ay2)
+                arrow_path.closeSubpath()
+
+                # 安全地获取画笔颜色
+                pen = painter.pen()
+                if pen:
+                    painter.setBrush(QBrush(pen.color()))
+                else:
+                    painter.setBrush(QBrush(Qt.black))
+
+                painter.drawPath(arrow_path)
+            else:
+                # 无向边直接画线
+                painter.drawLine(x1, y1, x2, y2)
+
+            # 显示边权重
+            if self.showEdgeWeights:
+                midx = (x1 + x2) // 2
+                midy = (y1 + y2) // 2
+                # 权重文本向上偏移，避免被线遮挡
+                offset = 15
+                painter.drawText(midx, midy - offset, str(edge["weight"]))
+
+    def drawNode(self, painter, node, brush, overlay=False):
+        r = 10
+        if overlay:
+            # 静态图层中已有节点ID文字，叠加时只重绘节点圆内部，避免文字重复叠加变粗
+            painter.save()
+            painter.setClipRegion(QRegion(node["x"] - r - 1, node["y"] - r - 1, 2 * r + 2, 2 * r + 2,
+                                          QRegion.Ellipse), Qt.IntersectClip)
+        painter.setBrush(brush)
+        painter.setPen(QPen(Qt.black, 1))
+        painter.drawEllipse(node["x"] - r, node["y"] - r, 2 * r, 2 * r)
+
+        if self.showNodeIDs:
+            painter.drawText(node["x"] - 5, node["y"] + 20, node["id"])
+        if overlay:
+            painter.restore()
 
     def getNodeById(self, nid):
-        for node in self.graph_data["nodes"]:
-            if node["id"] == nid:
-                return node
-        return None
+        return self.nodeIndex.get(nid)
@@ -0,0 +1,191 @@
+"""命令行批量查询最短路径，不导入 Qt，可在没有显示器的服务器上运行
+
+用法:
+    python cli.py graph.json queries.txt -o results.jsonl
+    cat queries.txt | python cli.py graph.graphbin --algorithm A*
+
+查询每行一条，可以是 JSON 对象 {"algorithm": "Dijkstra", "start": "1", "end": "9"}，
+也可以是空白分隔的 "算法 起点 终点" 或 "起点 终点"（使用 --algorithm 指定的算法）。
+空行和以 # 开头的行被忽略。每条查询输出一行 JSON 结果，不可达时 cost 为 null、path 为空列表。
+加上 --stats 时结果中另有 "stats" 字段，包含堆操作、松弛次数等计数和各阶段耗时（见 SearchStats）。
+--heuristic 选择 A* 和 BiA* 使用的启发式（euclidean、manhattan、zero，均按边权标定，见 Heuristics）。
+--queue 选择 Dijkstra 和 A* 的优先队列（binary、dary、dial、radix，见 PriorityQueues）。
+--jobs N 时读完全部查询后在 N 个进程中并行执行（见 BatchRunner），结果仍按输入顺序输出。
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from algorithms import GraphAlgorithms
+from heuristics import Heuristics
+from pqueues import PriorityQueues
+from readwrite import GraphIO
+from searchstats import SearchStats
+
+
+def parseQuery(line, default_algo):
+    """把一行查询解析为 (算法, 起点ID, 终点ID)，格式错误时抛出 ValueError
+
+    ID 保持输入中的形式（文本或 JSON 值），执行前由 GraphAlgorithms.resolveId 对应到图中的节点ID。
+    """
+    if line.startswith("{"):
+        query = json.loads(line)
+        algo = query.get("algorithm", default_algo)
+        start_id, end_id = query["start"], query["end"]
+    else:
+        fields = line.split()
+        if len(fields) == 2:
+            algo = default_algo
+            start_id, end_id = fields
+        elif len(fields) == 3:
+            algo, start_id, end_id = fields
+        else:
+            raise ValueError("查询应为 \"算法 起点 终点\" 或 \"起点 终点\"")
+    if algo not in GraphAlgorithms.ALGORITHMS:
+        raise ValueError(f"未知算法: {algo}")
+    return algo, start_id, end_id
+
+
+def runQuery(graph, algo, start_id, end_id, backend="python", stats=False, heuristic="euclidean", queue="binary"):
+    """执行一条查询，返回可写成 JSON 的结果字典；stats 为 True 时附带搜索统计"""
+    search_stats = SearchStats() if stats else None
+    start_time = time.perf_counter()
+    visited, path, cost = GraphAlgorithms.runSearch(graph, algo, start_id, end_id, backend, stats=search_stats,
+                                                    heuristic=heuristic, queue=queue)
+    elapsed = (time.perf_counter() - start_time) * 1000
+    result = {
+        "algorithm": algo,
+        "start": start_id,
+        "end": end_id,
+        "cost": cost if path else None,
+        "path": path,
+        "expanded": len(visited),
+        "time_ms": round(elapsed, 3),
+    }
+    if stats:
+        result["stats"] = search_stats.toDict()
+    return result
+
+
+def runQueries(graph, lines, out, default_algo="Dijkstra", backend="python", flush=False, stats=False,
+               heuristic="euclidean", queue="binary"):
+    """逐行处理查询并写出 JSONL 结果，返回出错的查询数
+
+    出错的查询输出 {"line": 行号, "error": 原因}，不影响后续查询。
+    """
+    errors = 0
+    for line_number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        try:
+            algo, start_id, end_id = parseQuery(line, default_algo)
+            start_id, end_id = GraphAlgorithms.resolveId(graph, start_id), GraphAlgorithms.resolveId(graph, end_id)
+            if algo == "CH":
+                GraphAlgorithms.prepareHierarchy(graph)
+            result = runQuery(graph, algo, start_id, end_id, backend, stats, heuristic, queue)
+        except (ValueError, KeyError, TypeError) as e:
+            errors += 1
+            result = {"line": line_number, "error": str(e)}
+        out.write(json.dumps(result, ensure_ascii=False) + "\n")
+        if flush:
+            out.flush()
+    return errors
+
+
+def runQueriesParallel(graph_data, lines, out, default_algo="Dijkstra", backend="python", jobs=None,
+                       heuristic="euclidean", queue="binary", stats=False):
+    """与 runQueries 相同，但先读入全部查询，再在进程池中并行执行"""
+    from batchrunner import BatchRunner  # 进程池相关模块只在并行模式下导入
+    parsed = []
+    outputs = []
+    errors = 0
+    for line_number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        try:
+            algo, start_id, end_id = parseQuery(line, default_algo)
+            parsed.append((algo, GraphAlgorithms.resolveId(graph_data, start_id),
+                           GraphAlgorithms.resolveId(graph_data, end_id)))
+            outputs.append(None)
+        except (ValueError, KeyError, TypeError) as e:
+            errors += 1
+            outputs.append({"line": line_number, "error": str(e)})
+    if parsed:
+        needs_hierarchy = any(algo == "CH" for algo, _, _ in parsed)
+        with BatchRunner(graph_data, jobs, hierarchy=needs_hierarchy) as runner:
+            results = iter(zip(parsed, runner.run(parsed, keep_visited=False, timed=True, backend=backend,
+                                                        heuristic=heuristic, queue=queue, stats=stats)))
+        for i, result in enumerate(outputs):
+            if result is not None:
+                continue
+            (algo, start_id, end_id), (expanded, path, cost, elapsed, *search_stats) = next(results)
+            outputs[i] = {
+                "algorithm": algo,
+                "start": start_id,
+                "end": end_id,
+                "cost": cost if path else None,
+                "path": path,
+                "expanded": expanded,
+                "time_ms": round(elapsed, 3),
+            }
+            if stats:
+                outputs[i]["stats"] = search_stats[0].toDict()
+    for result in outputs:
+        out.write(json.dumps(result, ensure_ascii=False) + "\n")
+    return errors
+
+
+def loadGraph(fname):
+    """读取图文件为 GraphStore 并编译；图文件旁边有预处理好的收缩层次时一并载入"""
+    store = GraphIO.loadStore(fname)
+    graph = GraphAlgorithms.compile(store)
+    hierarchy = GraphIO.loadHierarchy(GraphIO.hierarchyPath(fname), graph)
+    if hierarchy is not None:
+        GraphAlgorithms.prepareHierarchy(graph, hierarchy)
+    return store
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="批量查询最短路径，结果按 JSON Lines 输出")
+    parser.add_argument("graph", help="图文件（.json / .csv / .graphbin）")
+    parser.add_argument("queries", nargs="?", default="-", help="查询文件，省略或为 - 时从标准输入读取")
+    parser.add_argument("-o", "--output", default="-", help="结果文件，省略或为 - 时写到标准输出")
+    parser.add_argument("-a", "--algorithm", default="Dijkstra", choices=GraphAlgorithms.ALGORITHMS,
+                        help="查询未指定算法时使用的算法")
+    parser.add_argument("--backend", default="python", choices=("python", "scipy"))
+    parser.add_argument("--heuristic", default="euclidean", choices=Heuristics.KINDS, help="A* 和 BiA* 使用的启发式")
+    parser.add_argument("--queue", default="binary", choices=PriorityQueues.KINDS,
+                        help="Dijkstra 和 A* 使用的优先队列，dial 和 radix 要求整数边权")
+    parser.add_argument("--stats", action="store_true", help="在结果中输出搜索统计")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="并行执行查询的进程数，0 表示使用全部 CPU")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.graph):
+        parser.error(f"图文件不存在: {args.graph}")
+    graph = loadGraph(args.graph)
+
+    from_stdin = args.queries == "-"
+    queries = sys.stdin if from_stdin else open(args.queries, "r", encoding="utf-8")
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        # 从标准输入读取时逐行刷新，便于在管道中交互使用
+        if args.jobs == 1:
+            errors = runQueries(graph, queries, out, args.algorithm, args.backend, flush=from_stdin,
+                                stats=args.stats, heuristic=args.heuristic, queue=args.queue)
+        else:
+            errors = runQueriesParallel(graph, queries, out, args.algorithm, args.backend, args.jobs or None,
+                                        args.heuristic, args.queue, args.stats)
+    finally:
+        if queries is not sys.stdin:
+            queries.close()
+        if out is not sys.stdout:
+            out.close()
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+from array import array
+import hashlib
+
+from heuristics import Heuristics
+
+
+class CompiledGraph:
+    """由 {"nodes", "edges"} 字典编译得到的只读图结构
+
+    节点按在 nodes 列表中的位置编号，出边以 CSR 形式存放：
+    节点 u 的邻居为 targets[offsets[u]:offsets[u + 1]]，对应权重在 weights 中。
+    无向边在编译时展开为两条方向相反的边，搜索时无需再判断 directed。
+    """
+
+    def __init__(self, ids, index, xs, ys, offsets, targets, weights):
+        # 数组既可以是 array.array，也可以是映射自二进制文件的 memoryview
+        self.ids = ids          # 下标 -> 节点ID
+        self._index = index     # 节点ID -> 下标，为 None 时在首次使用时构建
+        self.xs = xs            # 节点坐标
+        self.ys = ys
+        self.offsets = offsets  # 长度为 节点数 + 1
+        self.targets = targets
+        self.weights = weights
+        self._reverse = None
+        self._text_index = None  # 节点ID的文本形式 -> 节点ID，见 resolveId
+        self._integer_weights = None
+        self.heuristic_scales = {}  # 距离函数 -> 启发式标定系数，见 Heuristics.scale
+        self.hierarchy = None  # 预处理得到的 ContractionHierarchy
+
+    @property
+    def index(self):
+        if self._index is None:
+            index = {}
+            for i, nid in enumerate(self.ids):
+                index.setdefault(nid, i)
+            self._index = index
+        return self._index
+
+    def resolveId(self, node_id):
+        """把外部输入的ID（命令行文本、JSON 值）对应到图中的节点ID
+
+        ID 原样存在时直接返回，否则按文本形式匹配（例如命令行中的 "3" 对应整数ID 3），都不匹配时原样返回。
+        """
+        if node_id in self.index:
+            return node_id
+        if self._text_index is None:
+            # 倒序写入，文本形式相同的ID以第一次出现的为准
+            self._text_index = {str(nid): nid for nid in reversed(self.ids)}
+        return self._text_index.get(str(node_id), node_id)
+
+    @classmethod
+    def fromGraphData(cls, graph_data):
+        ids = []
+        index = {}
+        xs = array("d")
+        ys = array("d")
+        for i, node in enumerate(graph_data["nodes"]):
+            nid = node["id"]
+            ids.append(nid)
+            # 重复ID以第一次出现的节点为准，与 getNode 的行为保持一致
+            index.setdefault(nid, i)
+            xs.append(node["x"])
+            ys.append(node["y"])
+
+        # 先按边的原始顺序收集有向弧，无向边展开为两条弧
+        srcs = array("i")
+        dsts = array("i")
+        ws = array("d")
+        for edge in graph_data["edges"]:
+            u = index.get(edge["start"])
+            v = index.get(edge["end"])
+            if u is None or v is None:
+                continue  # 端点不存在的边无法参与搜索
+            w = edge["weight"]
+            srcs.append(u)
+            dsts.append(v)
+            ws.append(w)
+            if not edge.get("directed", False):
+                srcs.append(v)
+                dsts.append(u)
+                ws.append(w)
+
+        offsets, targets, weights = cls.buildCsr(len(ids), srcs, dsts, ws)
+        return cls(ids, index, xs, ys, offsets, targets, weights)
+
+    @classmethod
+    def fromStore(cls, store):
+        """直接由 GraphStore 的列式数组编译，不经过字典"""
+        srcs = array("i")
+        dsts = array("i")
+        ws = array("d")
+        for u, v, w, d in zip(store.edge_start, store.edge_end, store.weights, store.directed):
+            srcs.append(u)
+            dsts.append(v)
+            ws.append(w)
+            if not d:
+                srcs.append(v)
+                dsts.append(u)
+                ws.append(w)
+        n = store.nodeCount()
+        offsets, targets, weights = cls.buildCsr(n, srcs, dsts, ws)
+        return cls(list(store.ids), None, array("d", store.xs), array("d", store.ys),
+                   offsets, targets, weights)
+
+    @staticmethod
+    def buildCsr(node_count, srcs, dsts, ws):
+        """计数排序生成 CSR 数组，同一起点的弧保持原有相对顺序"""
+        counts = [0] * (node_count + 1)
+        for u in srcs:
+            counts[u + 1] += 1
+        for i in range(node_count):
+            counts[i + 1] += counts[i]
+        offsets = array("i", counts)
+
+        arc_count = len(srcs)
+        targets = array("i", bytes(4 * arc_count))
+        weights = array("d", bytes(8 * arc_count))
+        pos = counts
+        for u, v, w in zip(srcs, dsts, ws):
+            p = pos[u]
+            targets[p] = v
+            weights[p] = w
+            pos[u] = p + 1
+        return offsets, targets, weights
+
+    def detach(self):
+        """把映射自文件的数组（memoryview）复制到内存中，之后可以关闭映射；反向图共用复制后的坐标"""
+        for name in ("xs", "ys", "offsets", "targets", "weights"):
+            column = getattr(self, name)
+            if isinstance(column, memoryview):
+                setattr(self, name, array(column.format, column.tobytes()))
+        if self._reverse is not None:
+            self._reverse.xs, self._reverse.ys = self.xs, self.ys
+
+    def reverse(self):
+        """返回所有弧反向后的图（首次调用时构建），用于从终点出发的反向搜索"""
+        if self._reverse is None:
+            offsets = self.offsets
+            srcs = array("i", bytes(4 * len(self.targets)))
+            for u in range(len(self.ids)):
+                for i in range(offsets[u], offsets[u + 1]):
+                    srcs[i] = u
+            r_offsets, r_targets, r_weights = self.buildCsr(len(self.ids), self.targets, srcs, self.weights)
+            self._reverse = CompiledGraph(self.ids, self.index, self.xs, self.ys, r_offsets, r_targets, r_weights)
+            self._reverse._reverse = self
+        return self._reverse
+
+    def heuristicScale(self, kind="euclidean"):
+        """返回使 scale * 距离 不超过任何弧权重的最大系数，保证启发式可采纳且一致"""
+        return Heuristics.scale(self, kind)
+
+    def integerWeights(self):
+        """所有弧权重是否都是非负整数，桶队列和基数堆要求整数键值"""
+        if self._integer_weights is None:
+            self._integer_weights = all(w >= 0 and float(w).is_integer() for w in self.weights)
+        return self._integer_weights
+
+    def fingerprint(self):
+        """根据节点ID和 CSR 数组计算摘要，用于判断预处理结果是否对应同一张图"""
+        digest = hashlib.sha1()
+        digest.update("\0".join(map(str, self.ids)).encode("utf-8"))
+        for arr in (self.offsets, self.targets, self.weights):
+            digest.update(arr.tobytes())
+        return digest.hexdigest()
+
+    def nodeCount(self):
+        return len(self.ids)
+
+    def edgeCount(self):
+        """返回展开后的有向弧数量"""
+        return len(self.targets)
+
+    def neighbors(self, u):
+        """返回下标 u 的 (邻居下标, 权重) 迭代器"""
+        lo, hi = self.offsets[u], self.offsets[u + 1]
+        return zip(self.targets[lo:hi], self.weights[lo:hi])
+
+    def pathTo(self, prev, target):
+        """沿前驱数组回溯，返回从根到 target 的节点ID列表"""
+        ids = self.ids
+        path = []
+        current = target
+        while current != -1:
+            path.append(ids[current])
+            current = prev[current]
+        path.reverse()
+        return path
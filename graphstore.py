@@ -0,0 +1,359 @@
+from array import array
+
+
+def plainNumber(value):
+    """画布按整数像素绘制，整数值还原为 int，与直接读取 JSON 得到的字典一致"""
+    return int(value) if value.is_integer() else value
+
+
+class BitSet:
+    """每个元素占一位的 0/1 序列，支持追加、下标访问和迭代"""
+
+    __slots__ = ("bits", "length")
+
+    def __init__(self, values=()):
+        self.bits = bytearray()
+        self.length = 0
+        for value in values:
+            self.append(value)
+
+    def append(self, value):
+        if self.length & 7 == 0:
+            self.bits.append(0)
+        if value:
+            self.bits[self.length >> 3] |= 1 << (self.length & 7)
+        self.length += 1
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.length
+        if not 0 <= i < self.length:
+            raise IndexError("BitSet index out of range")
+        return (self.bits[i >> 3] >> (i & 7)) & 1
+
+    def __setitem__(self, i, value):
+        if i < 0:
+            i += self.length
+        if not 0 <= i < self.length:
+            raise IndexError("BitSet index out of range")
+        if value:
+            self.bits[i >> 3] |= 1 << (i & 7)
+        else:
+            self.bits[i >> 3] &= ~(1 << (i & 7))
+
+    def __iter__(self):
+        remaining = self.length
+        for byte in self.bits:
+            for k in range(min(8, remaining)):
+                yield (byte >> k) & 1
+            remaining -= 8
+
+
+class NodeRecord:
+    """GraphStore 中一个节点的字典式视图，读写直接作用于列式数组"""
+
+    __slots__ = ("store", "i")
+    KEYS = ("id", "x", "y")
+
+    def __init__(self, store, i):
+        self.store = store
+        self.i = i
+
+    def __getitem__(self, key):
+        if key == "id":
+            return self.store.ids[self.i]
+        if key == "x":
+            return plainNumber(self.store.xs[self.i])
+        if key == "y":
+            return plainNumber(self.store.ys[self.i])
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key not in ("x", "y"):
+            raise KeyError(key)  # 修改ID会破坏边对节点的引用
+        store = self.store
+        store.detach()
+        getattr(store, key + "s")[self.i] = value
+        store.touch()
+
+    def get(self, key, default=None):
+        return self[key] if key in self.KEYS else default
+
+    def keys(self):
+        return self.KEYS
+
+    def __iter__(self):
+        return iter(self.KEYS)
+
+    def __eq__(self, other):
+        if isinstance(other, (NodeRecord, dict)):
+            return self.toDict() == dict(other)
+        return NotImplemented
+
+    __hash__ = None  # 与字典一样不可哈希
+
+    def toDict(self):
+        return {"id": self["id"], "x": self["x"], "y": self["y"]}
+
+    def __repr__(self):
+        return repr(self.toDict())
+
+
+class EdgeRecord:
+    """GraphStore 中一条边的字典式视图，端点以节点ID表示"""
+
+    __slots__ = ("store", "i")
+    KEYS = ("start", "end", "weight", "directed")
+
+    def __init__(self, store, i):
+        self.store = store
+        self.i = i
+
+    def __getitem__(self, key):
+        store, i = self.store, self.i
+        if key == "start":
+            return store.ids[store.edge_start[i]]
+        if key == "end":
+            return store.ids[store.edge_end[i]]
+        if key == "weight":
+            return plainNumber(store.weights[i])
+        if key == "directed":
+            return bool(store.directed[i])
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key not in ("weight", "directed"):
+            raise KeyError(key)
+        store = self.store
+        store.detach()
+        if key == "weight":
+            store.weights[self.i] = value
+        else:
+            store.directed[self.i] = 1 if value else 0
+        store.touch()
+
+    def get(self, key, default=None):
+        return self[key] if key in self.KEYS else default
+
+    def keys(self):
+        return self.KEYS
+
+    def __iter__(self):
+        return iter(self.KEYS)
+
+    def __eq__(self, other):
+        if isinstance(other, (EdgeRecord, dict)):
+            return self.toDict() == dict(other)
+        return NotImplemented
+
+    __hash__ = None  # 与字典一样不可哈希
+
+    def toDict(self):
+        return {"start": self["start"], "end": self["end"], "weight": self["weight"],
+                "directed": self["directed"]}
+
+    def __repr__(self):
+        return repr(self.toDict())
+
+
+class RecordView:
+    """GraphStore 的节点或边序列视图，元素在访问时才生成记录对象，append 接受字典"""
+
+    def __init__(self, store, record, count, add):
+        self.store = store
+        self.record = record
+        self.count = count
+        self.add = add
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.record(self.store, k) for k in range(*i.indices(self.count()))]
+        n = self.count()
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("index out of range")
+        return self.record(self.store, i)
+
+    def __iter__(self):
+        record, store = self.record, self.store
+        for i in range(self.count()):
+            yield record(store, i)
+
+    def append(self, item):
+        self.add(item)
+
+    def __eq__(self, other):
+        if isinstance(other, (RecordView, list)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    __hash__ = None
+
+
+class GraphStore:
+    """以列式类型化数组保存的图
+
+    节点按加入顺序编号，边的端点保存为节点下标，不再为每个节点、每条边构造字典：
+    坐标和边权为 float64（读取后再保存不改变数值），端点为 int32 下标，是否有向按位保存。
+    以 loading=True 创建时处于批量读取状态：边可以引用尚未出现的节点ID，finish() 时再解析，
+    最终仍未定义的端点所在的边会被丢弃。finish() 之后（以及默认创建的图）加入的边必须引用已有节点，
+    否则 addEdge 抛出 KeyError。
+
+    store["nodes"]、store["edges"] 返回与 {"nodes", "edges"} 字典用法相同的惰性视图，
+    界面代码可以照常按下标、迭代读取或 append 字典。
+    """
+
+    def __init__(self, loading=False):
+        self.ids = []                # 下标 -> 节点ID
+        self._index = {}             # 节点ID -> 下标（重复ID以第一次出现为准），为 None 时按需构建
+        self.xs = array("d")
+        self.ys = array("d")
+        self.edge_start = array("i")
+        self.edge_end = array("i")
+        self.weights = array("d")
+        self.directed = BitSet()
+        self.pending = {}            # 尚未定义的节点ID -> 临时负数下标
+        self.revision = 0            # 版本号，每次修改后递增
+        self.compiled = None         # 对应的 CompiledGraph，修改后失效
+        self.compiled_revision = 0   # compiled 编译时的版本号
+        self.mapped = False          # 列是否为映射自文件的只读 memoryview
+        self.mapping = None          # loadBinary 映射的 (文件名, mmap)，见 unmap
+        self.loading = loading       # 是否允许边引用尚未出现的节点
+
+    @classmethod
+    def fromGraphData(cls, graph_data):
+        store = cls(loading=True)
+        for node in graph_data["nodes"]:
+            store.addNode(node["id"], node["x"], node["y"])
+        for edge in graph_data["edges"]:
+            store.addEdge(edge["start"], edge["end"], edge["weight"], edge.get("directed", False))
+        return store.finish()
+
+    def __getitem__(self, key):
+        if key == "nodes":
+            return RecordView(self, NodeRecord, self.nodeCount, self.appendNode)
+        if key == "edges":
+            return RecordView(self, EdgeRecord, self.edgeCount, self.appendEdge)
+        raise KeyError(key)
+
+    @property
+    def index(self):
+        if self._index is None:
+            index = {}
+            for i, nid in enumerate(self.ids):
+                index.setdefault(nid, i)
+            self._index = index
+        return self._index
+
+    def detach(self):
+        """把映射自文件的只读列复制为可追加的数组，在第一次修改前调用"""
+        if not self.mapped:
+            return
+        self.xs = array("d", self.xs)
+        self.ys = array("d", self.ys)
+        self.edge_start = array("i", self.edge_start)
+        self.edge_end = array("i", self.edge_end)
+        self.weights = array("d", self.weights)
+        self.directed = BitSet(self.directed)
+        self.ids = list(self.ids)
+        self.mapped = False
+
+    def unmap(self):
+        """复制映射自文件的列和编译结果并关闭文件映射
+
+        Windows 不允许替换仍被映射的文件，保存回读取的 .graphbin 之前调用。
+        """
+        if self.mapping is None:
+            return
+        _, mapping = self.mapping
+        self.mapping = None
+        self.detach()
+        if self.compiled is not None:
+            self.compiled.detach()
+        try:
+            mapping.close()
+        except BufferError:
+            pass  # 其他地方仍持有映射出的数组，映射在它们释放后随 mmap 对象关闭
+
+    def touch(self):
+        """记录一次修改：版本号加一并丢弃旧的编译结果，GraphAlgorithms.compile 按版本号重新编译"""
+        self.revision += 1
+        self.compiled = None
+
+    def appendNode(self, node):
+        self.addNode(node["id"], node["x"], node["y"])
+
+    def appendEdge(self, edge):
+        self.addEdge(edge["start"], edge["end"], edge["weight"], edge.get("directed", False))
+
+    def addNode(self, node_id, x, y):
+        if self.mapped:
+            self.detach()
+        self.touch()
+        self.index.setdefault(node_id, len(self.ids))
+        self.ids.append(node_id)
+        self.xs.append(x)
+        self.ys.append(y)
+
+    def addEdge(self, start_id, end_id, weight, directed):
+        if self.mapped:
+            self.detach()
+        u, v = self.endpoint(start_id), self.endpoint(end_id)
+        self.touch()
+        self.edge_start.append(u)
+        self.edge_end.append(v)
+        self.weights.append(weight)
+        self.directed.append(1 if directed else 0)
+
+    def endpoint(self, node_id):
+        i = self.index.get(node_id)
+        if i is None:
+            if not self.loading:
+                raise KeyError(node_id)
+            i = self.pending.get(node_id)
+            if i is None:
+                i = -len(self.pending) - 1
+                self.pending[node_id] = i
+        return i
+
+    def finish(self):
+        """解析引用了后出现节点的边并结束批量读取状态，返回自身"""
+        self.loading = False
+        if not self.pending:
+            return self
+        self.touch()
+        resolved = {i: self.index.get(node_id, -1) for node_id, i in self.pending.items()}
+        self.pending = {}
+        columns = (self.edge_start, self.edge_end, self.weights, self.directed)
+        kept = [array("i"), array("i"), array("d"), BitSet()]
+        for u, v, w, d in zip(*columns):
+            if u < 0:
+                u = resolved[u]
+            if v < 0:
+                v = resolved[v]
+            if u < 0 or v < 0:
+                continue  # 端点不存在的边无法参与搜索
+            kept[0].append(u)
+            kept[1].append(v)
+            kept[2].append(w)
+            kept[3].append(d)
+        self.edge_start, self.edge_end, self.weights, self.directed = kept
+        return self
+
+    def nodeCount(self):
+        return len(self.ids)
+
+    def edgeCount(self):
+        return len(self.weights)
+
+    def toGraphData(self):
+        """复制为普通的 {"nodes", "edges"} 字典"""
+        return {"nodes": [node.toDict() for node in self["nodes"]],
+                "edges": [edge.toDict() for edge in self["edges"]]}
@@ -0,0 +1,82 @@
+"""A* 使用的启发式
+
+启发式为 scale * d(v, t)，d 为节点间的距离函数（欧氏、曼哈顿或用户提供）。
+scale 由图标定：取所有弧上 权重 / d(u, v) 的最小值，于是每条弧都满足 w(u, v) >= scale * d(u, v)。
+只要 d 满足三角不等式，h(u) - h(v) <= scale * d(u, v) <= w(u, v)，启发式一致且可采纳，
+与边权使用像素距离、像素距离 / 50 还是其他任意单位无关。标定结果按距离函数缓存在 CompiledGraph 上。
+"""
+import math
+
+
+class Heuristics:
+    # 内置距离函数名；"zero" 的 A* 等价于 Dijkstra
+    KINDS = ("euclidean", "manhattan", "zero")
+
+    @staticmethod
+    def euclidean(graph, u, v):
+        return math.hypot(graph.xs[u] - graph.xs[v], graph.ys[u] - graph.ys[v])
+
+    @staticmethod
+    def manhattan(graph, u, v):
+        return abs(graph.xs[u] - graph.xs[v]) + abs(graph.ys[u] - graph.ys[v])
+
+    @staticmethod
+    def distanceFunction(kind):
+        """返回距离函数 d(graph, u, v)，u、v 为节点下标；kind 为内置名称或可调用对象"""
+        if callable(kind):
+            return kind
+        if kind == "euclidean":
+            return Heuristics.euclidean
+        if kind == "manhattan":
+            return Heuristics.manhattan
+        raise ValueError(f"未知启发式: {kind}")
+
+    @staticmethod
+    def scale(graph, kind="euclidean"):
+        """返回使 scale * d(u, v) 不超过任何弧权重的最大系数，"zero" 为 0"""
+        if kind == "zero":
+            return 0.0
+        scales = graph.heuristic_scales
+        if kind not in scales:
+            xs, ys, offsets, targets, weights = graph.xs, graph.ys, graph.offsets, graph.targets, graph.weights
+            scale = math.inf
+            if kind == "euclidean" or kind == "manhattan":
+                # 内置距离直接读取坐标数组，避免每条弧一次函数调用
+                hypot = math.hypot
+                for u in range(len(graph.ids)):
+                    x, y = xs[u], ys[u]
+                    for i in range(offsets[u], offsets[u + 1]):
+                        v = targets[i]
+                        if kind == "euclidean":
+                            length = hypot(xs[v] - x, ys[v] - y)
+                        else:
+                            length = abs(xs[v] - x) + abs(ys[v] - y)
+                        if length > 0:
+                            scale = min(scale, weights[i] / length)
+            else:
+                distance = Heuristics.distanceFunction(kind)
+                for u in range(len(graph.ids)):
+                    for i in range(offsets[u], offsets[u + 1]):
+                        length = distance(graph, u, targets[i])
+                        if length > 0:
+                            scale = min(scale, weights[i] / length)
+            # 没有可用于标定的弧时退化为零启发式；略微缩小以抵消浮点误差
+            scales[kind] = 0.0 if scale == math.inf else max(scale, 0.0) * (1 - 1e-9)
+        return scales[kind]
+
+    @staticmethod
+    def toTarget(graph, t, kind="euclidean"):
+        """返回已标定的 h(v)，估计节点下标 v 到 t 的最短路径长度"""
+        scale = Heuristics.scale(graph, kind)
+        if scale == 0:
+            return lambda v: 0
+        if kind == "euclidean":
+            xs, ys = graph.xs, graph.ys
+            tx, ty, hypot = xs[t], ys[t], math.hypot
+            return lambda v: scale * hypot(xs[v] - tx, ys[v] - ty)
+        if kind == "manhattan":
+            xs, ys = graph.xs, graph.ys
+            tx, ty = xs[t], ys[t]
+            return lambda v: scale * (abs(xs[v] - tx) + abs(ys[v] - ty))
+        distance = Heuristics.distanceFunction(kind)
+        return lambda v: scale * distance(graph, v, t)
@@ -0,0 +1,300 @@
+from array import array
+import heapq
+import math
+
+from compiledgraph import CompiledGraph
+
+
+class ContractionHierarchy:
+    """收缩层次（Contraction Hierarchy）
+
+    预处理按重要性从低到高逐个收缩节点，必要时添加捷径边；
+    查询时只沿“向更高层次”的弧做双向 Dijkstra，再把捷径展开成原图路径。
+    """
+
+    FORMAT = "ch-1"
+    # 见证搜索最多确定的节点数，超出时直接添加捷径（只会多出冗余捷径，不影响正确性）
+    WITNESS_SETTLE_LIMIT = 64
+    # 估计优先级时只需要捷径数量的近似值，使用更小的上限
+    ESTIMATE_SETTLE_LIMIT = 8
+    # 构建时每处理这么多个节点调用一次进度回调
+    PROGRESS_INTERVAL = 1024
+
+    def __init__(self, graph, rank, shortcuts):
+        self.graph = graph          # CompiledGraph
+        self.rank = rank            # array("i")，节点的收缩次序
+        self.shortcuts = shortcuts  # [(u, w, 权重, 中间节点)]，均为节点下标
+        self.buildSearchGraphs()
+
+    @classmethod
+    def build(cls, graph, progress=None):
+        """progress(已收缩节点数) 定期调用，回调抛出的异常会中止构建"""
+        n = graph.nodeCount()
+        # 当前未收缩部分的邻接表，平行弧只保留最小权重
+        out_adj = [{} for _ in range(n)]
+        in_adj = [{} for _ in range(n)]
+        offsets, targets, weights = graph.offsets, graph.targets, graph.weights
+        for u in range(n):
+            for i in range(offsets[u], offsets[u + 1]):
+                v = targets[i]
+                w = weights[i]
+                if v != u and w < out_adj[u].get(v, math.inf):
+                    out_adj[u][v] = w
+                    in_adj[v][u] = w
+
+        contracted = bytearray(n)
+        deleted_neighbors = [0] * n
+        level = [0] * n
+        rank = array("i", [0]) * n
+        shortcuts = {}
+
+        def findShortcuts(v, limit):
+            found = []
+            outs = list(out_adj[v].items())
+            if not outs:
+                return found
+            for u, w_in in in_adj[v].items():
+                needs = [w_in + w_out for x, w_out in outs if x != u]
+                if not needs:
+                    continue
+                dist = cls.witnessSearch(out_adj, u, v, max(needs), len(needs), limit)
+                for x, w_out in outs:
+                    if x == u:
+                        continue
+                    need = w_in + w_out
+                    if dist.get(x, math.inf) > need:
+                        found.append((u, x, need))
+            return found
+
+        def priority(v):
+            # 边差（新增捷径数减去删除的弧数）为主，再加上已收缩邻居数和层次深度，使收缩在图上分布均匀
+            added = len(findShortcuts(v, cls.ESTIMATE_SETTLE_LIMIT))
+            return 2 * (added - len(in_adj[v]) - len(out_adj[v])) + deleted_neighbors[v] + level[v]
+
+        interval = cls.PROGRESS_INTERVAL
+        current_priority = []
+        for v in range(n):
+            current_priority.append(priority(v))
+            # 初始优先级计算也要若干次见证搜索，同样给回调中止的机会
+            if progress is not None and v % interval == interval - 1:
+                progress(0)
+        pq = [(p, v) for v, p in enumerate(current_priority)]
+        heapq.heapify(pq)
+        order = 0
+        while pq:
+            p, v = heapq.heappop(pq)
+            if contracted[v] or p != current_priority[v]:
+                continue  # 已收缩或优先级已过期
+            # 懒更新：重新计算优先级，若已不是最小则放回堆中
+            p = priority(v)
+            if pq and p > pq[0][0]:
+                current_priority[v] = p
+                heapq.heappush(pq, (p, v))
+                continue
+
+            for u, x, need in findShortcuts(v, cls.WITNESS_SETTLE_LIMIT):
+                if need < out_adj[u].get(x, math.inf):
+                    out_adj[u][x] = need
+                    in_adj[x][u] = need
+                    shortcuts[(u, x)] = (need, v)
+            neighbors = set(in_adj[v]) | set(out_adj[v])
+            for u in in_adj[v]:
+                del out_adj[u][v]
+            for x in out_adj[v]:
+                del in_adj[x][v]
+            out_adj[v] = {}
+            in_adj[v] = {}
+            contracted[v] = 1
+            rank[v] = order
+            order += 1
+            if progress is not None and order % interval == 0:
+                progress(order)
+            # 收缩只影响相邻节点的优先级
+            for u in neighbors:
+                deleted_neighbors[u] += 1
+                if level[u] < level[v] + 1:
+                    level[u] = level[v] + 1
+                p = priority(u)
+                if p != current_priority[u]:
+                    current_priority[u] = p
+                    heapq.heappush(pq, (p, u))
+
+        return cls(graph, rank, [(u, x, w, m) for (u, x), (w, m) in shortcuts.items()])
+
+    @staticmethod
+    def witnessSearch(out_adj, source, skip, max_dist, target_count, limit):
+        """在未收缩的图中从 source 出发做受限 Dijkstra，绕过 skip 节点
+
+        超过 max_dist、确定的节点数达到上限，或 skip 的全部 target_count 个出邻居都已确定时停止。
+        """
+        dist = {source: 0}
+        settled = set()
+        targets = out_adj[skip]
+        pq = [(0, source)]
+        while pq and len(settled) < limit:
+            d, u = heapq.heappop(pq)
+            if u in settled:
+                continue
+            if d > max_dist:
+                break
+            settled.add(u)
+            if u in targets and u != source:
+                target_count -= 1
+                if target_count == 0:
+                    break
+            for x, w in out_adj[u].items():
+                if x == skip:
+                    continue
+                nd = d + w
+                if nd < dist.get(x, math.inf):
+                    dist[x] = nd
+                    heapq.heappush(pq, (nd, x))
+        return dist
+
+    def buildSearchGraphs(self):
+        """构建查询用的向上图：正向搜索用的出弧、反向搜索用的入弧，以及捷径中间节点表"""
+        graph = self.graph
+        n = graph.nodeCount()
+        rank = self.rank
+        arcs = {}
+        offsets, targets, weights = graph.offsets, graph.targets, graph.weights
+        for u in range(n):
+            for i in range(offsets[u], offsets[u + 1]):
+                v = targets[i]
+                if v != u and weights[i] < arcs.get((u, v), (math.inf,))[0]:
+                    arcs[(u, v)] = (weights[i], -1)
+        for u, x, w, m in self.shortcuts:
+            if w < arcs.get((u, x), (math.inf,))[0]:
+                arcs[(u, x)] = (w, m)
+
+        self.middle = {}
+        up_src, up_dst, up_w = array("i"), array("i"), array("d")
+        down_src, down_dst, down_w = array("i"), array("i"), array("d")
+        for (u, x), (w, m) in arcs.items():
+            if m != -1:
+                self.middle[(u, x)] = m
+            if rank[u] < rank[x]:
+                up_src.append(u)
+                up_dst.append(x)
+                up_w.append(w)
+            else:
+                # 反向搜索从 x 沿入弧走到更高层次的 u
+                down_src.append(x)
+                down_dst.append(u)
+                down_w.append(w)
+        self.forward = CompiledGraph.buildCsr(n, up_src, up_dst, up_w)
+        self.backward = CompiledGraph.buildCsr(n, down_src, down_dst, down_w)
+
+    def query(self, start_id, end_id, stats=None):
+        """返回与 GraphAlgorithms.dijkstra 形式相同的 (visited, path, cost)，stats 的用法同 GraphAlgorithms.runSearch"""
+        graph = self.graph
+        s = graph.index.get(start_id)
+        t = graph.index.get(end_id)
+        if s is None or t is None:
+            return [], [], 0
+        if s == t:
+            return [start_id], [start_id], 0
+        ids = graph.ids
+
+        sides = (self.forward, self.backward)
+        dist = ({s: 0}, {t: 0})
+        prev = ({s: -1}, {t: -1})
+        settled = (set(), set())
+        push, pop = heapq.heappush, heapq.heappop
+        if stats is not None:
+            push, pop = stats.countingHeap(push, pop)
+            stats.mark("setup")
+        heaps = ([], [])
+        push(heaps[0], (0, s))
+        push(heaps[1], (0, t))
+        visited = []
+        seen = set()
+        mu = math.inf
+        meet = -1
+        while True:
+            # 两侧堆顶都不小于 mu 时结束，否则扩展堆顶较小的一侧
+            top_f = heaps[0][0][0] if heaps[0] else math.inf
+            top_r = heaps[1][0][0] if heaps[1] else math.inf
+            if min(top_f, top_r) >= mu:
+                break
+            side = 0 if top_f <= top_r else 1
+            current_dist, current = pop(heaps[side])
+            if current in settled[side]:
+                continue
+            settled[side].add(current)
+            if current not in seen:
+                seen.add(current)
+                visited.append(ids[current])
+            d, other_d, p = dist[side], dist[1 - side], prev[side]
+            if current in other_d and current_dist + other_d[current] < mu:
+                mu = current_dist + other_d[current]
+                meet = current
+            offsets, targets, weights = sides[side]
+            if stats is not None:
+                stats.edge_scans += offsets[current + 1] - offsets[current]
+            for i in range(offsets[current], offsets[current + 1]):
+                nx = targets[i]
+                new_dist = current_dist + weights[i]
+                if new_dist < d.get(nx, math.inf):
+                    d[nx] = new_dist
+                    p[nx] = current
+                    push(heaps[side], (new_dist, nx))
+                    if nx in other_d and new_dist + other_d[nx] < mu:
+                        mu = new_dist + other_d[nx]
+                        meet = nx
+
+        if stats is not None:
+            stats.finish("search", len(settled[0]) + len(settled[1]), sources=2)
+        if meet == -1:
+            return visited, [], 0
+        # 向上图中的路径：s -> meet 为正向前驱，meet -> t 为反向前驱
+        up_path = []
+        current = meet
+        while current != -1:
+            up_path.append(current)
+            current = prev[0][current]
+        up_path.reverse()
+        current = prev[1][meet]
+        while current != -1:
+            up_path.append(current)
+            current = prev[1][current]
+
+        route = [s]
+        for a, b in zip(up_path, up_path[1:]):
+            self.unpack(a, b, route)
+        # 沿展开后的原图路径按顺序累加权重，保证与 Dijkstra 的浮点结果一致
+        cost = 0
+        for a, b in zip(route, route[1:]):
+            cost += min(w for v, w in graph.neighbors(a) if v == b)
+        if stats is not None:
+            stats.mark("path")
+        return visited, [ids[u] for u in route], cost
+
+    def unpack(self, u, w, route):
+        """把弧 u -> w 展开为原图中的节点序列，追加 u 之后的节点到 route"""
+        middle = self.middle
+        stack = [(u, w)]
+        while stack:
+            a, b = stack.pop()
+            m = middle.get((a, b), -1)
+            if m == -1:
+                route.append(b)
+            else:
+                stack.append((m, b))
+                stack.append((a, m))
+
+    def toDict(self):
+        return {
+            "format": self.FORMAT,
+            "fingerprint": self.graph.fingerprint(),
+            "rank": list(self.rank),
+            "shortcuts": [list(sc) for sc in self.shortcuts],
+        }
+
+    @classmethod
+    def fromDict(cls, graph, data):
+        """从 toDict 的结果恢复，图与保存时不一致则返回 None"""
+        if data.get("format") != cls.FORMAT or data.get("fingerprint") != graph.fingerprint():
+            return None
+        shortcuts = [(u, x, w, m) for u, x, w, m in data["shortcuts"]]
+        return cls(graph, array("i", data["rank"]), shortcuts)
@@ -1,11 +1,16 @@
+import os
 from PyQt5.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, \
-    QLineEdit, QFileDialog, QTableWidget, QTableWidgetItem, QTableWidgetSelectionRange, QTableWidgetSelectionRange, \
-    QFrame
+    QLineEdit, QFileDialog, QTableView, QFrame
 # ...existing code...
 from PyQt5.QtCore import Qt, QTimer
 from canvas import GraphCanvas
+from graphstore import GraphStore
 from readwrite import GraphIO
 from algorithms import GraphAlgorithms
+from querycache import QueryCache
+from searchworker import SearchWorker
+from playback import SearchPlayback
+from resultmodel import SearchResultModel
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -19,18 +24,44 @@ class MainWindow(QMainWindow):
         self.inactive_btn_style = ""
         self.visualization_timer = None
         self.search_cost = None
-        self.total_steps = None
-        self.current_step_index = None
-        self.full_path_nodes = None
-        self.full_search_order = None
+        self.playback = None  # 当前搜索结果的回放状态
+        self.search_algo = None
+        self.search_start_id = None
+        self.search_end_id = None
+        self.live_tree = None  # 编辑图后增量修复的最短路径树
+        self.search_worker = None  # 正在后台运行的搜索
         self.setWindowTitle("可视化最短路径演示")
         self.resize(1920, 1080)
-        self.graph_data = {"nodes": [], "edges": []}
+        self.graph_data = GraphStore()
+        # 搜索结果缓存，键为 (画布图版本号, 算法, 起点, 终点)
+        self.query_cache = QueryCache(capacity=64)
         self.initUI()
         self.canvas.graphDataChanged.connect(self.onGraphDataChanged)
 
     def onGraphDataChanged(self, updated_data):
         self.graph_data = updated_data
+        self.updateLiveRoute()
+
+    def updateLiveRoute(self):
+        """编辑图后增量修复最短路径树并刷新高亮路径，不重新运行整个搜索"""
+        # DFS/BFS 的结果不是最短路径树，只对最短路径类算法维护
+        if self.playback is None or self.search_algo in ("DFS", "BFS"):
+            return
+        # 首次编辑或有元素被删除、图被替换时回退到完整计算
+        if self.live_tree is None or not self.live_tree.sync(self.graph_data):
+            self.live_tree = GraphAlgorithms.dynamicShortestPathTree(self.graph_data, self.search_start_id)
+        path = self.live_tree.pathTo(self.search_end_id)
+        self.playback.setPath(path)
+        self.resultModel.refreshPath()
+        self.search_cost = self.live_tree.distanceTo(self.search_end_id) if path else 0
+        # 回放已结束时显示完整的新路径，否则只显示新路径中已探索到的部分，之后的步骤按新路径继续
+        if self.playback.finished():
+            self.canvas.updateSearchVisualization(self.canvas.searchOrder, path, self.search_end_id)
+            total = self.playback.total()
+            self.infoLabel.setText(f"已探索节点: {total}/{total} | 路径总权重: {self.search_cost}")
+        else:
+            self.canvas.updateSearchVisualization(self.canvas.searchOrder, self.playback.visiblePath(),
+                                                  self.search_end_id)
 
     def initUI(self):
         # 顶栏布局
@@ -75,16 +106,32 @@ class MainWindow(QMainWindow):
         self.aStarBtn.clicked.connect(lambda: self.onSearchAlgorithm("A*"))
         self.dijkstraBtn = QPushButton("Dijkstra")
         self.dijkstraBtn.clicked.connect(lambda: self.onSearchAlgorithm("Dijkstra"))
-        leftLayout.addWidget(self.dfsBtn)
-        leftLayout.addWidget(self.bfsBtn)
-        leftLayout.addWidget(self.aStarBtn)
-        leftLayout.addWidget(self.dijkstraBtn)
+        self.biDijkstraBtn = QPushButton("双向 Dijkstra")
+        self.biDijkstraBtn.clicked.connect(lambda: self.onSearchAlgorithm("BiDijkstra"))
+        self.biAStarBtn = QPushButton("双向 A*")
+        self.biAStarBtn.clicked.connect(lambda: self.onSearchAlgorithm("BiA*"))
+        self.chBtn = QPushButton("收缩层次 CH")
+        self.chBtn.clicked.connect(lambda: self.onSearchAlgorithm("CH"))
+        # 算法名 -> 按钮，用于切换选中样式
+        self.algoButtons = {
+            "DFS": self.dfsBtn,
+            "BFS": self.bfsBtn,
+            "A*": self.aStarBtn,
+            "Dijkstra": self.dijkstraBtn,
+            "BiDijkstra": self.biDijkstraBtn,
+            "BiA*": self.biAStarBtn,
+            "CH": self.chBtn,
+        }
+        for btn in self.algoButtons.values():
+            leftLayout.addWidget(btn)
 
         # 起止点输入
         self.startLabel = QLabel("起点ID:")
         self.startEdit = QLineEdit()
+        self.startEdit.setPlaceholderText("多个ID以逗号分隔")
         self.endLabel = QLabel("终点ID:")
         self.endEdit = QLineEdit()
+        self.endEdit.setPlaceholderText("多个ID以逗号分隔")
         leftLayout.addWidget(self.startLabel)
         leftLayout.addWidget(self.startEdit)
         leftLayout.addWidget(self.endLabel)
@@ -94,11 +141,17 @@ class MainWindow(QMainWindow):
         self.startSearchBtn = QPushButton("开始搜索")
         self.startSearchBtn.clicked.connect(self.onStartSearch)
         leftLayout.addWidget(self.startSearchBtn)
-
-        # 结果输出表
-        self.resultTable = QTableWidget()
-        self.resultTable.setColumnCount(2)
-        self.resultTable.setHorizontalHeaderLabels(["Order", "节点ID"])
+        self.cancelSearchBtn = QPushButton("取消搜索")
+        self.cancelSearchBtn.setEnabled(False)
+        self.cancelSearchBtn.clicked.connect(self.onCancelSearch)
+        leftLayout.addWidget(self.cancelSearchBtn)
+
+        # 结果输出表，行由模型按需生成
+        self.resultModel = SearchResultModel(self)
+        self.resultTable = QTableView()
+        self.resultTable.setModel(self.resultModel)
+        # 每帧插入一批行后滚动到最后一行
+        self.resultModel.rowsInserted.connect(lambda: self.resultTable.scrollToBottom())
         leftLayout.addWidget(self.resultTable)
 
         # 已探索节点数、路径总权重
@@ -108,6 +161,9 @@ class MainWindow(QMainWindow):
         leftLayout.addWidget(self.infoLabel)
         self.timeLabel = QLabel("执行耗时: 0 ms")
         leftLayout.addWidget(self.timeLabel)
+        # 最近一次搜索的堆操作、松弛次数和各阶段耗时
+        self.statsLabel = QLabel("")
+        leftLayout.addWidget(self.statsLabel)
         leftWidget.setLayout(leftLayout)
 
         # 正中央画布
@@ -140,16 +196,36 @@ class MainWindow(QMainWindow):
         self.setCentralWidget(centralWidget)
 
     def onImportFile(self):
-        fname, _ = QFileDialog.getOpenFileName(self, "导入图", "", "JSON/CSV Files (*.json *.csv)")
+        fname, _ = QFileDialog.getOpenFileName(self, "导入图", "", "Graph Files (*.json *.csv *.graphbin)")
         # ...existing code...
         if fname:
             self.graph_data = GraphIO.loadGraph(fname)
             self.canvas.loadData(self.graph_data)
+            # 图文件旁边有预处理好的收缩层次时直接载入
+            hierarchy_file = GraphIO.hierarchyPath(fname)
+            if os.path.exists(hierarchy_file):
+                try:
+                    hierarchy = GraphIO.loadHierarchy(hierarchy_file, GraphAlgorithms.compile(self.graph_data))
+                except (OSError, ValueError) as e:
+                    # 收缩层次文件损坏或不可读时忽略，需要时重新构建
+                    self.statusBar().showMessage(f"未载入收缩层次: {e}")
+                    hierarchy = None
+                if hierarchy is not None:
+                    GraphAlgorithms.prepareHierarchy(self.graph_data, hierarchy)
 
     def onExportFile(self):
-        fname, _ = QFileDialog.getSaveFileName(self, "导出图", "", "JSON/CSV Files (*.json *.csv)")
+        fname, _ = QFileDialog.getSaveFileName(self, "导出图", "", "Graph Files (*.json *.csv *.graphbin)")
         if fname:
-            GraphIO.saveGraph(fname, self.graph_data)
+            # 收缩层次只在导出时写到图文件旁边，不在搜索后自动写入导入文件所在的目录
+            try:
+                GraphIO.saveGraph(fname, self.graph_data)
+                hierarchy = GraphAlgorithms.compile(self.graph_data).hierarchy
+                if hierarchy is not None:
+                    GraphIO.saveHierarchy(GraphIO.hierarchyPath(fname), hierarchy)
+            except OSError as e:
+                self.statusBar().showMessage(f"导出失败: {e}")
+                return
+            self.statusBar().showMessage(f"已导出: {fname}")
 
     def onAddNode(self):
         self.node_add_mode_active = not self.node_add_mode_active
@@ -215,40 +291,103 @@ class MainWindow(QMainWindow):
     def onSearchAlgorithm(self, algo):
         self.currentAlgo = algo
 
-        # 更新所有算法按钮的样式
-        self.dfsBtn.setStyleSheet(self.inactive_btn_style)
-        self.bfsBtn.setStyleSheet(self.inactive_btn_style)
-        self.aStarBtn.setStyleSheet(self.inactive_btn_style)
-        self.dijkstraBtn.setStyleSheet(self.inactive_btn_style)
-
-        # 设置当前选中的算法按钮样式
-        if algo == "DFS":
-            self.dfsBtn.setStyleSheet(self.active_btn_style)
-        elif algo == "BFS":
-            self.bfsBtn.setStyleSheet(self.active_btn_style)
-        elif algo == "A*":
-            self.aStarBtn.setStyleSheet(self.active_btn_style)
-        elif algo == "Dijkstra":
-            self.dijkstraBtn.setStyleSheet(self.active_btn_style)
+        # 更新所有算法按钮的样式，并设置当前选中的算法按钮样式
+        for name, btn in self.algoButtons.items():
+            btn.setStyleSheet(self.active_btn_style if name == algo else self.inactive_btn_style)
+
+    @staticmethod
+    def parseIds(text):
+        """逗号分隔的多个ID返回为元组，单个ID原样返回"""
+        if "," not in text:
+            return text
+        ids = tuple(dict.fromkeys(part.strip() for part in text.split(",") if part.strip()))
+        return ids if len(ids) != 1 else ids[0]
 
     def onStartSearch(self):
-        start_id = self.startEdit.text()
-        end_id = self.endEdit.text()
+        if self.search_worker is not None:
+            return
+        # 输入框中的ID都是文本，按图中节点ID的类型对应（例如 JSON 文件中的整数ID）
+        start_id = GraphAlgorithms.resolveId(self.graph_data, self.parseIds(self.startEdit.text()))
+        end_id = GraphAlgorithms.resolveId(self.graph_data, self.parseIds(self.endEdit.text()))
         # ...existing code...
-        import time
-        start_time = time.time()
-        search_order, path_nodes, total_cost = GraphAlgorithms.runSearch(
-            self.graph_data, self.currentAlgo, start_id, end_id
-        )
-        end_time = time.time()
-        execution_time = (end_time - start_time) * 1000  # 转换为毫秒
-
-        self.resultTable.setRowCount(0)
-        # 存储搜索结果和当前索引
-        self.full_search_order = search_order
-        self.full_path_nodes = path_nodes
-        self.current_step_index = 0
-        self.total_steps = len(search_order)
+        algo = self.currentAlgo
+        if isinstance(start_id, tuple) or isinstance(end_id, tuple):
+            # 多个起点或终点时一次多源 Dijkstra 求出最近的一对
+            algo = "Dijkstra"
+            if self.currentAlgo != algo:
+                self.statusBar().showMessage(f"多个起点或终点只支持 Dijkstra，本次查询未使用 {self.currentAlgo}")
+        # 图未变化时重复查询同一对起止点直接使用缓存结果
+        cache_key = (self.canvas.revision, algo, start_id, end_id)
+        cached = self.query_cache.get(cache_key)
+        if cached is not None:
+            result, stats = cached
+            self.showSearchResult(algo, start_id, end_id, result, 0.0, True, stats)
+            return
+
+        # 停止上一次结果的回放，避免覆盖进度信息
+        if self.visualization_timer is not None:
+            self.visualization_timer.stop()
+        # 在界面线程编译好图再交给后台线程，搜索期间对画布的编辑不会影响这次搜索
+        graph = GraphAlgorithms.compile(self.graph_data)
+        worker = SearchWorker(graph, algo, start_id, end_id, self)
+        worker.progress.connect(self.onSearchProgress)
+        worker.resultReady.connect(
+            lambda result, elapsed, stats: self.onSearchFinished(cache_key, result, elapsed, stats))
+        worker.cancelled.connect(lambda: self.onSearchStopped("搜索已取消"))
+        worker.failed.connect(lambda message: self.onSearchStopped(f"搜索出错: {message}"))
+        self.search_worker = worker
+        self.startSearchBtn.setEnabled(False)
+        self.cancelSearchBtn.setEnabled(True)
+        self.infoLabel.setText("搜索中...")
+        worker.start()
+
+    def onCancelSearch(self):
+        if self.search_worker is not None:
+            self.search_worker.cancel()
+
+    def onSearchProgress(self, count):
+        self.infoLabel.setText(f"搜索中: 已确定节点 {count}")
+
+    def onSearchFinished(self, cache_key, result, execution_time, stats):
+        self.finishSearchWorker()
+        self.query_cache.put(cache_key, (result, stats))
+        _, algo, start_id, end_id = cache_key
+        self.showSearchResult(algo, start_id, end_id, result, execution_time, False, stats)
+
+    def onSearchStopped(self, message):
+        self.finishSearchWorker()
+        self.infoLabel.setText(message)
+
+    def finishSearchWorker(self):
+        self.search_worker.wait()
+        self.search_worker.deleteLater()
+        self.search_worker = None
+        self.startSearchBtn.setEnabled(True)
+        self.cancelSearchBtn.setEnabled(False)
+
+    def showSearchResult(self, algo, start_id, end_id, result, execution_time, cache_hit, stats):
+        """搜索结果就绪后交给定时器逐步回放"""
+        search_order, path_nodes, total_cost = result
+        if self.visualization_timer is not None:
+            self.visualization_timer.stop()
+        pair = ""
+        if isinstance(start_id, tuple) or isinstance(end_id, tuple):
+            # 多起点或多终点查询：之后的回放和编辑后的路径修复都针对找到的最近一对
+            if path_nodes:
+                start_id, end_id = path_nodes[0], path_nodes[-1]
+                pair = f" | 最近: {start_id} → {end_id}"
+            else:
+                start_id = start_id[0] if isinstance(start_id, tuple) else start_id
+                end_id = end_id[0] if isinstance(end_id, tuple) else end_id
+                pair = " | 起点与终点之间不可达"
+
+        # 存储搜索结果和回放状态
+        self.playback = SearchPlayback(search_order, path_nodes, end_id)
+        self.resultModel.setPlayback(self.playback)
+        self.search_algo = algo
+        self.search_start_id = start_id
+        self.search_end_id = end_id
+        self.live_tree = None
         self.search_cost = total_cost
 
         # 创建定时器用于逐步显示
@@ -256,43 +395,39 @@ class MainWindow(QMainWindow):
         self.visualization_timer.timeout.connect(self.showNextSearchStep)
 
         # 显示基本信息
-        self.timeLabel.setText(f"算法: {self.currentAlgo} | 执行耗时: {execution_time:.2f} ms")
-        self.infoLabel.setText(f"已探索节点: 0/{self.total_steps} | 路径总权重: {total_cost}")
+        cache_stats = self.query_cache.stats()
+        self.timeLabel.setText(
+            f"算法: {algo} | 执行耗时: {execution_time:.2f} ms"
+            f"{' (缓存)' if cache_hit else ''} | 缓存命中率: {cache_stats['hit_rate']:.0%}{pair}"
+        )
+        self.infoLabel.setText(f"已探索节点: 0/{self.playback.total()} | 路径总权重: {total_cost}")
+        self.statsLabel.setText(stats.summary())
 
         # 清空画布上的之前的可视化
-        self.canvas.updateSearchVisualization([], [], None)
+        self.canvas.updateSearchVisualization([], [], end_id)
 
         # 开始逐步显示
         self.visualization_timer.start(400)
 
+    def closeEvent(self, event):
+        # 关闭窗口前中止后台搜索，避免线程在运行中被销毁
+        if self.search_worker is not None:
+            self.search_worker.cancel()
+            self.search_worker.wait()
+        super().closeEvent(event)
+
     def showNextSearchStep(self):
-        if self.current_step_index < self.total_steps:
-            # 添加一行到表格
-            i = self.current_step_index
-            node = self.full_search_order[i]
-            end_id = self.endEdit.text()
-            order_item = QTableWidgetItem(str(i + 1))
-            node_item = QTableWidgetItem(str(node))
-            self.resultTable.insertRow(i)
-            if node in self.full_path_nodes:
-                order_item.setBackground(Qt.yellow)  # 使用黄色背景高亮
-                node_item.setBackground(Qt.yellow)
-            self.resultTable.setItem(i, 0, order_item)
-            self.resultTable.setItem(i, 1, node_item)
-
-            # 滚动到当前行
-            self.resultTable.scrollToItem(self.resultTable.item(i, 0))
-
-            # 更新画布显示到当前步骤
-            current_order = self.full_search_order[:i + 1]
-            current_path = [n for n in self.full_path_nodes if n in current_order]
-            self.canvas.updateSearchVisualization(current_order, current_path, end_id)
+        step = self.playback.step()
+        if step is not None:
+            # 表格显示到这一步，行在下一帧统一插入
+            i, node, on_path = step
+            self.resultModel.setVisibleRows(i + 1)
 
-            # 更新信息标签
-            self.infoLabel.setText(f"已探索节点: {i + 1}/{self.total_steps} | 路径总权重: {self.search_cost}")
+            # 画布只追加这一步的节点
+            self.canvas.addSearchStep(node, on_path)
 
-            # 递增索引
-            self.current_step_index += 1
+            # 更新信息标签
+            self.infoLabel.setText(f"已探索节点: {i + 1}/{self.playback.total()} | 路径总权重: {self.search_cost}")
         else:
             # 全部显示完成，停止定时器
             self.visualization_timer.stop()
@@ -0,0 +1,195 @@
+from array import array
+import heapq
+import math
+
+
+class ShortestPathTree:
+    """单源最短路径树
+
+    只保存紧凑的距离数组和前驱数组，路径在查询时沿前驱回溯生成，
+    不为每个节点单独保存一条路径列表。
+    """
+
+    def __init__(self, graph, source, dist, pred, order):
+        self.graph = graph      # CompiledGraph
+        self.source = source    # 源点下标，源点不存在时为 -1
+        self.dist = dist        # array("d")，不可达为 inf
+        self.pred = pred        # array("i")，源点和不可达节点为 -1
+        self.order = order      # array("i")，节点出堆（确定最短距离）的顺序
+        self.rank = array("i", [-1]) * len(dist)  # 节点在 order 中的位置
+        for position, u in enumerate(order):
+            self.rank[u] = position
+
+    @classmethod
+    def build(cls, graph, source_id):
+        """在 CompiledGraph 上运行不设终点的 Dijkstra，得到 source_id 的最短路径树"""
+        n = graph.nodeCount()
+        s = graph.index.get(source_id, -1)
+        dist = [math.inf] * n
+        pred = array("i", [-1]) * n
+        order = array("i")
+        if s != -1:
+            offsets, targets, weights = graph.offsets, graph.targets, graph.weights
+            settled = bytearray(n)
+            dist[s] = 0
+            pq = [(0, s)]
+            while pq:
+                current_dist, current = heapq.heappop(pq)
+                if settled[current]:
+                    continue
+                settled[current] = 1
+                order.append(current)
+                for i in range(offsets[current], offsets[current + 1]):
+                    nx = targets[i]
+                    new_dist = current_dist + weights[i]
+                    if new_dist < dist[nx]:
+                        dist[nx] = new_dist
+                        pred[nx] = current
+                        heapq.heappush(pq, (new_dist, nx))
+        return cls(graph, s, array("d", dist), pred, order)
+
+    def sourceId(self):
+        return self.graph.ids[self.source] if self.source != -1 else None
+
+    def reachable(self, node_id):
+        u = self.graph.index.get(node_id)
+        return u is not None and self.rank[u] != -1
+
+    def distanceTo(self, node_id):
+        """返回到 node_id 的最短距离，不可达时返回 inf"""
+        u = self.graph.index.get(node_id)
+        if u is None:
+            return math.inf
+        return self.dist[u]
+
+    def pathTo(self, node_id):
+        """沿前驱数组回溯出到 node_id 的最短路径，不可达时返回空列表"""
+        u = self.graph.index.get(node_id)
+        if u is None or self.rank[u] == -1:
+            return []
+        return self.graph.pathTo(self.pred, u)
+
+    def search(self, end_id):
+        """返回与 GraphAlgorithms.dijkstra(source, end_id) 相同形式的 (visited, path, cost)
+
+        visited 为终点确定之前出堆的节点；终点不可达时为全部可达节点。
+        """
+        ids = self.graph.ids
+        u = self.graph.index.get(end_id)
+        if u is None or self.rank[u] == -1:
+            return [ids[v] for v in self.order], [], 0
+        visited = [ids[v] for v in self.order[:self.rank[u] + 1]]
+        return visited, self.graph.pathTo(self.pred, u), self.dist[u]
+
+
+class DynamicShortestPathTree:
+    """可增量维护的单源最短路径树
+
+    追加节点、追加边或边权减小时只从距离变小的节点开始修复，不影响的区域不会被访问；
+    删除节点或边、边权增大等其他修改无法增量处理，需要重新构建。
+    """
+
+    def __init__(self, graph_data, tree):
+        graph = tree.graph
+        self.graph_data = graph_data
+        self.graph = graph                  # 构建时的 CompiledGraph
+        self.ids = list(graph.ids)
+        self.index = dict(graph.index)
+        self.source = tree.source
+        self.dist = list(tree.dist)
+        self.pred = list(tree.pred)
+        self.extra = {}                     # 构建后新增的弧: 下标 -> [(邻居下标, 权重)]
+        self.node_count = len(graph_data["nodes"])
+        self.edge_count = len(graph_data["edges"])
+
+    def sync(self, graph_data):
+        """把 graph_data 中新追加的节点和边应用到树上
+
+        返回 False 表示图被替换或有元素被删除，需要重新构建。
+        """
+        nodes = graph_data["nodes"]
+        edges = graph_data["edges"]
+        if graph_data is not self.graph_data or len(nodes) < self.node_count or len(edges) < self.edge_count:
+            return False
+        for node in nodes[self.node_count:]:
+            self.addNode(node["id"])
+        for edge in edges[self.edge_count:]:
+            self.addEdge(edge["start"], edge["end"], edge["weight"], edge.get("directed", False))
+        self.node_count = len(nodes)
+        self.edge_count = len(edges)
+        return True
+
+    def addNode(self, node_id):
+        self.index.setdefault(node_id, len(self.ids))
+        self.ids.append(node_id)
+        self.dist.append(math.inf)
+        self.pred.append(-1)
+
+    def addEdge(self, start_id, end_id, weight, directed=False):
+        """插入一条边并修复最短路径树，返回距离发生变化的节点数"""
+        u = self.index.get(start_id)
+        v = self.index.get(end_id)
+        if u is None or v is None:
+            return 0
+        arcs = [(u, v)] if directed else [(u, v), (v, u)]
+        for a, b in arcs:
+            self.extra.setdefault(a, []).append((b, weight))
+        return self.repair([(a, b, weight) for a, b in arcs])
+
+    def decreaseWeight(self, start_id, end_id, weight, directed=False):
+        """边权减小等价于插入一条权重更小的平行边"""
+        return self.addEdge(start_id, end_id, weight, directed)
+
+    def repair(self, arcs):
+        """以能缩短终点距离的弧为种子做 Dijkstra，只扩展距离变小的节点"""
+        dist, pred = self.dist, self.pred
+        pq = []
+        for u, v, w in arcs:
+            new_dist = dist[u] + w
+            if new_dist < dist[v]:
+                dist[v] = new_dist
+                pred[v] = u
+                heapq.heappush(pq, (new_dist, v))
+
+        graph = self.graph
+        base_count = graph.nodeCount()
+        offsets, targets, weights = graph.offsets, graph.targets, graph.weights
+        extra = self.extra
+        changed = set()
+        while pq:
+            current_dist, current = heapq.heappop(pq)
+            if current_dist > dist[current]:
+                continue  # 过期的堆元素
+            changed.add(current)
+            if current < base_count:
+                for i in range(offsets[current], offsets[current + 1]):
+                    nx = targets[i]
+                    new_dist = current_dist + weights[i]
+                    if new_dist < dist[nx]:
+                        dist[nx] = new_dist
+                        pred[nx] = current
+                        heapq.heappush(pq, (new_dist, nx))
+            for nx, w in extra.get(current, ()):
+                new_dist = current_dist + w
+                if new_dist < dist[nx]:
+                    dist[nx] = new_dist
+                    pred[nx] = current
+                    heapq.heappush(pq, (new_dist, nx))
+        return len(changed)
+
+    def distanceTo(self, node_id):
+        u = self.index.get(node_id)
+        if u is None:
+            return math.inf
+        return self.dist[u]
+
+    def pathTo(self, node_id):
+        u = self.index.get(node_id)
+        if u is None or self.dist[u] == math.inf:
+            return []
+        path = []
+        while u != -1:
+            path.append(self.ids[u])
+            u = self.pred[u]
+        path.reverse()
+        return path
@@ -0,0 +1,43 @@
+class SearchPlayback:
+    """搜索结果的逐步回放状态
+
+    已探索节点和路径节点保存为集合，每一步只追加一个节点并返回这一步的增量，
+    回放全部步骤的总开销与步数成线性关系。
+    """
+
+    def __init__(self, order, path, end_id):
+        self.order = order          # 搜索访问顺序
+        self.path = path            # 最短路径（节点ID列表）
+        self.path_set = set(path)
+        self.end_id = end_id
+        self.explored = set()
+        self.position = 0           # 已回放的步数
+
+    def total(self):
+        return len(self.order)
+
+    def finished(self):
+        return self.position >= len(self.order)
+
+    def step(self):
+        """回放下一步，返回 (步序号, 节点ID, 是否在路径上)，已结束时返回 None"""
+        if self.position >= len(self.order):
+            return None
+        i = self.position
+        node_id = self.order[i]
+        self.explored.add(node_id)
+        self.position += 1
+        return i, node_id, node_id in self.path_set
+
+    def isOnPath(self, node_id):
+        return node_id in self.path_set
+
+    def setPath(self, path):
+        """编辑图后路径发生变化时替换路径，之后的步骤按新路径判断"""
+        self.path = path
+        self.path_set = set(path)
+
+    def visiblePath(self):
+        """路径中已经被探索到的节点，按路径顺序排列"""
+        explored = self.explored
+        return [n for n in self.path if n in explored]
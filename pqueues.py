@@ -0,0 +1,183 @@
+"""Dijkstra 与 A* 使用的优先队列
+
+所有队列都以 push(queue, (key, v)) / pop(queue) -> (key, v) 的形式调用，与 heapq 的用法相同，
+搜索循环不需要区分队列种类，SearchStats.countingHeap 也可以直接包装：
+
+    binary  heapq 二叉堆，惰性删除：重复压入同一节点，出队时由调用方按已确定标记跳过过期元素
+    dary    带下标的 d 叉堆，同一节点只占一个位置，再次压入更小的键值时执行 decrease-key
+    dial    Dial 桶队列，键值为非负整数，按键值分桶，出队时从当前最小键值向上扫描
+    radix   基数堆，键值为非负整数且单调不减，按与上次出队键值最高不同位分桶
+
+dial 和 radix 只能用于所有边权都是非负整数的图（例如 GraphIO.loadCsv 读取的整数边权）。
+"""
+import heapq
+
+
+class IndexedDaryHeap:
+    """带下标的 d 叉堆，节点下标范围为 [0, n)"""
+
+    def __init__(self, n, d=4):
+        self.d = d
+        self.heap = []         # 堆中的节点下标
+        self.keys = [0] * n    # 节点 -> 当前键值
+        self.pos = [-1] * n    # 节点 -> 在 heap 中的位置，不在堆中为 -1
+
+    def __len__(self):
+        return len(self.heap)
+
+    def push(self, item):
+        """插入节点；节点已在堆中且新键值更小时降低其键值，否则忽略"""
+        key, v = item
+        i = self.pos[v]
+        if i == -1:
+            i = len(self.heap)
+            self.heap.append(v)
+        elif key >= self.keys[v]:
+            return
+        self.keys[v] = key
+        self.siftUp(i, v, key)
+
+    def pop(self):
+        heap, keys, pos = self.heap, self.keys, self.pos
+        top = heap[0]
+        last = heap.pop()
+        pos[top] = -1
+        if heap:
+            self.siftDown(0, last, keys[last])
+        return keys[top], top
+
+    def siftUp(self, i, v, key):
+        heap, keys, pos, d = self.heap, self.keys, self.pos, self.d
+        while i > 0:
+            parent = (i - 1) // d
+            u = heap[parent]
+            if keys[u] <= key:
+                break
+            heap[i] = u
+            pos[u] = i
+            i = parent
+        heap[i] = v
+        pos[v] = i
+
+    def siftDown(self, i, v, key):
+        heap, keys, pos, d = self.heap, self.keys, self.pos, self.d
+        size = len(heap)
+        while True:
+            first = i * d + 1
+            if first >= size:
+                break
+            best = first
+            best_key = keys[heap[first]]
+            for c in range(first + 1, min(first + d, size)):
+                c_key = keys[heap[c]]
+                if c_key < best_key:
+                    best, best_key = c, c_key
+            if best_key >= key:
+                break
+            u = heap[best]
+            heap[i] = u
+            pos[u] = i
+            i = best
+        heap[i] = v
+        pos[v] = i
+
+
+class BucketQueue:
+    """Dial 桶队列：键值 -> 节点列表，cursor 为当前最小的可能键值
+
+    出队的键值单调不减（Dijkstra，或一致启发式取整后的 A*），扫描空桶的总代价不超过最短距离本身。
+    与固定 C + 1 个桶的循环数组不同，桶保存在字典中，不需要事先知道最大边权。
+    """
+
+    def __init__(self):
+        self.buckets = {}
+        self.cursor = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def push(self, item):
+        key = int(item[0])
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            self.buckets[key] = [item]
+        else:
+            bucket.append(item)
+        self.size += 1
+
+    def pop(self):
+        buckets = self.buckets
+        cursor = self.cursor
+        while cursor not in buckets:
+            cursor += 1
+        self.cursor = cursor
+        bucket = buckets[cursor]
+        item = bucket.pop()
+        if not bucket:
+            del buckets[cursor]
+        self.size -= 1
+        return item
+
+
+class RadixHeap:
+    """基数堆：键值为 k 的元素放在第 (k ^ last).bit_length() 个桶中，last 为上次出队的键值
+
+    第 0 个桶中的键值都等于 last，可以直接出队；为空时取第一个非空桶中的最小键值作为新的 last，
+    把该桶的元素重新分到更低的桶中。每个元素最多被重新分配键值位数次。
+    """
+
+    def __init__(self):
+        self.buckets = [[]]
+        self.last = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def push(self, item):
+        b = (int(item[0]) ^ self.last).bit_length()
+        buckets = self.buckets
+        while b >= len(buckets):
+            buckets.append([])
+        buckets[b].append(item)
+        self.size += 1
+
+    def pop(self):
+        buckets = self.buckets
+        if not buckets[0]:
+            b = 1
+            while not buckets[b]:
+                b += 1
+            moved = buckets[b]
+            buckets[b] = []
+            last = int(min(moved)[0])
+            self.last = last
+            for item in moved:
+                buckets[(int(item[0]) ^ last).bit_length()].append(item)
+        self.size -= 1
+        return buckets[0].pop()
+
+
+class PriorityQueues:
+    # 可选的队列种类
+    KINDS = ("binary", "dary", "dial", "radix")
+    # 要求键值为非负整数的队列
+    INTEGER_KINDS = ("dial", "radix")
+
+    @staticmethod
+    def create(kind, graph):
+        """返回 (push, pop, 空队列)，graph 为 CompiledGraph
+
+        整数队列用于含非整数或负边权的图时抛出 ValueError。
+        """
+        if kind == "binary":
+            return heapq.heappush, heapq.heappop, []
+        if kind == "dary":
+            return IndexedDaryHeap.push, IndexedDaryHeap.pop, IndexedDaryHeap(graph.nodeCount())
+        if kind in PriorityQueues.INTEGER_KINDS:
+            if not graph.integerWeights():
+                raise ValueError(f"{kind} 队列要求所有边权为非负整数")
+            cls = BucketQueue if kind == "dial" else RadixHeap
+            return cls.push, cls.pop, cls()
+        raise ValueError(f"未知优先队列: {kind}")
@@ -0,0 +1,47 @@
+from collections import OrderedDict
+
+
+class QueryCache:
+    """有容量上限的 LRU 查询结果缓存
+
+    键一般为 (图版本号, 算法, 起点ID, 终点ID)。图发生变化时版本号递增，
+    旧版本的结果不会再被命中，最终按 LRU 顺序被淘汰。
+    """
+
+    def __init__(self, capacity=128):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """命中时返回缓存结果并将其移到最近使用的位置，否则返回 None"""
+        result = self.entries.get(key)
+        if result is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return result
+
+    def put(self, key, result):
+        self.entries[key] = result
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self.entries),
+            "capacity": self.capacity,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
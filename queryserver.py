@@ -0,0 +1,353 @@
+"""常驻内存的最短路径查询服务
+
+图只在启动（或 load 请求）时读取和编译一次，之后的查询直接使用内存中的图。
+协议为 JSON Lines：客户端每行发送一个请求，服务端每行返回一个响应，响应通过 id 与请求对应，
+同一连接上的多个请求并发处理，响应可能不按请求顺序返回。
+
+请求:
+    {"id": 1, "op": "search", "graph": "city", "algorithm": "A*", "start": "1", "end": "9", "visited": false}
+    {"id": 2, "op": "graphs"}                             # 已载入的图
+    {"id": 3, "op": "load", "graph": "city", "path": "city.graphbin"}
+    {"id": 4, "op": "stats"}                              # 请求数、合并数和缓存命中情况
+search 请求还可以带 "backend"（python 或 scipy）、"heuristic"（见 Heuristics）和 "queue"（见 PriorityQueues）字段，
+"stats" 为 true 时结果中另有 "stats" 字段（见 SearchStats）。
+响应:
+    {"id": 1, "ok": true, "result": {...}} 或 {"id": 1, "ok": false, "error": "原因"}
+
+用法:
+    python queryserver.py city=city.graphbin grid.json --port 8765
+    python queryserver.py city=city.graphbin --unix /tmp/graph.sock --jobs 8
+"""
+import argparse
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import sys
+import threading
+
+from algorithms import GraphAlgorithms
+from batchrunner import BatchRunner, timedSearches
+from heuristics import Heuristics
+from pqueues import PriorityQueues
+from querycache import QueryCache
+import cli
+
+
+class QueryError(Exception):
+    """服务端返回的错误响应"""
+
+
+class QueryServer:
+    """异步查询服务
+
+    搜索在执行器中运行，不阻塞事件循环：jobs 为 0 时使用本进程的线程池，
+    大于 0 时每张图使用一个 BatchRunner 进程池（图放在共享内存中），收缩层次在第一个 CH 查询时
+    由本进程构建一次，再随新的进程池发给各工作进程。
+    正在计算的相同查询只计算一次，完成的结果放入 LRU 缓存。
+    """
+
+    def __init__(self, jobs=0, cache_capacity=1024):
+        self.jobs = jobs
+        self.graphs = {}       # 名称 -> GraphStore 或字典
+        self.revisions = {}    # 名称 -> 版本号，重新载入同名图后旧结果不再命中
+        self.runners = {}      # 名称 -> BatchRunner（jobs > 0 时）
+        self.executor = ThreadPoolExecutor(max_workers=min(4, os.cpu_count() or 1))
+        self.hierarchy_lock = threading.Lock()  # 只有一个线程构建收缩层次或替换进程池
+        self.in_flight = {}    # 查询键 -> 尚未完成的 asyncio.Future
+        self.cache = QueryCache(cache_capacity)
+        self.requests = 0
+        self.coalesced = 0
+        self.server = None
+        self.connections = {}  # 连接处理任务 -> reader，关闭服务时逐个结束
+
+    def addGraph(self, name, graph_data):
+        """让一张图常驻内存，同名的旧图被替换"""
+        GraphAlgorithms.compile(graph_data)
+        with self.hierarchy_lock:
+            old_runner = self.runners.pop(name, None)
+            if self.jobs > 0:
+                self.runners[name] = BatchRunner(graph_data, self.jobs)
+            self.graphs[name] = graph_data
+            self.revisions[name] = self.revisions.get(name, 0) + 1
+        if old_runner is not None:
+            old_runner.close()
+
+    def loadGraph(self, name, fname):
+        """读取图文件（及旁边的收缩层次文件）并常驻内存"""
+        if not os.path.exists(fname):
+            raise ValueError(f"图文件不存在: {fname}")
+        self.addGraph(name, cli.loadGraph(fname))
+
+    async def search(self, name, algo, start_id, end_id, keep_visited=False, backend="python",
+                     heuristic="euclidean", queue="binary", stats=False):
+        """返回 (结果字典, 来源)，来源为 "computed"、"coalesced" 或 "cache" """
+        graph = self.graphs.get(name)
+        if graph is None:
+            raise ValueError(f"未载入的图: {name}")
+        if algo not in GraphAlgorithms.ALGORITHMS:
+            raise ValueError(f"未知算法: {algo}")
+        # JSON 中的ID可能是文本或数字，按图中节点ID的类型对应，多个ID的列表转为元组
+        start_id, end_id = GraphAlgorithms.resolveId(graph, start_id), GraphAlgorithms.resolveId(graph, end_id)
+        if heuristic not in Heuristics.KINDS:
+            raise ValueError(f"未知启发式: {heuristic}")
+        if queue not in PriorityQueues.KINDS:
+            raise ValueError(f"未知优先队列: {queue}")
+        self.requests += 1
+        key = (name, self.revisions[name], algo, start_id, end_id, keep_visited, backend, heuristic, queue, stats)
+        result = self.cache.get(key)
+        if result is not None:
+            return result, "cache"
+        future = self.in_flight.get(key)
+        if future is not None:
+            # 与正在计算的相同查询共用结果；shield 保证一个请求被取消时不影响其他等待者
+            self.coalesced += 1
+            return await asyncio.shield(future), "coalesced"
+
+        runner = self.runners.get(name)
+        if runner is not None and algo == "CH" and not runner.has_hierarchy:
+            loop = asyncio.get_running_loop()
+            old_runner = await loop.run_in_executor(self.executor, self.shareHierarchy, name, graph)
+            if old_runner is not None:
+                # 替换后事件循环中不会再向旧进程池提交查询，关闭时等待已提交的查询完成
+                loop.run_in_executor(self.executor, old_runner.close)
+            runner = self.runners.get(name)
+        if runner is not None:
+            pending = runner.submit((algo, start_id, end_id), keep_visited, backend, heuristic, queue, stats)
+        else:
+            pending = self.executor.submit(self.searchInThread, GraphAlgorithms.compile(graph),
+                                           (algo, start_id, end_id), keep_visited, backend, heuristic, queue, stats)
+        future = asyncio.ensure_future(self.finishSearch(key, asyncio.wrap_future(pending)))
+        self.in_flight[key] = future
+        return await asyncio.shield(future), "computed"
+
+    def shareHierarchy(self, name, graph):
+        """在本进程中构建一次收缩层次，换用随初始化参数把层次发给工作进程的进程池，返回被替换的旧进程池
+
+        否则每个工作进程都会在自己的第一个 CH 查询时重复构建。
+        """
+        with self.hierarchy_lock:
+            runner = self.runners.get(name)
+            if runner is None or runner.has_hierarchy or self.graphs.get(name) is not graph:
+                return None
+            GraphAlgorithms.prepareHierarchy(graph)
+            self.runners[name] = BatchRunner(graph, self.jobs)
+        return runner
+
+    def searchInThread(self, graph, query, keep_visited, backend, heuristic, queue, stats):
+        """在线程池中执行一个查询；CH 查询先在锁内准备收缩层次，同一张图的并发 CH 查询不会重复构建"""
+        if query[0] == "CH":
+            with self.hierarchy_lock:
+                GraphAlgorithms.prepareHierarchy(graph)
+        return timedSearches(graph, [query], keep_visited, backend, heuristic, queue, stats)
+
+    async def finishSearch(self, key, pending):
+        try:
+            (visited, path, cost, elapsed, *search_stats), = await pending
+        finally:
+            del self.in_flight[key]
+        _, _, algo, start_id, end_id, keep_visited = key[:6]
+        result = {
+            "algorithm": algo,
+            "start": start_id,
+            "end": end_id,
+            "cost": cost if path else None,
+            "path": path,
+            "expanded": len(visited) if keep_visited else visited,
+            "time_ms": round(elapsed, 3),
+        }
+        if keep_visited:
+            result["visited"] = visited
+        if search_stats:
+            result["stats"] = search_stats[0].toDict()
+        self.cache.put(key, result)
+        return result
+
+    async def dispatch(self, request):
+        op = request.get("op", "search")
+        if op == "search":
+            result, source = await self.search(request["graph"], request.get("algorithm", "Dijkstra"),
+                                               request["start"], request["end"],
+                                               bool(request.get("visited", False)),
+                                               request.get("backend", "python"),
+                                               request.get("heuristic", "euclidean"),
+                                               request.get("queue", "binary"),
+                                               bool(request.get("stats", False)))
+            return dict(result, source=source)
+        if op == "graphs":
+            return {name: {"nodes": len(graph["nodes"]), "edges": len(graph["edges"])}
+                    for name, graph in self.graphs.items()}
+        if op == "load":
+            # 读取和编译在线程池中进行，载入大图时仍能响应其他请求
+            name, fname = str(request["graph"]), str(request["path"])
+            await asyncio.get_running_loop().run_in_executor(self.executor, self.loadGraph, name, fname)
+            return {"graph": name}
+        if op == "stats":
+            return {"requests": self.requests, "coalesced": self.coalesced, "in_flight": len(self.in_flight),
+                    "cache": self.cache.stats()}
+        raise ValueError(f"未知操作: {op}")
+
+    async def handleLine(self, line, writer):
+        request_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("请求应为 JSON 对象")
+            request_id = request.get("id")
+            response = {"id": request_id, "ok": True, "result": await self.dispatch(request)}
+        except (ValueError, KeyError, TypeError) as e:
+            message = f"缺少字段: {e}" if isinstance(e, KeyError) else str(e)
+            response = {"id": request_id, "ok": False, "error": message}
+        except Exception as e:
+            # 搜索或载入中的其他异常也返回错误响应，不能让客户端一直等待
+            response = {"id": request_id, "ok": False, "error": f"{type(e).__name__}: {e}"}
+        writer.write((json.dumps(response, ensure_ascii=False) + "\n").encode("utf-8"))
+        await writer.drain()
+
+    async def handleConnection(self, reader, writer):
+        self.connections[asyncio.current_task()] = reader
+        tasks = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                task = asyncio.create_task(self.handleLine(line, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        except ConnectionError:
+            pass
+        finally:
+            del self.connections[asyncio.current_task()]
+            writer.close()
+
+    async def start(self, host="127.0.0.1", port=0, path=None):
+        """开始监听：给出 path 时使用 Unix 套接字，否则使用 TCP（port 为 0 时自动分配）"""
+        if path is not None:
+            self.server = await asyncio.start_unix_server(self.handleConnection, path)
+        else:
+            self.server = await asyncio.start_server(self.handleConnection, host, port)
+        return self.server
+
+    def address(self):
+        return self.server.sockets[0].getsockname()
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+        # 不再读取仍打开的连接上的新请求，等待已收到的请求写回响应后断开
+        for reader in list(self.connections.values()):
+            reader.feed_eof()
+        await asyncio.gather(*self.connections, return_exceptions=True)
+        if self.server is not None:
+            await self.server.wait_closed()
+        for runner in self.runners.values():
+            runner.close()
+        self.runners = {}
+        self.executor.shutdown()
+
+
+class QueryClient:
+    """查询服务的异步客户端，同一连接上可以同时等待多个请求"""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.next_id = 0
+        self.pending = {}  # 请求 id -> Future
+        self.receiver = asyncio.create_task(self.receive())
+
+    @classmethod
+    async def connect(cls, host="127.0.0.1", port=None, path=None):
+        if path is not None:
+            reader, writer = await asyncio.open_unix_connection(path)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def receive(self):
+        try:
+            while True:
+                line = await self.reader.readline()
+                if not line:
+                    break
+                response = json.loads(line)
+                future = self.pending.pop(response.get("id"), None)
+                if future is None or future.done():
+                    continue
+                if response["ok"]:
+                    future.set_result(response["result"])
+                else:
+                    future.set_exception(QueryError(response["error"]))
+        finally:
+            for future in self.pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("连接已关闭"))
+            self.pending = {}
+
+    async def request(self, op, **fields):
+        if self.receiver.done():
+            raise ConnectionError("连接已关闭")
+        self.next_id += 1
+        request_id = self.next_id
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = future
+        self.writer.write((json.dumps(dict(fields, id=request_id, op=op), ensure_ascii=False) + "\n")
+                          .encode("utf-8"))
+        await self.writer.drain()
+        return await future
+
+    async def search(self, graph, algorithm, start_id, end_id, visited=False, stats=False):
+        return await self.request("search", graph=graph, algorithm=algorithm, start=start_id, end=end_id,
+                                  visited=visited, stats=stats)
+
+    async def close(self):
+        self.writer.close()
+        await self.receiver
+
+
+def parseGraphSpec(spec):
+    """"名称=路径" 或 "路径"（名称为去掉扩展名的文件名）"""
+    name, sep, path = spec.partition("=")
+    if not sep:
+        path = spec
+        name = os.path.splitext(os.path.basename(spec))[0]
+    return name, path
+
+
+async def serve(args):
+    server = QueryServer(args.jobs, args.cache)
+    for spec in args.graphs:
+        name, path = parseGraphSpec(spec)
+        server.loadGraph(name, path)
+        print(f"已载入 {name}: {path}", file=sys.stderr)
+    await server.start(args.host, args.port, args.unix)
+    print(f"监听 {args.unix or server.address()}", file=sys.stderr)
+    try:
+        await server.server.serve_forever()
+    finally:
+        await server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="常驻内存的最短路径查询服务（JSON Lines 协议）")
+    parser.add_argument("graphs", nargs="*", help="要载入的图，格式为 名称=路径 或 路径")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="监听 Unix 套接字而不是 TCP 端口")
+    parser.add_argument("-j", "--jobs", type=int, default=0, help="每张图的搜索进程数，0 表示在本进程的线程池中搜索")
+    parser.add_argument("--cache", type=int, default=1024, help="结果缓存容量")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
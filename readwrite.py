@@ -1,23 +1,170 @@
 import json
 import csv
+import mmap
+import os
+import re
+import struct
+import sys
+from array import array
+from itertools import islice
+
+from compiledgraph import CompiledGraph
+from graphstore import GraphStore
+from hierarchy import ContractionHierarchy
 
 class GraphIO:
+    # 二进制图文件头：魔数、字节序、节点数、边数、CSR 弧数、节点ID字节数
+    BINARY_MAGIC = b"GRAPHBN1"
+    # 节点ID不全是字符串（例如 JSON 文件中的整数ID）时，ID 段改为 JSON 数组，以保留原类型
+    BINARY_MAGIC_TYPED_IDS = b"GRAPHBN2"
+    BINARY_HEADER = struct.Struct("<8s8sQQQQ")
+    JSON_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
     @staticmethod
     def loadGraph(fname):
-        if fname.endswith(".json"):
-            with open(fname, "r", encoding="utf-8") as f:
-                return json.load(f)
-        elif fname.endswith(".csv"):
-            return GraphIO.loadCsv(fname)
-        return {"nodes": [], "edges": []}
+        """读取图文件，返回 GraphStore；界面通过 store["nodes"]、store["edges"] 视图按字典方式使用"""
+        return GraphIO.loadStore(fname)
 
     @staticmethod
     def saveGraph(fname, data):
         if fname.endswith(".json"):
-            with open(fname, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            GraphIO.saveJsonStream(fname, data)
         elif fname.endswith(".csv"):
             GraphIO.saveCsv(fname, data)
+        elif fname.endswith(".graphbin"):
+            GraphIO.saveBinary(fname, data)
+
+    @staticmethod
+    def loadStore(fname):
+        """按扩展名把图文件读成 GraphStore"""
+        if fname.endswith(".json"):
+            return GraphIO.loadJsonStore(fname)
+        elif fname.endswith(".csv"):
+            return GraphIO.loadCsvStore(fname)
+        elif fname.endswith(".graphbin"):
+            return GraphIO.loadBinary(fname)
+        return GraphStore()
+
+    @staticmethod
+    def saveJsonStream(fname, data):
+        """逐个元素写出紧凑 JSON，格式与 testgraph.json 相同（每个节点、每条边占一行）
+
+        data 可以是 {"nodes", "edges"} 字典，也可以是 GraphStore（逐个遍历其视图中的记录），不会先拼出整个文档。
+        """
+        encode = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"),
+                                  default=lambda record: record.toDict()).encode
+        with open(fname, "w", encoding="utf-8") as f:
+            for key in ("nodes", "edges"):
+                items = data[key]
+                f.write('{"nodes":[' if key == "nodes" else '],"edges":[')
+                separator = "\n"
+                for item in items:
+                    f.write(separator)
+                    f.write(encode(item))
+                    separator = ",\n"
+            f.write("\n]}\n")
+
+    @staticmethod
+    def iterJsonElements(f, chunk_size=65536):
+        """增量解析图 JSON，依次产生 ("nodes", 节点字典) 或 ("edges", 边字典)
+
+        每次只读入 chunk_size 个字符，已解析的部分随即丢弃；其他顶层字段整体解析后忽略。
+        """
+        decoder = json.JSONDecoder()
+        skip_ws = GraphIO.JSON_WHITESPACE.match
+        buf = ""
+        pos = 0
+        eof = False
+
+        def fill():
+            # 丢弃已解析的前缀并读入下一块，文件结束时返回 False
+            nonlocal buf, pos, eof
+            chunk = f.read(chunk_size)
+            if not chunk:
+                eof = True
+                return False
+            buf = buf[pos:] + chunk
+            pos = 0
+            return True
+
+        def peek():
+            nonlocal pos
+            while True:
+                pos = skip_ws(buf, pos).end()
+                if pos < len(buf):
+                    return buf[pos]
+                if not fill():
+                    raise ValueError("JSON 文件意外结束")
+
+        def expect(char):
+            nonlocal pos
+            if peek() != char:
+                raise ValueError("JSON 格式错误：位置 %d 处应为 %r" % (pos, char))
+            pos += 1
+
+        def value():
+            # 不完整的值会解析失败，被截断的数字（如 "1.5e"）则只解析出前半段，
+            # 因此只有后面紧跟分隔符时才算解析完成，否则再读一块重试
+            nonlocal pos
+            peek()
+            while True:
+                try:
+                    item, end = decoder.raw_decode(buf, pos)
+                    if eof or (end < len(buf) and buf[end] in ",]}: \t\n\r"):
+                        pos = end
+                        return item
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                fill()
+
+        expect("{")
+        if peek() == "}":
+            return
+        while True:
+            key = value()
+            expect(":")
+            if key in ("nodes", "edges") and peek() == "[":
+                pos += 1
+                if peek() == "]":
+                    pos += 1
+                else:
+                    while True:
+                        yield key, value()
+                        if peek() == "]":
+                            pos += 1
+                            break
+                        expect(",")
+            else:
+                value()
+            if peek() == "}":
+                return
+            expect(",")
+
+    @staticmethod
+    def loadJsonStore(fname, chunk_size=65536, progress=None):
+        """流式读取 JSON 图文件，节点和边逐个写入 GraphStore，不构建完整的字典列表
+
+        nodes 与 edges 的先后顺序不限；progress(已读元素数, 已读字节数, 文件总字节数) 在读取位置前进时调用。
+        """
+        store = GraphStore(loading=True)
+        total = os.path.getsize(fname)
+        count = 0
+        last_position = 0
+        with open(fname, "r", encoding="utf-8") as f:
+            add_node, add_edge = store.addNode, store.addEdge
+            for key, item in GraphIO.iterJsonElements(f, chunk_size):
+                if key == "nodes":
+                    add_node(item["id"], float(item["x"]), float(item["y"]))
+                else:
+                    add_edge(item["start"], item["end"], float(item["weight"]), item.get("directed", False))
+                count += 1
+                if progress is not None:
+                    position = f.buffer.tell()
+                    if position != last_position:
+                        last_position = position
+                        progress(count, position, total)
+        return store.finish()
 
     @staticmethod
     def loadCsv(fname):
@@ -28,16 +175,61 @@ class GraphIO:
             for row in reader:
                 # 假设 CSV 中含有 type 字段，标识 "node" 或 "edge"
                 if row["type"] == "node":
-                    nodes.append({"id": row["id"], "x": int(row["x"]), "y": int(row["y"])})
+                    nodes.append({"id": row["id"], "x": GraphIO.parseNumber(row["x"]), "y": GraphIO.parseNumber(row["y"])})
                 else:
                     edges.append({
                         "start": row["start"],
                         "end": row["end"],
-                        "weight": int(row["weight"]),
+                        "weight": GraphIO.parseNumber(row["weight"]),
                         "directed": row["directed"].lower()=="true"
                     })
         return {"nodes": nodes, "edges": edges}
 
+    @staticmethod
+    def parseNumber(text):
+        """整数保持为 int，画布写出的小数权重解析为 float"""
+        try:
+            return int(text)
+        except ValueError:
+            return float(text)
+
+    @staticmethod
+    def loadCsvStore(fname, chunk_size=8192, progress=None):
+        """流式读取 CSV，按块把行直接写入 GraphStore 的类型化数组
+
+        不为每行构造字典，内存占用接近最终数组的大小。
+        progress(已读行数, 已读字节数, 文件总字节数) 在每块处理完后调用。
+        """
+        store = GraphStore(loading=True)
+        total = os.path.getsize(fname)
+        rows_read = 0
+        with open(fname, "r", newline="", encoding="utf-8") as csvfile:
+            reader = csv.reader(csvfile)
+            header = next(reader, None)
+            if header is None:
+                return store.finish()
+            col = {name: i for i, name in enumerate(header)}
+            c_type, c_id, c_x, c_y = col["type"], col["id"], col["x"], col["y"]
+            c_start, c_end, c_weight, c_directed = col["start"], col["end"], col["weight"], col["directed"]
+            add_node, add_edge = store.addNode, store.addEdge
+            while True:
+                chunk = list(islice(reader, chunk_size))
+                if not chunk:
+                    break
+                for row in chunk:
+                    if not row:
+                        continue  # 与 DictReader 一致，跳过空行
+                    if row[c_type] == "node":
+                        add_node(row[c_id], float(row[c_x]), float(row[c_y]))
+                    else:
+                        add_edge(row[c_start], row[c_end], float(row[c_weight]),
+                                 row[c_directed].lower() == "true")
+                rows_read += len(chunk)
+                if progress is not None:
+                    # 底层缓冲区的位置最多超前一个读缓冲块，足够用于显示进度
+                    progress(rows_read, csvfile.buffer.tell(), total)
+        return store.finish()
+
     @staticmethod
     def saveCsv(fname, data):
         fieldnames = ["type", "id", "x", "y", "start", "end", "weight", "directed"]
@@ -65,4 +257,151 @@ class GraphIO:
                     "end": e["end"],
                     "weight": str(e["weight"]),
                     "directed": e["directed"]
-                })
\ No newline at end of file
+                })
+
+    @staticmethod
+    def hierarchyPath(fname):
+        """收缩层次保存在图文件旁边，例如 graph.json -> graph.json.ch"""
+        return fname + ".ch"
+
+    @staticmethod
+    def saveHierarchy(fname, hierarchy):
+        with open(fname, "w", encoding="utf-8") as f:
+            json.dump(hierarchy.toDict(), f, separators=(",", ":"))
+
+    @staticmethod
+    def loadHierarchy(fname, graph):
+        """读取收缩层次，文件不存在或与 graph（CompiledGraph）不匹配时返回 None"""
+        if not os.path.exists(fname):
+            return None
+        with open(fname, "r", encoding="utf-8") as f:
+            return ContractionHierarchy.fromDict(graph, json.load(f))
+
+    @staticmethod
+    def binaryLayout(node_count, edge_count, arc_count, id_bytes):
+        """返回二进制文件各段的 (名称, 类型码, 元素个数, 文件偏移)，每段按 8 字节对齐"""
+        sections = [
+            ("xs", "d", node_count),
+            ("ys", "d", node_count),
+            ("offsets", "i", node_count + 1),
+            ("targets", "i", arc_count),
+            ("weights", "d", arc_count),
+            ("edge_start", "i", edge_count),
+            ("edge_end", "i", edge_count),
+            ("edge_weight", "d", edge_count),
+            ("directed", "B", edge_count),
+            ("ids", "B", id_bytes),
+        ]
+        layout = []
+        pos = GraphIO.BINARY_HEADER.size
+        for name, code, count in sections:
+            pos = (pos + 7) // 8 * 8
+            layout.append((name, code, count, pos))
+            pos += count * array(code).itemsize
+        return layout
+
+    @staticmethod
+    def saveBinary(fname, data):
+        """保存为 .graphbin：节点表、坐标、CSR 邻接和原始边表都以定长数组存放
+
+        data 可能直接映射着 fname 本身（读取 .graphbin 后保存回原文件）：截断原文件会使映射失效，
+        Windows 也不允许替换仍被映射的文件，因此这时先把数据复制到内存并关闭映射（GraphStore.unmap），
+        再写入同一目录下的临时文件并替换目标文件。
+        """
+        if isinstance(data, GraphStore) and data.mapping is not None and os.path.exists(fname) and \
+                os.path.exists(data.mapping[0]) and os.path.samefile(data.mapping[0], fname):
+            data.unmap()
+        _, sections = GraphIO.packBinary(data)
+        tmp_name = f"{fname}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_name, "wb") as f:
+                for offset, chunk in sections:
+                    f.write(bytes(offset - f.tell()))
+                    f.write(chunk)
+            os.replace(tmp_name, fname)
+        except BaseException:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+            raise
+
+    @staticmethod
+    def packBinary(data):
+        """按 .graphbin 布局排列图数据，返回 (总字节数, [(偏移, 字节内容)])，供写文件或共享内存使用"""
+        store = data if isinstance(data, GraphStore) else GraphStore.fromGraphData(data)
+        graph = store.compiled if store.compiled is not None else CompiledGraph.fromStore(store)
+        if all(isinstance(nid, str) for nid in store.ids):
+            if any("\0" in nid for nid in store.ids):
+                raise ValueError("节点ID不能包含 \\0 字符")
+            magic = GraphIO.BINARY_MAGIC
+            id_blob = "\0".join(store.ids).encode("utf-8")
+        else:
+            if not all(isinstance(nid, (str, int, float)) for nid in store.ids):
+                raise ValueError("节点ID只能是字符串或数字")
+            magic = GraphIO.BINARY_MAGIC_TYPED_IDS
+            id_blob = json.dumps(list(store.ids), ensure_ascii=False).encode("utf-8")
+        columns = {
+            "xs": graph.xs, "ys": graph.ys,
+            "offsets": graph.offsets, "targets": graph.targets, "weights": graph.weights,
+            "edge_start": store.edge_start, "edge_end": store.edge_end,
+            "edge_weight": store.weights, "directed": bytes(store.directed),  # 文件中每条边占一个字节
+            "ids": id_blob,
+        }
+        layout = GraphIO.binaryLayout(store.nodeCount(), store.edgeCount(), graph.edgeCount(), len(id_blob))
+        header = GraphIO.BINARY_HEADER.pack(magic, sys.byteorder.encode("ascii"),
+                                            store.nodeCount(), store.edgeCount(), graph.edgeCount(), len(id_blob))
+        sections = [(0, header)]
+        size = len(header)
+        for name, code, count, offset in layout:
+            chunk = memoryview(columns[name]).cast("B")
+            sections.append((offset, chunk))
+            size = offset + len(chunk)
+        return size, sections
+
+    @staticmethod
+    def loadBinary(fname):
+        """以内存映射方式读取 .graphbin，返回附带 CompiledGraph 的 GraphStore
+
+        所有数组都是直接映射文件内容的 memoryview，不做复制；节点ID到下标的索引在首次使用时构建。
+        """
+        with open(fname, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                raise ValueError("不是有效的二进制图文件")
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        store = GraphIO.unpackBinary(memoryview(mapping))
+        store.mapping = (fname, mapping)
+        return store
+
+    @staticmethod
+    def unpackBinary(buf):
+        """由 .graphbin 布局的缓冲区（文件映射或共享内存）构造 GraphStore，数组直接引用 buf"""
+        magic, order, node_count, edge_count, arc_count, id_bytes = GraphIO.BINARY_HEADER.unpack_from(buf)
+        if magic not in (GraphIO.BINARY_MAGIC, GraphIO.BINARY_MAGIC_TYPED_IDS):
+            raise ValueError("不是有效的二进制图文件")
+        swap = order.rstrip(b"\0").decode("ascii") != sys.byteorder
+        columns = {}
+        for name, code, count, offset in GraphIO.binaryLayout(node_count, edge_count, arc_count, id_bytes):
+            view = buf[offset:offset + count * array(code).itemsize]
+            if swap and code != "B":
+                # 字节序不同的文件只能复制后转换
+                column = array(code, view.tobytes())
+                column.byteswap()
+                columns[name] = column
+            else:
+                columns[name] = view.cast(code)
+
+        if not node_count:
+            ids = []
+        elif magic == GraphIO.BINARY_MAGIC_TYPED_IDS:
+            ids = json.loads(bytes(columns["ids"]).decode("utf-8"))
+        else:
+            ids = bytes(columns["ids"]).decode("utf-8").split("\0")
+        store = GraphStore()
+        store.ids = ids
+        store._index = None
+        store.xs, store.ys = columns["xs"], columns["ys"]
+        store.edge_start, store.edge_end = columns["edge_start"], columns["edge_end"]
+        store.weights, store.directed = columns["edge_weight"], columns["directed"]
+        store.mapped = True  # 第一次编辑时复制为可追加的数组
+        store.compiled = CompiledGraph(ids, None, columns["xs"], columns["ys"],
+                                       columns["offsets"], columns["targets"], columns["weights"])
+        return store
@@ -0,0 +1,71 @@
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QTimer
+from PyQt5.QtGui import QBrush
+
+
+class SearchResultModel(QAbstractTableModel):
+    """搜索访问顺序表的数据模型
+
+    直接引用 SearchPlayback 中的访问顺序，不为每行创建表格项；单元格内容和路径高亮在视图请求时才生成。
+    回放追加的行先记下来，每帧（约 16 ms）最多通知视图一次。
+    """
+
+    HEADERS = ("Order", "节点ID")
+    FRAME_INTERVAL = 16  # 毫秒
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.playback = None
+        self.visible_rows = 0   # 视图当前已知的行数
+        self.pending_rows = 0   # 回放已到达、尚未通知视图的行数
+        self.flush_scheduled = False
+        self.highlight = QBrush(Qt.yellow)
+
+    def setPlayback(self, playback):
+        """换成新的搜索结果，表格清空"""
+        self.beginResetModel()
+        self.playback = playback
+        self.visible_rows = 0
+        self.pending_rows = 0
+        self.endResetModel()
+
+    def setVisibleRows(self, count):
+        """回放到第 count 步，新行在下一帧统一插入"""
+        self.pending_rows = count
+        if not self.flush_scheduled:
+            self.flush_scheduled = True
+            QTimer.singleShot(self.FRAME_INTERVAL, self.flushRows)
+
+    def flushRows(self):
+        self.flush_scheduled = False
+        count = self.pending_rows
+        if count > self.visible_rows:
+            self.beginInsertRows(QModelIndex(), self.visible_rows, count - 1)
+            self.visible_rows = count
+            self.endInsertRows()
+
+    def refreshPath(self):
+        """路径变化后重新请求已显示行的高亮"""
+        if self.visible_rows:
+            self.dataChanged.emit(self.index(0, 0), self.index(self.visible_rows - 1, 1), [Qt.BackgroundRole])
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.visible_rows
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or self.playback is None:
+            return None
+        row = index.row()
+        node = self.playback.order[row]
+        if role == Qt.DisplayRole:
+            return str(row + 1) if index.column() == 0 else str(node)
+        if role == Qt.BackgroundRole and self.playback.isOnPath(node):
+            return self.highlight  # 路径上的节点使用黄色背景高亮
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
@@ -0,0 +1,85 @@
+import time
+
+
+class SearchStats:
+    """一次搜索的计数器和分阶段耗时
+
+    把 SearchStats 对象传给 GraphAlgorithms.runSearch(..., stats=...) 即开启统计；不传时算法内不做任何计数。
+    堆操作和启发式函数通过包装函数计数，未开启时直接使用原函数，热循环里没有额外的判断。
+    """
+
+    COUNTERS = ("settled", "pushes", "pops", "stale_pops", "relaxations", "edge_scans",
+                "heuristic_evals", "peak_frontier")
+
+    def __init__(self):
+        self.settled = 0          # 确定最短距离（或被扩展）的节点数
+        self.pushes = 0           # 入队/入堆次数
+        self.pops = 0             # 出队/出堆次数
+        self.stale_pops = 0       # 出堆时已确定、被跳过的过期元素
+        self.relaxations = 0      # 成功缩短距离的松弛次数
+        self.edge_scans = 0       # 检查过的出弧数
+        self.heuristic_evals = 0  # 启发式函数调用次数
+        self.peak_frontier = 0    # 队列/堆的最大长度
+        self.phases = {}          # 阶段名 -> 耗时（纳秒）
+        self.last_mark = None
+
+    def begin(self):
+        self.last_mark = time.perf_counter_ns()
+
+    def mark(self, phase):
+        """把上一次标记以来的时间计入 phase"""
+        now = time.perf_counter_ns()
+        if self.last_mark is not None:
+            self.phases[phase] = self.phases.get(phase, 0) + now - self.last_mark
+        self.last_mark = now
+
+    def finish(self, phase, settled, sources=1, relaxations=None):
+        """搜索循环结束时调用：记录阶段耗时，并由入堆、出堆次数推算松弛次数和过期出堆数
+
+        堆式搜索中除了 sources 个起点，每次入堆都对应一次成功的松弛；其他情况由调用者传入 relaxations。
+        """
+        self.mark(phase)
+        self.settled += settled
+        self.relaxations += self.pushes - sources if relaxations is None else relaxations
+        self.stale_pops = self.pops - self.settled
+
+    def countingHeap(self, push, pop):
+        """返回会计数的 (push, pop)，同时记录堆的最大长度"""
+        def countingPush(heap, item):
+            self.pushes += 1
+            push(heap, item)
+            if len(heap) > self.peak_frontier:
+                self.peak_frontier = len(heap)
+
+        def countingPop(heap):
+            self.pops += 1
+            return pop(heap)
+        return countingPush, countingPop
+
+    def countingHeuristic(self, heuristic):
+        def counted(v):
+            self.heuristic_evals += 1
+            return heuristic(v)
+        return counted
+
+    def add(self, other):
+        """累加另一次搜索的统计，峰值取最大值"""
+        for name in self.COUNTERS:
+            if name == "peak_frontier":
+                self.peak_frontier = max(self.peak_frontier, other.peak_frontier)
+            else:
+                setattr(self, name, getattr(self, name) + getattr(other, name))
+        for phase, ns in other.phases.items():
+            self.phases[phase] = self.phases.get(phase, 0) + ns
+
+    def toDict(self):
+        data = {name: getattr(self, name) for name in self.COUNTERS}
+        data["phases_ms"] = {phase: ns / 1e6 for phase, ns in self.phases.items()}
+        return data
+
+    def summary(self):
+        """界面信息栏显示的摘要"""
+        phases = ", ".join(f"{phase} {ns / 1e6:.2f} ms" for phase, ns in self.phases.items())
+        return (f"确定节点 {self.settled} | 入堆 {self.pushes} | 出堆 {self.pops}（过期 {self.stale_pops}）\n"
+                f"松弛 {self.relaxations} | 扫描边 {self.edge_scans} | 启发式 {self.heuristic_evals} | "
+                f"队列峰值 {self.peak_frontier}\n阶段: {phases}")
@@ -0,0 +1,55 @@
+import threading
+import time
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from algorithms import GraphAlgorithms, SearchCancelled
+from searchstats import SearchStats
+
+
+class SearchWorker(QThread):
+    """在后台线程中运行一次搜索，界面线程通过信号接收进度和结果
+
+    graph 应为已编译的 CompiledGraph：编译后的图不会再被修改，
+    搜索期间画布上的编辑不会影响正在运行的搜索。
+    """
+
+    progress = pyqtSignal(int)            # 已确定的节点数
+    resultReady = pyqtSignal(object, float, object)  # (visited, path, cost)，耗时（毫秒），SearchStats
+    cancelled = pyqtSignal()
+    failed = pyqtSignal(str)
+
+    def __init__(self, graph, algo, start_id, end_id, parent=None):
+        super().__init__(parent)
+        self.graph = graph
+        self.algo = algo
+        self.start_id = start_id
+        self.end_id = end_id
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        """请求中止，搜索在下一次进度回调时停止"""
+        self.cancel_event.set()
+
+    def reportProgress(self, count):
+        if self.cancel_event.is_set():
+            raise SearchCancelled()
+        self.progress.emit(count)
+
+    def run(self):
+        stats = SearchStats()
+        start_time = time.perf_counter()
+        try:
+            if self.algo == "CH":
+                stats.begin()
+                GraphAlgorithms.prepareHierarchy(self.graph, progress=self.reportProgress)
+                stats.mark("preprocess")
+            result = GraphAlgorithms.runSearch(self.graph, self.algo, self.start_id, self.end_id,
+                                               progress=self.reportProgress, stats=stats)
+        except SearchCancelled:
+            self.cancelled.emit()
+            return
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        self.resultReady.emit(result, (time.perf_counter() - start_time) * 1000, stats)
@@ -0,0 +1,136 @@
+import weakref
+
+# NumPy/SciPy 为可选依赖，在第一次调用 SparseBackend.available() 时才导入，
+# 不使用 scipy 后端的进程（如命令行批量查询）无需承担导入开销；未安装时使用纯 Python 实现
+np = None
+sparse = None
+csgraph = None
+
+
+class SparseBackend:
+    """基于 scipy.sparse.csgraph 的向量化搜索后端
+
+    CompiledGraph 的 CSR 数组直接作为 scipy.sparse.csr_matrix 的底层数据，
+    一对一、一对多最短路径和 BFS 层次查询交给 csgraph 的 C 实现完成。
+    """
+
+    # CompiledGraph -> csr_matrix，图被重新编译后旧矩阵随之释放
+    _matrices = weakref.WeakKeyDictionary()
+
+    # None 表示尚未尝试导入
+    _available = None
+
+    @staticmethod
+    def available():
+        global np, sparse, csgraph
+        if SparseBackend._available is None:
+            try:
+                import numpy as np
+                from scipy import sparse
+                from scipy.sparse import csgraph
+                SparseBackend._available = True
+            except ImportError:
+                SparseBackend._available = False
+        return SparseBackend._available
+
+    @staticmethod
+    def toMatrix(graph):
+        """把 CompiledGraph 转成 csr_matrix，平行弧只保留最小权重"""
+        matrix = SparseBackend._matrices.get(graph)
+        if matrix is not None:
+            return matrix
+        n = graph.nodeCount()
+        indptr = np.frombuffer(graph.offsets, dtype=np.int32)
+        cols = np.frombuffer(graph.targets, dtype=np.int32)
+        data = np.frombuffer(graph.weights, dtype=np.float64)
+        rows = np.repeat(np.arange(n, dtype=np.int32), np.diff(indptr))
+        # 按 (行, 列, 权重) 排序后每组 (行, 列) 的第一个即最小权重
+        order = np.lexsort((data, cols, rows))
+        rows, cols, data = rows[order], cols[order], data[order]
+        keep = np.ones(len(rows), dtype=bool)
+        keep[1:] = (rows[1:] != rows[:-1]) | (cols[1:] != cols[:-1])
+        rows, cols, data = rows[keep], cols[keep], data[keep]
+        indptr = np.zeros(n + 1, dtype=np.int32)
+        np.cumsum(np.bincount(rows, minlength=n), out=indptr[1:])
+        # 直接用 CSR 三元组构造，保留显式的零权重边（csgraph 将其视为边）
+        matrix = sparse.csr_matrix((data, cols, indptr), shape=(n, n))
+        SparseBackend._matrices[graph] = matrix
+        return matrix
+
+    @staticmethod
+    def runSearch(graph, algo, start_id, end_id):
+        """返回 (visited, path, cost)；算法没有向量化实现时返回 None，由调用方改用纯 Python 实现
+
+        只有 BFS 和 Dijkstra 交给 csgraph；A*、双向搜索和 CH 的扩展节点与 Dijkstra 不同，
+        用 Dijkstra 的结果代替会让统计和可视化标错算法，因此同样回退。
+        """
+        s = graph.index.get(start_id)
+        if s is None:
+            return [], [], 0
+        t = graph.index.get(end_id, -1)
+        matrix = SparseBackend.toMatrix(graph)
+        if algo == "BFS":
+            order, pred = csgraph.breadth_first_order(matrix, s, directed=True, return_predecessors=True)
+            visited = [graph.ids[u] for u in order.tolist()]
+            if t == -1 or (t != s and pred[t] < 0):
+                return visited, [], 0
+            route = SparseBackend.tracePath(pred, t)
+            cost = 0
+            for u, v in zip(route, route[1:]):
+                cost += matrix[u, v]
+            return visited, [graph.ids[u] for u in route], float(cost) if route[1:] else 0
+        if algo == "Dijkstra":
+            dist, pred = csgraph.dijkstra(matrix, directed=True, indices=s, return_predecessors=True)
+            reachable = np.isfinite(dist)
+            if t != -1 and reachable[t]:
+                # 与逐点 Dijkstra 一致：终点确定之前出堆的是距离不超过终点距离的节点
+                candidates = np.nonzero(dist <= dist[t])[0]
+            else:
+                candidates = np.nonzero(reachable)[0]
+            order = candidates[np.argsort(dist[candidates], kind="stable")]
+            visited = [graph.ids[u] for u in order.tolist()]
+            if t == -1 or not reachable[t]:
+                return visited, [], 0
+            route = SparseBackend.tracePath(pred, t)
+            return visited, [graph.ids[u] for u in route], float(dist[t]) if t != s else 0
+        return None
+
+    @staticmethod
+    def oneToMany(graph, start_id, end_ids):
+        """一次 csgraph.dijkstra 求出到多个终点的 (path, cost)，不可达为 ([], inf)"""
+        s = graph.index.get(start_id)
+        if s is None:
+            return [([], float("inf")) for _ in end_ids]
+        dist, pred = csgraph.dijkstra(SparseBackend.toMatrix(graph), directed=True, indices=s,
+                                      return_predecessors=True)
+        results = []
+        for end_id in end_ids:
+            t = graph.index.get(end_id)
+            if t is None or not np.isfinite(dist[t]):
+                results.append(([], float("inf")))
+            else:
+                route = SparseBackend.tracePath(pred, t)
+                results.append(([graph.ids[u] for u in route], float(dist[t])))
+        return results
+
+    @staticmethod
+    def bfsLevels(graph, start_id):
+        """返回 节点ID -> 从起点出发的最少边数，不可达的节点不出现在结果中"""
+        s = graph.index.get(start_id)
+        if s is None:
+            return {}
+        hops = csgraph.shortest_path(SparseBackend.toMatrix(graph), method="D", directed=True,
+                                     unweighted=True, indices=s)
+        reached = np.nonzero(np.isfinite(hops))[0]
+        return {graph.ids[u]: int(hops[u]) for u in reached.tolist()}
+
+    @staticmethod
+    def tracePath(pred, target):
+        """沿 csgraph 的前驱数组回溯（无前驱为负数）"""
+        route = []
+        current = int(target)
+        while current >= 0:
+            route.append(current)
+            current = int(pred[current])
+        route.reverse()
+        return route
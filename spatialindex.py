@@ -0,0 +1,117 @@
+import math
+
+
+class SpatialIndex:
+    """均匀网格空间索引
+
+    格子边长与画布网格一致，吸附到网格上的节点正好位于格子中心。
+    每个格子保存 (插入序号, 元素, x, y)，点选、最近邻和矩形查询只检查附近的格子，
+    多个元素同时满足条件时按插入顺序返回，与按列表顺序扫描的结果一致。
+    """
+
+    def __init__(self, cell_size=50):
+        self.cell_size = cell_size
+        self.cells = {}    # (列, 行) -> [(插入序号, 元素, x, y)]
+        self.count = 0
+        self.bounds = None  # 已占用格子的范围 (最小列, 最小行, 最大列, 最大行)
+
+    def cellOf(self, x, y):
+        size = self.cell_size
+        return math.floor(x / size + 0.5), math.floor(y / size + 0.5)
+
+    def clear(self):
+        self.cells = {}
+        self.count = 0
+        self.bounds = None
+
+    def insert(self, item, x, y):
+        key = self.cellOf(x, y)
+        self.cells.setdefault(key, []).append((self.count, item, x, y))
+        self.count += 1
+        cx, cy = key
+        if self.bounds is None:
+            self.bounds = (cx, cy, cx, cy)
+        else:
+            x0, y0, x1, y1 = self.bounds
+            self.bounds = (min(x0, cx), min(y0, cy), max(x1, cx), max(y1, cy))
+
+    def at(self, x, y):
+        """返回恰好位于 (x, y) 的第一个元素，没有则返回 None"""
+        for _, item, ix, iy in self.cells.get(self.cellOf(x, y), ()):
+            if ix == x and iy == y:
+                return item
+        return None
+
+    def hit(self, x, y, radius):
+        """返回与 (x, y) 距离不超过 radius 的第一个元素，没有则返回 None"""
+        best = None
+        r2 = radius * radius
+        for entry in self.candidates(x - radius, y - radius, x + radius, y + radius):
+            dx = entry[2] - x
+            dy = entry[3] - y
+            if dx * dx + dy * dy <= r2 and (best is None or entry[0] < best[0]):
+                best = entry
+        return best[1] if best is not None else None
+
+    def nearest(self, x, y, max_distance=math.inf):
+        """返回距离 (x, y) 最近的元素，超出 max_distance 或索引为空时返回 None
+
+        从所在格子起逐圈向外扩展：查完第 k 圈后，更外圈的元素距离都不小于 k 个格子边长。
+        """
+        if self.bounds is None:
+            return None
+        size = self.cell_size
+        cx, cy = self.cellOf(x, y)
+        x0, y0, x1, y1 = self.bounds
+        # 超过这一圈之后不再有被占用的格子
+        last_ring = max(cx - x0, x1 - cx, cy - y0, y1 - cy)
+        best = None
+        best_key = (max_distance, math.inf)
+        ring = 0
+        while ring <= last_ring:
+            for entry in self.ring(cx, cy, ring):
+                key = (math.hypot(entry[2] - x, entry[3] - y), entry[0])
+                if key <= best_key:
+                    best, best_key = entry, key
+            if best_key[0] <= ring * size:
+                break
+            ring += 1
+        return best[1] if best is not None else None
+
+    def ring(self, cx, cy, k):
+        """依次产生与格子 (cx, cy) 的切比雪夫距离恰好为 k 的格子中的条目"""
+        cells = self.cells
+        if k == 0:
+            yield from cells.get((cx, cy), ())
+            return
+        for i in range(cx - k, cx + k + 1):
+            yield from cells.get((i, cy - k), ())
+            yield from cells.get((i, cy + k), ())
+        for j in range(cy - k + 1, cy + k):
+            yield from cells.get((cx - k, j), ())
+            yield from cells.get((cx + k, j), ())
+
+    def inRect(self, left, top, right, bottom):
+        """按插入顺序返回落在矩形内（含边界）的全部元素"""
+        if left > right:
+            left, right = right, left
+        if top > bottom:
+            top, bottom = bottom, top
+        found = [entry for entry in self.candidates(left, top, right, bottom)
+                 if left <= entry[2] <= right and top <= entry[3] <= bottom]
+        found.sort(key=lambda entry: entry[0])
+        return [entry[1] for entry in found]
+
+    def candidates(self, left, top, right, bottom):
+        """产生矩形覆盖的格子中的全部条目；矩形覆盖的格子比已占用格子多时直接遍历已占用格子"""
+        c0, r0 = self.cellOf(left, top)
+        c1, r1 = self.cellOf(right, bottom)
+        cells = self.cells
+        if (c1 - c0 + 1) * (r1 - r0 + 1) > len(cells):
+            for (cx, cy), entries in cells.items():
+                if c0 <= cx <= c1 and r0 <= cy <= r1:
+                    yield from entries
+            return
+        for cx in range(c0, c1 + 1):
+            for cy in range(r0, r1 + 1):
+                yield from cells.get((cx, cy), ())
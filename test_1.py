@@ -1,6 +1,30 @@
 import unittest
+import asyncio
+import contextlib
+import io
+import json
 import math
-from algorithms import GraphAlgorithms
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import benchmark
+import cli
+from batchrunner import BatchRunner
+from algorithms import GraphAlgorithms, SearchCancelled
+from compiledgraph import CompiledGraph
+from graphstore import BitSet, GraphStore
+from heuristics import Heuristics
+from hierarchy import ContractionHierarchy
+from playback import SearchPlayback
+from pqueues import IndexedDaryHeap, PriorityQueues
+from querycache import QueryCache
+from queryserver import QueryClient, QueryError, QueryServer
+from readwrite import GraphIO
+from searchstats import SearchStats
+from spatialindex import SpatialIndex
+from sparsebackend import SparseBackend
 
 
 class TestAStarAlgorithm(unittest.TestCase):
@@ -104,5 +128,913 @@ class TestAStarAlgorithm(unittest.TestCase):
         self.assertEqual(cost, 2)
 
 
+class TestCompiledGraph(unittest.TestCase):
+    def setUp(self):
+        self.graph_data = {
+            "nodes": [
+                {"id": "A", "x": 0, "y": 0},
+                {"id": "B", "x": 1, "y": 0},
+                {"id": "C", "x": 2, "y": 0}
+            ],
+            "edges": [
+                {"start": "A", "end": "B", "weight": 1, "directed": False},
+                {"start": "B", "end": "C", "weight": 2, "directed": True}
+            ]
+        }
+
+    def test_csr_layout(self):
+        """测试无向边展开为双向弧，有向边只保留一个方向"""
+        graph = CompiledGraph.fromGraphData(self.graph_data)
+        self.assertEqual(list(graph.offsets), [0, 1, 3, 3])
+        self.assertEqual(list(graph.neighbors(graph.index["B"])), [(0, 1.0), (2, 2.0)])
+        self.assertEqual(list(graph.neighbors(graph.index["C"])), [])
+
+    def test_recompile_on_change(self):
+        """测试 GraphStore 未变化时复用编译结果，追加和原地修改边权、坐标后按版本号重新编译；字典的原地修改同样生效"""
+        store = GraphStore.fromGraphData(self.graph_data)
+        first = GraphAlgorithms.compile(store)
+        self.assertIs(GraphAlgorithms.compile(store), first)
+        revision = store.revision
+        store["edges"].append({"start": "C", "end": "A", "weight": 1, "directed": True})
+        self.assertGreater(store.revision, revision)
+        self.assertIsNot(GraphAlgorithms.compile(store), first)
+        visited, path, cost = GraphAlgorithms.dijkstra(store, "C", "B")
+        self.assertEqual(path, ["C", "A", "B"])
+        self.assertEqual(cost, 2)
+        store["edges"][2]["weight"] = 5
+        self.assertEqual(GraphAlgorithms.dijkstra(store, "C", "B")[2], 6)
+        store["nodes"][2]["x"] = 7
+        self.assertEqual(GraphAlgorithms.compile(store).xs[2], 7)
+
+        self.assertEqual(GraphAlgorithms.dijkstra(self.graph_data, "A", "B")[2], 1)
+        self.graph_data["edges"][0]["weight"] = 3
+        self.assertEqual(GraphAlgorithms.dijkstra(self.graph_data, "A", "B")[2], 3)
+
+
+class TestHeuristics(unittest.TestCase):
+    def test_calibrated_heuristics_are_admissible(self):
+        """测试边权为像素距离 / 50 时，各启发式标定后的 A* 与 BiA* 仍求得与 Dijkstra 相同的最短距离"""
+        rng = random.Random(5)
+        n = 300
+        nodes = [{"id": str(i), "x": rng.randint(0, 800), "y": rng.randint(0, 600)} for i in range(n)]
+        edges = []
+        for _ in range(3 * n):
+            a, b = rng.randrange(n), rng.randrange(n)
+            length = math.hypot(nodes[a]["x"] - nodes[b]["x"], nodes[a]["y"] - nodes[b]["y"])
+            edges.append({"start": str(a), "end": str(b), "weight": round(length / 50, 2), "directed": False})
+        graph_data = {"nodes": nodes, "edges": edges}
+
+        def chebyshev(graph, u, v):
+            return max(abs(graph.xs[u] - graph.xs[v]), abs(graph.ys[u] - graph.ys[v]))
+
+        graph = GraphAlgorithms.compile(graph_data)
+        self.assertLessEqual(Heuristics.scale(graph, "euclidean"), 0.02)
+        for _ in range(20):
+            s, t = str(rng.randrange(n)), str(rng.randrange(n))
+            _, _, expected = GraphAlgorithms.dijkstra(graph_data, s, t)
+            for heuristic in Heuristics.KINDS + (chebyshev,):
+                _, _, cost = GraphAlgorithms.a_star(graph_data, s, t, heuristic=heuristic)
+                self.assertAlmostEqual(cost, expected)
+                _, _, cost = GraphAlgorithms.bidirectional_a_star(graph_data, s, t, heuristic=heuristic)
+                self.assertAlmostEqual(cost, expected)
+        with self.assertRaises(ValueError):
+            GraphAlgorithms.a_star(graph_data, "0", "1", heuristic="foo")
+
+
+class TestPriorityQueues(unittest.TestCase):
+    def test_queues_pop_in_key_order(self):
+        """测试各优先队列按键值从小到大出队，d 叉堆对同一节点只保留最小键值"""
+        rng = random.Random(9)
+        keys = [rng.randrange(1000) for _ in range(500)]
+        for kind in PriorityQueues.KINDS:
+            push, pop, queue = PriorityQueues.create(kind, CompiledGraph.fromGraphData({"nodes": [], "edges": []}))
+            if kind == "dary":
+                queue = IndexedDaryHeap(len(keys), d=3)
+            for v, key in enumerate(keys):
+                push(queue, (key, v))
+            if kind == "dary":
+                push(queue, (keys[0] + 1, 0))  # 更大的键值被忽略
+                push(queue, (-1, 1))
+            popped = []
+            while queue:
+                popped.append(pop(queue))
+            self.assertEqual([key for key, _ in popped], sorted(key for key, _ in popped), kind)
+            self.assertEqual(len(popped), len(keys), kind)
+
+    def test_searches_match_binary_heap(self):
+        """测试 Dijkstra 和 A* 使用各优先队列时最短距离相同，整数队列拒绝非整数边权"""
+        rng = random.Random(4)
+        n = 200
+        nodes = [{"id": str(i), "x": rng.randint(0, 500), "y": rng.randint(0, 500)} for i in range(n)]
+        edges = []
+        for _ in range(3 * n):
+            a, b = rng.randrange(n), rng.randrange(n)
+            length = math.hypot(nodes[a]["x"] - nodes[b]["x"], nodes[a]["y"] - nodes[b]["y"])
+            edges.append({"start": str(a), "end": str(b), "weight": max(1, round(length)),
+                          "directed": rng.random() < 0.3})
+        graph_data = {"nodes": nodes, "edges": edges}
+        for _ in range(10):
+            s, t = str(rng.randrange(n)), str(rng.randrange(n))
+            _, path, expected = GraphAlgorithms.dijkstra(graph_data, s, t)
+            for queue in PriorityQueues.KINDS:
+                for algo in ("Dijkstra", "A*"):
+                    _, found, cost = GraphAlgorithms.runSearch(graph_data, algo, s, t, queue=queue)
+                    self.assertEqual(bool(found), bool(path), (algo, queue))
+                    if path:
+                        self.assertAlmostEqual(cost, expected)
+
+        graph_data["edges"][0]["weight"] = 1.5
+        with self.assertRaises(ValueError):
+            GraphAlgorithms.dijkstra(graph_data, "0", "1", queue="dial")
+
+
+class TestDfsBranchAndBound(unittest.TestCase):
+    def setUp(self):
+        # 3x3 网格，边权均为 1
+        nodes = []
+        edges = []
+        for r in range(3):
+            for c in range(3):
+                nid = str(r * 3 + c)
+                nodes.append({"id": nid, "x": c, "y": r})
+                if c < 2:
+                    edges.append({"start": nid, "end": str(r * 3 + c + 1), "weight": 1, "directed": False})
+                if r < 2:
+                    edges.append({"start": nid, "end": str(r * 3 + c + 3), "weight": 1, "directed": False})
+        self.graph_data = {"nodes": nodes, "edges": edges}
+
+    def test_same_cost_as_exhaustive(self):
+        """测试剪枝后得到的最小权重与枚举全部简单路径一致"""
+        _, path, cost = GraphAlgorithms.dfs(self.graph_data, "0", "8")
+        _, _, full_cost = GraphAlgorithms.dfs(self.graph_data, "0", "8", prune=False)
+        self.assertEqual(cost, 4)
+        self.assertEqual(full_cost, 4)
+        self.assertEqual(len(path), 5)
+
+    def test_expansion_limit(self):
+        """测试扩展次数上限"""
+        visited, path, cost = GraphAlgorithms.dfs(self.graph_data, "0", "8", prune=False, max_expansions=3)
+        self.assertEqual(len(visited), 3)
+        self.assertEqual(path, [])
+
+
+class TestSearchProgress(unittest.TestCase):
+    def setUp(self):
+        # 一条 3000 个节点的链
+        nodes = [{"id": str(i), "x": i, "y": 0} for i in range(3000)]
+        edges = [{"start": str(i), "end": str(i + 1), "weight": 1, "directed": False} for i in range(2999)]
+        self.graph_data = {"nodes": nodes, "edges": edges}
+
+    def test_progress_reported(self):
+        """测试进度回调按固定间隔收到已确定的节点数，且不改变搜索结果"""
+        counts = []
+        result = GraphAlgorithms.runSearch(self.graph_data, "Dijkstra", "0", "2999", progress=counts.append)
+        self.assertEqual(counts, [1024, 2048])
+        self.assertEqual(result, GraphAlgorithms.dijkstra(self.graph_data, "0", "2999"))
+
+    def test_cancel(self):
+        """测试回调抛出 SearchCancelled 后各算法立即中止"""
+        def cancel(count):
+            raise SearchCancelled()
+        for algo in ("DFS", "BFS", "A*", "Dijkstra", "BiDijkstra", "BiA*", "CH"):
+            with self.assertRaises(SearchCancelled):
+                GraphAlgorithms.runSearch(self.graph_data, algo, "0", "2999", progress=cancel)
+
+
+class TestSearchStats(unittest.TestCase):
+    def setUp(self):
+        with open(os.path.join(os.path.dirname(__file__), "testgraph.json"), "r", encoding="utf-8") as f:
+            self.graph_data = json.load(f)
+
+    def test_counters_consistent(self):
+        """测试开启统计不改变搜索结果，各计数之间的关系成立"""
+        for algo in GraphAlgorithms.ALGORITHMS:
+            stats = SearchStats()
+            result = GraphAlgorithms.runSearch(self.graph_data, algo, "1", "20", stats=stats)
+            self.assertEqual(result, GraphAlgorithms.runSearch(self.graph_data, algo, "1", "20"), algo)
+            self.assertGreater(stats.settled, 0, algo)
+            self.assertEqual(stats.stale_pops, stats.pops - stats.settled, algo)
+            self.assertGreaterEqual(stats.stale_pops, 0, algo)
+            self.assertLessEqual(stats.pops, stats.pushes, algo)
+            self.assertGreaterEqual(stats.edge_scans, stats.relaxations, algo)
+            self.assertIn("search", stats.phases, algo)
+
+    def test_dijkstra_counts(self):
+        """测试 Dijkstra 在链上的精确计数，A* 每次松弛计算一次启发式"""
+        graph_data = {
+            "nodes": [{"id": str(i), "x": i, "y": 0} for i in range(4)],
+            "edges": [{"start": str(i), "end": str(i + 1), "weight": 1, "directed": False} for i in range(3)],
+        }
+        stats = SearchStats()
+        GraphAlgorithms.dijkstra(graph_data, "0", "3", stats=stats)
+        self.assertEqual((stats.settled, stats.pushes, stats.pops, stats.relaxations, stats.edge_scans),
+                         (4, 4, 4, 3, 5))
+        self.assertEqual(set(stats.phases), {"setup", "search", "path"})
+        stats = SearchStats()
+        GraphAlgorithms.a_star(graph_data, "0", "3", stats=stats)
+        self.assertEqual(stats.heuristic_evals, stats.relaxations)
+
+    def test_cli_stats(self):
+        """测试命令行批量查询（包括多进程模式）、BatchRunner 和查询服务按需输出统计"""
+        graph = GraphAlgorithms.compile(self.graph_data)
+        out = io.StringIO()
+        cli.runQueries(graph, ["1 20"], out, stats=True)
+        result = json.loads(out.getvalue())
+        self.assertEqual(result["stats"]["settled"], result["expanded"])
+        out = io.StringIO()
+        cli.runQueries(graph, ["1 20"], out)
+        self.assertNotIn("stats", json.loads(out.getvalue()))
+
+        store = GraphStore.fromGraphData(self.graph_data)
+        out = io.StringIO()
+        cli.runQueriesParallel(store, ["1 20", "A* 1 20"], out, jobs=2, stats=True)
+        results = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(results[0]["stats"]["settled"], result["stats"]["settled"])
+        self.assertEqual(results[1]["stats"]["settled"], results[1]["expanded"])
+        with BatchRunner(store, workers=2) as runner:
+            (visited, path, cost, stats), = runner.run([("BFS", "1", "20")], stats=True)
+            self.assertEqual(stats.settled, len(visited))
+            self.assertEqual(len(runner.run([("BFS", "1", "20")])[0]), 3)
+
+        async def scenario():
+            server = QueryServer()
+            server.addGraph("test", store)
+            try:
+                result, _ = await server.search("test", "Dijkstra", "1", "20", stats=True)
+                self.assertEqual(result["stats"]["settled"], result["expanded"])
+                result, source = await server.search("test", "Dijkstra", "1", "20")
+                self.assertEqual(source, "computed")
+                self.assertNotIn("stats", result)
+            finally:
+                await server.close()
+
+        asyncio.run(scenario())
+
+
+class TestBidirectionalSearch(unittest.TestCase):
+    def test_directed_graph(self):
+        """测试双向搜索在有向图中沿反向弧搜索，且结果与 Dijkstra 一致"""
+        graph_data = {
+            "nodes": [
+                {"id": "A", "x": 0, "y": 0},
+                {"id": "B", "x": 1, "y": 0},
+                {"id": "C", "x": 2, "y": 0},
+                {"id": "D", "x": 1, "y": 1}
+            ],
+            "edges": [
+                {"start": "A", "end": "B", "weight": 1, "directed": True},
+                {"start": "B", "end": "C", "weight": 1, "directed": True},
+                {"start": "C", "end": "A", "weight": 1, "directed": True},
+                {"start": "A", "end": "D", "weight": 2, "directed": True},
+                {"start": "D", "end": "C", "weight": 2, "directed": True}
+            ]
+        }
+        for algo in ("BiDijkstra", "BiA*"):
+            visited, path, cost = GraphAlgorithms.runSearch(graph_data, algo, "A", "C")
+            self.assertEqual(path, ["A", "B", "C"])
+            self.assertEqual(cost, 2)
+            visited, path, cost = GraphAlgorithms.runSearch(graph_data, algo, "C", "B")
+            self.assertEqual(path, ["C", "A", "B"])
+            self.assertEqual(cost, 2)
+            visited, path, cost = GraphAlgorithms.runSearch(graph_data, algo, "B", "D")
+            self.assertEqual(path, ["B", "C", "A", "D"])
+            self.assertEqual(cost, 4)
+
+    def test_heuristic_only_for_touched_nodes(self):
+        """测试 BiA* 只为搜索触及的节点计算势函数，近距离查询的开销与图规模无关"""
+        store = benchmark.GraphGenerators.grid(10000, seed=1)
+        n = store.nodeCount()
+        s, t = store.ids[n // 2], store.ids[n // 2 + 2]
+        stats = SearchStats()
+        visited, path, cost = GraphAlgorithms.runSearch(store, "BiA*", s, t, stats=stats)
+        self.assertAlmostEqual(cost, GraphAlgorithms.dijkstra(store, s, t)[2])
+        self.assertLess(stats.heuristic_evals, 100)
+        self.assertGreaterEqual(stats.settled, len(visited))
+
+
+class TestMultiSourceSearch(unittest.TestCase):
+    def test_k_nearest_targets(self):
+        """测试多起点多终点搜索与逐对 Dijkstra 的结果一致，并报告每条路径对应的起点和终点"""
+        graph_data = GraphIO.loadGraph(os.path.join(os.path.dirname(__file__), "testgraph.json"))
+        sources, targets = ["1", "30", "missing"], ["20", "9", "5", "12", "missing"]
+        expected = {}
+        for t in targets[:-1]:
+            costs = [(GraphAlgorithms.dijkstra(graph_data, s, t)[2], s) for s in sources[:-1]
+                     if GraphAlgorithms.dijkstra(graph_data, s, t)[1]]
+            if costs:
+                expected[t] = min(costs)
+        visited, matches = GraphAlgorithms.multi_dijkstra(graph_data, sources, targets, k=3)
+        self.assertEqual(len(matches), min(3, len(expected)))
+        self.assertEqual([cost for _, _, _, cost in matches], sorted(cost for _, _, _, cost in matches))
+        for source_id, target_id, path, cost in matches:
+            self.assertEqual((path[0], path[-1]), (source_id, target_id))
+            self.assertAlmostEqual(cost, expected[target_id][0])
+        best = min(expected.values())[0]
+        _, path, cost = GraphAlgorithms.runSearch(graph_data, "Dijkstra", tuple(sources), tuple(targets))
+        self.assertAlmostEqual(cost, best)
+        self.assertIn(path[0], sources)
+
+        stats = SearchStats()
+        _, matches = GraphAlgorithms.multi_dijkstra(graph_data, ["1", "30"], ["30"], stats=stats)
+        self.assertEqual(matches, [("30", "30", ["30"], 0)])
+        self.assertEqual(stats.stale_pops + stats.settled, stats.pops)
+        with self.assertRaises(ValueError):
+            GraphAlgorithms.runSearch(graph_data, "BFS", ["1", "30"], "9")
+
+
+class TestShortestPathTree(unittest.TestCase):
+    def test_one_to_all(self):
+        """测试一次构建最短路径树后可查询任意终点"""
+        graph_data = {
+            "nodes": [
+                {"id": "A", "x": 0, "y": 0},
+                {"id": "B", "x": 1, "y": 0},
+                {"id": "C", "x": 2, "y": 0},
+                {"id": "D", "x": 3, "y": 0},
+                {"id": "E", "x": 4, "y": 0}
+            ],
+            "edges": [
+                {"start": "A", "end": "B", "weight": 1, "directed": False},
+                {"start": "B", "end": "C", "weight": 2, "directed": False},
+                {"start": "A", "end": "C", "weight": 4, "directed": False},
+                {"start": "C", "end": "D", "weight": 1, "directed": False}
+            ]
+        }
+        tree = GraphAlgorithms.shortestPathTree(graph_data, "A")
+        self.assertEqual(tree.pathTo("D"), ["A", "B", "C", "D"])
+        self.assertEqual(tree.distanceTo("D"), 4)
+        self.assertEqual(tree.pathTo("E"), [])
+        self.assertEqual(tree.distanceTo("E"), math.inf)
+        for end in ("A", "B", "C", "D", "E"):
+            self.assertEqual(tree.search(end), GraphAlgorithms.dijkstra(graph_data, "A", end))
+
+    def test_incremental_repair(self):
+        """测试追加节点和边后增量修复的结果与重新计算一致，删除边时要求重建"""
+        graph_data = {
+            "nodes": [
+                {"id": "A", "x": 0, "y": 0},
+                {"id": "B", "x": 1, "y": 0},
+                {"id": "C", "x": 2, "y": 0}
+            ],
+            "edges": [
+                {"start": "A", "end": "B", "weight": 5, "directed": False},
+                {"start": "B", "end": "C", "weight": 5, "directed": False}
+            ]
+        }
+        tree = GraphAlgorithms.dynamicShortestPathTree(graph_data, "A")
+        graph_data["nodes"].append({"id": "D", "x": 1, "y": 1})
+        graph_data["edges"].append({"start": "A", "end": "D", "weight": 1, "directed": True})
+        graph_data["edges"].append({"start": "D", "end": "B", "weight": 1, "directed": False})
+        self.assertTrue(tree.sync(graph_data))
+        self.assertEqual(tree.pathTo("C"), ["A", "D", "B", "C"])
+        self.assertEqual(tree.distanceTo("C"), GraphAlgorithms.dijkstra(graph_data, "A", "C")[2])
+        self.assertEqual(tree.decreaseWeight("B", "C", 1), 1)
+        self.assertEqual(tree.distanceTo("C"), 3)
+        graph_data["edges"].pop()
+        self.assertFalse(tree.sync(graph_data))
+
+
+class TestSparseBackend(unittest.TestCase):
+    def setUp(self):
+        self.graph_data = GraphIO.loadGraph(os.path.join(os.path.dirname(__file__), "testgraph.json"))
+
+    def test_fallback_for_unsupported_algorithm(self):
+        """测试没有向量化实现的算法（或未安装 SciPy）时回退到纯 Python 实现，不用 Dijkstra 的结果代替"""
+        for algo in ("DFS", "A*", "BiDijkstra", "BiA*", "CH"):
+            stats = SearchStats()
+            self.assertEqual(GraphAlgorithms.runSearch(self.graph_data, algo, "1", "9", backend="scipy", stats=stats),
+                             GraphAlgorithms.runSearch(self.graph_data, algo, "1", "9"), algo)
+            self.assertNotIn("scipy", stats.phases, algo)
+
+    @unittest.skipUnless(SparseBackend.available(), "需要 NumPy/SciPy")
+    def test_same_result_as_python(self):
+        """测试 scipy 后端与纯 Python 实现的结果一致"""
+        for algo in ("Dijkstra", "BFS"):
+            visited, path, cost = GraphAlgorithms.runSearch(self.graph_data, algo, "1", "9", backend="scipy")
+            expected = GraphAlgorithms.runSearch(self.graph_data, algo, "1", "9")
+            self.assertEqual(sorted(visited), sorted(expected[0]))
+            self.assertEqual(len(path), len(expected[1]))
+            self.assertAlmostEqual(cost, expected[2])
+        ends = ["2", "9", "30"]
+        self.assertEqual(GraphAlgorithms.oneToMany(self.graph_data, "1", ends, backend="scipy"),
+                         GraphAlgorithms.oneToMany(self.graph_data, "1", ends))
+        self.assertEqual(GraphAlgorithms.bfsLevels(self.graph_data, "1", backend="scipy"),
+                         GraphAlgorithms.bfsLevels(self.graph_data, "1"))
+
+
+class TestCsvStore(unittest.TestCase):
+    def test_stream_csv(self):
+        """测试流式 CSV 读取：小数权重、边先于节点出现、端点不存在的边被丢弃"""
+        rows = [
+            "type,id,x,y,start,end,weight,directed",
+            "edge,,,,A,B,1.5,False",
+            "node,A,0,0,,,,",
+            "node,B,50,0,,,,",
+            "edge,,,,B,Z,1,True",
+            "edge,,,,B,A,0.25,True",
+        ]
+        with tempfile.TemporaryDirectory() as tmp:
+            fname = os.path.join(tmp, "graph.csv")
+            with open(fname, "w", encoding="utf-8") as f:
+                f.write("\n".join(rows) + "\n")
+            progress = []
+            store = GraphIO.loadCsvStore(fname, chunk_size=2, progress=lambda *args: progress.append(args))
+            self.assertEqual(GraphIO.loadCsv(fname)["edges"][0]["weight"], 1.5)
+        self.assertEqual([p[0] for p in progress], [2, 4, 5])
+        self.assertEqual(store.ids, ["A", "B"])
+        self.assertEqual(store.toGraphData()["edges"], [
+            {"start": "A", "end": "B", "weight": 1.5, "directed": False},
+            {"start": "B", "end": "A", "weight": 0.25, "directed": True},
+        ])
+        self.assertEqual(GraphAlgorithms.dijkstra(store, "B", "A")[1:], (["B", "A"], 0.25))
+
+    def test_blank_lines(self):
+        """测试 CSV 中的空行和末尾空行被跳过，与 DictReader 的行为一致"""
+        text = "type,id,x,y,start,end,weight,directed\nnode,A,0,0,,,,\n\nnode,B,50,0,,,,\nedge,,,,A,B,2,False\n\n"
+        with tempfile.TemporaryDirectory() as tmp:
+            fname = os.path.join(tmp, "graph.csv")
+            with open(fname, "w", encoding="utf-8") as f:
+                f.write(text)
+            store = GraphIO.loadGraph(fname)
+            self.assertEqual(store.toGraphData(), GraphIO.loadCsv(fname))
+
+
+class TestGraphStoreViews(unittest.TestCase):
+    def test_views_match_dict(self):
+        """测试节点、边视图与直接读取 JSON 得到的字典一致，通过视图追加后搜索和增量修复都能看到新元素"""
+        fname = os.path.join(os.path.dirname(__file__), "testgraph.json")
+        with open(fname, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+        store = GraphIO.loadGraph(fname)
+        self.assertIsInstance(store, GraphStore)
+        self.assertEqual(store["nodes"], raw["nodes"])
+        self.assertEqual(store["edges"], raw["edges"])
+        self.assertEqual(store["nodes"][-1]["id"], raw["nodes"][-1]["id"])
+        tree = GraphAlgorithms.dynamicShortestPathTree(store, "1")
+        store["nodes"].append({"id": "new", "x": 0, "y": 0})
+        store["edges"].append({"start": "1", "end": "new", "weight": 0.5, "directed": True})
+        self.assertEqual(GraphAlgorithms.dijkstra(store, "1", "new")[1:], (["1", "new"], 0.5))
+        self.assertTrue(tree.sync(store))
+        self.assertEqual(tree.pathTo("new"), ["1", "new"])
+        store["edges"][-1]["weight"] = 0.25
+        self.assertEqual(GraphAlgorithms.dijkstra(store, "1", "new")[2], 0.25)
+
+    def test_bitset_and_mapped_store(self):
+        """测试按位保存的 directed 列，以及映射自二进制文件的图在第一次编辑时复制为数组"""
+        values = [i % 3 == 0 for i in range(21)]
+        bits = BitSet(values)
+        self.assertEqual(list(bits), [int(v) for v in values])
+        self.assertEqual(len(bits.bits), 3)
+        bits[1] = 1
+        self.assertEqual((bits[1], bits[-1]), (1, 0))
+        graph_data = GraphIO.loadGraph(os.path.join(os.path.dirname(__file__), "testgraph.json"))
+        with tempfile.TemporaryDirectory() as tmp:
+            fname = os.path.join(tmp, "graph.graphbin")
+            GraphIO.saveGraph(fname, graph_data)
+            store = GraphIO.loadGraph(fname)
+            self.assertTrue(store.mapped)
+            store["edges"].append({"start": "1", "end": "9", "weight": 0.1, "directed": True})
+            self.assertFalse(store.mapped)
+            self.assertEqual(GraphAlgorithms.dijkstra(store, "1", "9")[1:], (["1", "9"], 0.1))
+            self.assertEqual(GraphIO.loadGraph(fname).edgeCount(), graph_data.edgeCount())
+            del store
+
+    def test_coordinates_round_trip(self):
+        """测试非整数和超出 float32 精度的坐标在读取、保存后保持不变"""
+        graph_data = {
+            "nodes": [{"id": "a", "x": 0.1, "y": 123456789}, {"id": "b", "x": -2.5e-7, "y": 16777217},
+                      {"id": "c", "x": 3, "y": 1.0000001}],
+            "edges": [{"start": "a", "end": "b", "weight": 0.3, "directed": False}],
+        }
+        with tempfile.TemporaryDirectory() as tmp:
+            for ext in (".json", ".csv", ".graphbin"):
+                fname = os.path.join(tmp, "graph" + ext)
+                GraphIO.saveGraph(fname, graph_data)
+                store = GraphIO.loadGraph(fname)
+                self.assertEqual(store.toGraphData()["nodes"], graph_data["nodes"], ext)
+                GraphIO.saveGraph(fname, store)
+                del store
+                self.assertEqual(GraphIO.loadGraph(fname).toGraphData()["nodes"], graph_data["nodes"], ext)
+
+    def test_dangling_edge_after_load(self):
+        """测试读取完成后追加端点不存在的边被拒绝，图和搜索结果保持不变"""
+        store = GraphIO.loadGraph(os.path.join(os.path.dirname(__file__), "testgraph.json"))
+        expected = GraphAlgorithms.dijkstra(store, "1", "31")
+        edge_count = store.edgeCount()
+        with self.assertRaises(KeyError):
+            store["edges"].append({"start": "1", "end": "nope", "weight": 0.01, "directed": False})
+        self.assertEqual(store.edgeCount(), edge_count)
+        self.assertEqual(len(store.edge_start), edge_count)
+        self.assertEqual(GraphAlgorithms.dijkstra(store, "1", "31"), expected)
+        self.assertEqual(GraphAlgorithms.dijkstra(store, "1", "nope")[1:], ([], 0))
+        # 批量读取时仍允许先出现边、后出现节点
+        loading = GraphStore(loading=True)
+        loading.addEdge("A", "B", 1.0, False)
+        loading.addNode("A", 0, 0)
+        loading.addNode("B", 1, 0)
+        self.assertEqual(GraphAlgorithms.dijkstra(loading.finish(), "A", "B")[1:], (["A", "B"], 1.0))
+
+
+class TestJsonStream(unittest.TestCase):
+    def test_stream_round_trip(self):
+        """测试流式 JSON：写出的文件与原格式兼容，任意分块大小读取结果相同"""
+        graph_data = GraphIO.loadGraph(os.path.join(os.path.dirname(__file__), "testgraph.json"))
+        with tempfile.TemporaryDirectory() as tmp:
+            fname = os.path.join(tmp, "graph.json")
+            GraphIO.saveGraph(fname, graph_data)
+            self.assertEqual(GraphIO.loadGraph(fname).toGraphData(), graph_data.toGraphData())
+            expected = GraphIO.loadJsonStore(fname).toGraphData()
+            for chunk_size in (1, 7, 64):
+                self.assertEqual(GraphIO.loadJsonStore(fname, chunk_size=chunk_size).toGraphData(), expected)
+
+    def test_stream_layout(self):
+        """测试流式 JSON 读取：忽略其他字段、边先于节点出现、数字跨块截断"""
+        text = ('{"meta": {"v": [1, {"a": 2}]}, "edges": [{"start": "A", "end": "B", "weight": 1.5e1}],'
+                ' "nodes": [{"id": "A", "x": 0, "y": 0}, {"id": "B", "x": 2.5, "y": 0}]}')
+        with tempfile.TemporaryDirectory() as tmp:
+            fname = os.path.join(tmp, "graph.json")
+            with open(fname, "w", encoding="utf-8") as f:
+                f.write(text)
+            for chunk_size in range(1, 12):
+                store = GraphIO.loadJsonStore(fname, chunk_size=chunk_size)
+                self.assertEqual(store.toGraphData(), {
+                    "nodes": [{"id": "A", "x": 0, "y": 0}, {"id": "B", "x": 2.5, "y": 0}],
+                    "edges": [{"start": "A", "end": "B", "weight": 15.0, "directed": False}],
+                })
+
+
+class TestBinaryFormat(unittest.TestCase):
+    def test_round_trip(self):
+        """测试 .graphbin 读写一致，且读取后的 CSR 数组直接映射文件内容"""
+        graph_data = GraphIO.loadGraph(os.path.join(os.path.dirname(__file__), "testgraph.json"))
+        with tempfile.TemporaryDirectory() as tmp:
+            fname = os.path.join(tmp, "graph.graphbin")
+            GraphIO.saveGraph(fname, graph_data)
+            self.assertEqual(GraphIO.loadGraph(fname).toGraphData(), graph_data.toGraphData())
+            store = GraphIO.loadBinary(fname)
+            graph = GraphAlgorithms.compile(store)
+            self.assertIsInstance(graph.targets, memoryview)
+            self.assertEqual(graph.fingerprint(), CompiledGraph.fromGraphData(graph_data).fingerprint())
+            self.assertEqual(GraphAlgorithms.dijkstra(store, "1", "9"), GraphAlgorithms.dijkstra(graph_data, "1", "9"))
+            del graph, store
+
+    def test_save_over_mapped_file(self):
+        """测试把读取的 .graphbin 保存回原文件：先关闭文件映射（Windows 不能替换被映射的文件），数据仍然一致"""
+        graph_data = GraphIO.loadGraph(os.path.join(os.path.dirname(__file__), "testgraph.json"))
+        with tempfile.TemporaryDirectory() as tmp:
+            fname = os.path.join(tmp, "graph.graphbin")
+            GraphIO.saveGraph(fname, graph_data)
+            other = GraphIO.loadGraph(fname)
+            GraphIO.saveGraph(os.path.join(tmp, "copy.graphbin"), other)
+            self.assertIsNotNone(other.mapping)  # 保存到其他文件时不需要关闭映射
+            del other
+            os.unlink(os.path.join(tmp, "copy.graphbin"))
+
+            store = GraphIO.loadGraph(fname)
+            expected = GraphAlgorithms.dijkstra(store, "1", "9")
+            _, mapping = store.mapping
+            GraphIO.saveGraph(fname, store)
+            self.assertTrue(mapping.closed)
+            self.assertIsNone(store.mapping)
+            self.assertNotIsInstance(GraphAlgorithms.compile(store).targets, memoryview)
+            self.assertEqual(GraphAlgorithms.dijkstra(store, "1", "9"), expected)
+            self.assertEqual(store.toGraphData(), graph_data.toGraphData())
+            self.assertEqual(GraphIO.loadGraph(fname).toGraphData(), graph_data.toGraphData())
+            self.assertEqual(os.listdir(tmp), ["graph.graphbin"])
+            del store
+
+    def test_integer_ids(self):
+        """测试整数节点ID保存为 .graphbin 后类型不变，仍能按原ID查询"""
+        graph_data = {
+            "nodes": [{"id": 1, "x": 0, "y": 0}, {"id": 2, "x": 100, "y": 0}, {"id": "c", "x": 50, "y": 50}],
+            "edges": [{"start": 1, "end": "c", "weight": 1, "directed": False},
+                      {"start": "c", "end": 2, "weight": 1, "directed": True}],
+        }
+        with tempfile.TemporaryDirectory() as tmp:
+            fname = os.path.join(tmp, "graph.graphbin")
+            GraphIO.saveGraph(fname, graph_data)
+            store = GraphIO.loadGraph(fname)
+            self.assertEqual(store.toGraphData(), GraphStore.fromGraphData(graph_data).toGraphData())
+            self.assertEqual(GraphAlgorithms.runSearch(store, "Dijkstra", 1, 2)[1:], ([1, "c", 2], 2))
+            del store
+
+
+class TestSpatialIndex(unittest.TestCase):
+    def test_matches_linear_scan(self):
+        """测试点选、最近邻和矩形查询与逐个扫描的结果一致"""
+        rng = random.Random(7)
+        points = [(rng.randint(0, 1000), rng.randint(0, 1000)) for _ in range(300)]
+        points += [(50 * rng.randint(0, 20), 50 * rng.randint(0, 20)) for _ in range(100)]
+        index = SpatialIndex(50)
+        for i, (x, y) in enumerate(points):
+            index.insert(i, x, y)
+        for _ in range(200):
+            x, y = rng.uniform(-100, 1100), rng.uniform(-100, 1100)
+            within = [i for i, (px, py) in enumerate(points) if (px - x) ** 2 + (py - y) ** 2 <= 100]
+            self.assertEqual(index.hit(x, y, 10), within[0] if within else None)
+            nearest = min(range(len(points)), key=lambda i: (math.hypot(points[i][0] - x, points[i][1] - y), i))
+            self.assertEqual(index.nearest(x, y), nearest)
+            x2, y2 = x + rng.uniform(-300, 300), y + rng.uniform(-300, 300)
+            inside = [i for i, (px, py) in enumerate(points)
+                      if min(x, x2) <= px <= max(x, x2) and min(y, y2) <= py <= max(y, y2)]
+            self.assertEqual(index.inRect(x, y, x2, y2), inside)
+        px, py = points[-1]
+        self.assertEqual(index.at(px, py), points.index((px, py)))
+        self.assertIsNone(index.nearest(0, 0, max_distance=-1))
+        self.assertIsNone(SpatialIndex().nearest(0, 0))
+
+
+class TestSearchPlayback(unittest.TestCase):
+    def test_steps(self):
+        """测试逐步回放：每步返回一个节点及其是否在路径上，已显示路径按路径顺序排列"""
+        playback = SearchPlayback(["A", "C", "B", "D"], ["A", "B", "D"], "D")
+        self.assertEqual(playback.step(), (0, "A", True))
+        self.assertEqual(playback.step(), (1, "C", False))
+        self.assertEqual(playback.step(), (2, "B", True))
+        self.assertEqual(playback.visiblePath(), ["A", "B"])
+        playback.setPath(["A", "C", "D"])
+        self.assertEqual(playback.visiblePath(), ["A", "C"])
+        self.assertEqual(playback.step(), (3, "D", True))
+        self.assertTrue(playback.finished())
+        self.assertIsNone(playback.step())
+
+
+class TestCli(unittest.TestCase):
+    def setUp(self):
+        self.graph_file = os.path.join(os.path.dirname(__file__), "testgraph.json")
+
+    def test_run_queries(self):
+        """测试批量查询：文本和 JSON 两种查询格式，出错的行单独报告"""
+        graph = cli.loadGraph(self.graph_file)
+        lines = ["1 20", "# 注释", "", 'A* 3 27', '{"algorithm": "CH", "start": "1", "end": "20"}', "Foo 1 2"]
+        out = io.StringIO()
+        errors = cli.runQueries(graph, lines, out)
+        results = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(errors, 1)
+        self.assertEqual(len(results), 4)
+        expected = GraphAlgorithms.dijkstra(graph, "1", "20")
+        self.assertEqual(results[0]["path"], expected[1])
+        self.assertEqual(results[0]["cost"], expected[2])
+        self.assertEqual(results[0]["expanded"], len(expected[0]))
+        self.assertEqual(results[1]["algorithm"], "A*")
+        self.assertAlmostEqual(results[2]["cost"], expected[2])
+        self.assertEqual(results[3], {"line": 6, "error": "未知算法: Foo"})
+
+    def test_no_qt_import(self):
+        """测试命令行入口不导入 Qt"""
+        code = "import sys, cli; cli.main([sys.argv[1], '-']); print('PyQt5' in sys.modules)"
+        proc = subprocess.run([sys.executable, "-c", code, self.graph_file], input="1 9\n",
+                              capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+        lines = proc.stdout.splitlines()
+        self.assertEqual(json.loads(lines[0])["path"][0], "1")
+        self.assertEqual(lines[-1], "False")
+
+
+class TestBatchRunner(unittest.TestCase):
+    def test_same_results_in_order(self):
+        """测试多进程批量查询的结果与逐个查询一致且按输入顺序返回，命令行并行模式输出相同"""
+        graph_file = os.path.join(os.path.dirname(__file__), "testgraph.json")
+        graph_data = GraphIO.loadGraph(graph_file)
+        rng = random.Random(3)
+        ids = [node["id"] for node in graph_data["nodes"]]
+        queries = [(algo, rng.choice(ids), rng.choice(ids)) for algo in GraphAlgorithms.ALGORITHMS for _ in range(4)]
+        queries.append(("Dijkstra", "1", "missing"))
+        expected = [GraphAlgorithms.runSearch(graph_data, *query) for query in queries]
+        self.assertEqual(GraphAlgorithms.runBatch(graph_data, queries, workers=2), expected)
+
+        lines = [" ".join(query) for query in queries[:8]] + ["Foo 1 2"]
+        sequential, parallel = io.StringIO(), io.StringIO()
+        self.assertEqual(cli.runQueries(cli.loadGraph(graph_file), lines, sequential), 1)
+        self.assertEqual(cli.runQueriesParallel(cli.loadGraph(graph_file), lines, parallel, jobs=2), 1)
+        for a, b in zip(sequential.getvalue().splitlines(), parallel.getvalue().splitlines()):
+            a, b = json.loads(a), json.loads(b)
+            a.pop("time_ms", None)
+            b.pop("time_ms", None)
+            self.assertEqual(a, b)
+
+    def test_integer_and_multiple_ids(self):
+        """测试整数节点ID和多起点元组原样传给工作进程；命令行和查询服务中的文本ID按图中ID的类型对应"""
+        graph_data = GraphStore.fromGraphData({
+            "nodes": [{"id": i, "x": 10 * i, "y": 0} for i in range(1, 6)],
+            "edges": [{"start": i, "end": i + 1, "weight": 1, "directed": False} for i in range(1, 5)],
+        })
+        queries = [("Dijkstra", 1, 4), ("BFS", 5, 2), ("Dijkstra", (1, 5), 3), ("Dijkstra", 1, "1")]
+        expected = [GraphAlgorithms.runSearch(graph_data, *query) for query in queries]
+        self.assertEqual(expected[0][1:], ([1, 2, 3, 4], 3))
+        self.assertEqual(GraphAlgorithms.runBatch(graph_data, queries, workers=2), expected)
+
+        out = io.StringIO()
+        self.assertEqual(cli.runQueries(graph_data, ["1 4", '{"start": [1, "5"], "end": 4}'], out), 0)
+        results = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual((results[0]["start"], results[0]["path"]), (1, [1, 2, 3, 4]))
+        self.assertEqual(results[1]["path"], [5, 4])
+        parallel = io.StringIO()
+        cli.runQueriesParallel(graph_data, ["1 4"], parallel, jobs=2)
+        self.assertEqual(json.loads(parallel.getvalue())["path"], [1, 2, 3, 4])
+
+        async def scenario():
+            server = QueryServer()
+            server.addGraph("g", graph_data)
+            try:
+                result, _ = await server.search("g", "Dijkstra", "2", 4)
+                self.assertEqual(result["path"], [2, 3, 4])
+            finally:
+                await server.close()
+
+        asyncio.run(scenario())
+
+
+class TestQueryServer(unittest.TestCase):
+    def test_queries_over_socket(self):
+        """测试常驻服务的查询结果与直接调用一致，相同的并发查询只计算一次，错误请求返回错误响应"""
+        graph_data = GraphIO.loadGraph(os.path.join(os.path.dirname(__file__), "testgraph.json"))
+
+        async def scenario():
+            server = QueryServer()
+            server.addGraph("test", graph_data)
+            await server.start("127.0.0.1", 0)
+            host, port = server.address()[:2]
+            client = await QueryClient.connect(host, port)
+            try:
+                queries = [(algo, "1", "20") for algo in GraphAlgorithms.ALGORITHMS] + [("Dijkstra", "3", "27")]
+                results = await asyncio.gather(*(client.search("test", *query) for query in queries))
+                for query, result in zip(queries, results):
+                    visited, path, cost = GraphAlgorithms.runSearch(graph_data, *query)
+                    self.assertEqual(result["path"], path)
+                    self.assertEqual(result["expanded"], len(visited))
+                    if path:
+                        self.assertAlmostEqual(result["cost"], cost)
+
+                sources = await asyncio.gather(*(server.search("test", "BFS", "2", "25") for _ in range(3)))
+                self.assertEqual([source for _, source in sources], ["computed", "coalesced", "coalesced"])
+                self.assertEqual((await client.search("test", "BFS", "2", "25"))["source"], "cache")
+
+                with self.assertRaises(QueryError):
+                    await client.search("missing", "BFS", "1", "2")
+                with self.assertRaises(QueryError):
+                    await client.request("foo")
+                self.assertEqual((await client.request("graphs"))["test"]["nodes"], len(graph_data["nodes"]))
+            finally:
+                await client.close()
+                await server.close()
+
+        asyncio.run(scenario())
+
+    def test_unexpected_errors_and_concurrent_ch(self):
+        """测试意外异常也返回错误响应；线程池中并发的 CH 查询只构建一次收缩层次"""
+        graph_data = GraphIO.loadGraph(os.path.join(os.path.dirname(__file__), "testgraph.json"))
+        original_build = ContractionHierarchy.build.__func__
+        builds = []
+
+        def countingBuild(cls, graph, progress=None):
+            builds.append(graph)
+            return original_build(cls, graph, progress)
+
+        class FailingServer(QueryServer):
+            async def dispatch(self, request):
+                if request.get("op") == "boom":
+                    raise RuntimeError("boom")
+                return await super().dispatch(request)
+
+        async def scenario():
+            server = FailingServer()
+            server.addGraph("test", graph_data)
+            await server.start("127.0.0.1", 0)
+            host, port = server.address()[:2]
+            client = await QueryClient.connect(host, port)
+            try:
+                with self.assertRaisesRegex(QueryError, "RuntimeError: boom"):
+                    await asyncio.wait_for(client.request("boom"), 10)  # 未返回响应时客户端会一直等待
+                queries = [("CH", "1", end) for end in ("9", "20", "27", "5")]
+                results = await asyncio.gather(*(client.search("test", *query) for query in queries))
+                for query, result in zip(queries, results):
+                    _, path, cost = GraphAlgorithms.dijkstra(graph_data, *query[1:])
+                    self.assertEqual(bool(result["path"]), bool(path))
+                    if path:
+                        self.assertAlmostEqual(result["cost"], cost)
+            finally:
+                await client.close()
+                await server.close()
+
+        ContractionHierarchy.build = classmethod(countingBuild)
+        try:
+            asyncio.run(scenario())
+        finally:
+            ContractionHierarchy.build = classmethod(original_build)
+        self.assertEqual(len(builds), 1)
+
+    def test_process_pool_shares_hierarchy(self):
+        """测试进程池模式下收缩层次由主进程构建一次后发给工作进程，非 CH 查询不触发构建"""
+        graph_data = GraphIO.loadGraph(os.path.join(os.path.dirname(__file__), "testgraph.json"))
+
+        async def scenario():
+            server = QueryServer(jobs=2)
+            server.addGraph("test", graph_data)
+            try:
+                await server.search("test", "Dijkstra", "1", "20")
+                self.assertFalse(server.runners["test"].has_hierarchy)
+                queries = [("CH", "1", end) for end in ("9", "20", "27")]
+                results = await asyncio.gather(*(server.search("test", *query) for query in queries))
+                self.assertTrue(server.runners["test"].has_hierarchy)
+                self.assertIsNotNone(GraphAlgorithms.compile(graph_data).hierarchy)
+                for query, (result, _) in zip(queries, results):
+                    _, path, cost = GraphAlgorithms.dijkstra(graph_data, *query[1:])
+                    self.assertEqual(bool(result["path"]), bool(path))
+                    if path:
+                        self.assertAlmostEqual(result["cost"], cost)
+            finally:
+                await server.close()
+
+        asyncio.run(scenario())
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_generators(self):
+        """测试合成图可复现，边数接近目标规模且所有边都引用已有节点"""
+        for family, generate in benchmark.FAMILIES.items():
+            store = generate(1000, seed=1)
+            self.assertEqual(store.toGraphData(), generate(1000, seed=1).toGraphData(), family)
+            self.assertTrue(800 <= store.edgeCount() <= 1200, family)
+            self.assertTrue(min(store.edge_start) >= 0 and min(store.edge_end) >= 0, family)
+
+    def test_compare_with_baseline(self):
+        """测试与基准比较：超出容差的耗时、内存和扩展节点数变化被报告，过短的耗时不比较"""
+        baseline = {
+            "a/Dijkstra": {"time_s": 1.0, "peak_kb": 100, "expanded": 50},
+            "a/load.json": {"time_s": 0.001, "peak_kb": 100},
+        }
+        results = {
+            "a/Dijkstra": {"time_s": 1.5, "peak_kb": 110, "expanded": 60},
+            "a/load.json": {"time_s": 0.002, "peak_kb": 100},
+            "b/Dijkstra": {"time_s": 9.0, "peak_kb": 1, "expanded": 1},
+        }
+        regressions = benchmark.compareWithBaseline(results, baseline, tolerance=0.25)
+        self.assertEqual([(name, metric) for name, metric, _, _ in regressions],
+                         [("a/Dijkstra", "time_s"), ("a/Dijkstra", "expanded")])
+
+    def test_missing_baseline_fails(self):
+        """测试没有基准文件时以状态码 1 退出；提交的基准覆盖默认参数下的所有算法"""
+        args = ["--families", "geometric", "--algorithms", "BFS", "--queues", "binary", "--queries", "1",
+                "--repeat", "1", "--no-memory"]
+        with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()), \
+                contextlib.redirect_stderr(io.StringIO()):
+            baseline = os.path.join(tmp, "baseline.json")
+            self.assertEqual(benchmark.main(args + ["--baseline", baseline]), 1)
+            self.assertEqual(benchmark.main(args + ["--baseline", baseline, "--update-baseline"]), 0)
+            self.assertEqual(benchmark.main(args + ["--baseline", baseline]), 0)
+        with open(os.path.join(os.path.dirname(__file__), "benchmark_baseline.json"), "r", encoding="utf-8") as f:
+            committed = json.load(f)
+        for family in benchmark.FAMILIES:
+            for algo in GraphAlgorithms.ALGORITHMS:
+                self.assertIn("expanded", committed[f"{family}-1k/{algo}"])
+
+
+class TestQueryCache(unittest.TestCase):
+    def test_lru_and_revision(self):
+        """测试容量上限按 LRU 淘汰，图版本号变化后不会命中旧结果"""
+        cache = QueryCache(capacity=2)
+        cache.put((1, "A*", "A", "C"), "r1")
+        cache.put((1, "BFS", "A", "C"), "r2")
+        self.assertEqual(cache.get((1, "A*", "A", "C")), "r1")
+        cache.put((1, "DFS", "A", "C"), "r3")
+        self.assertIsNone(cache.get((1, "BFS", "A", "C")))
+        self.assertIsNone(cache.get((2, "A*", "A", "C")))
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["evictions"]), (1, 2, 1))
+
+
+class TestContractionHierarchy(unittest.TestCase):
+    def test_same_cost_as_dijkstra(self):
+        """测试 CH 查询与 Dijkstra 的最短路径权重一致，展开后的路径由原图中的弧组成，并能保存后重新载入"""
+        graph_data = GraphIO.loadGraph(os.path.join(os.path.dirname(__file__), "testgraph.json"))
+        GraphAlgorithms.prepareHierarchy(graph_data)
+        graph = GraphAlgorithms.compile(graph_data)
+        arc_weights = {}  # (起点ID, 终点ID) -> 平行弧中的最小权重
+        for u in range(graph.nodeCount()):
+            for i in range(graph.offsets[u], graph.offsets[u + 1]):
+                arc = (graph.ids[u], graph.ids[graph.targets[i]])
+                arc_weights[arc] = min(arc_weights.get(arc, math.inf), graph.weights[i])
+        ids = [n["id"] for n in graph_data["nodes"]]
+        for start in ids:
+            for end in ids:
+                _, path, cost = GraphAlgorithms.runSearch(graph_data, "CH", start, end)
+                _, expected_path, expected_cost = GraphAlgorithms.dijkstra(graph_data, start, end)
+                self.assertAlmostEqual(cost, expected_cost)
+                self.assertEqual(bool(path), bool(expected_path))
+                if path:
+                    self.assertEqual((path[0], path[-1]), (start, end))
+                    arcs = list(zip(path, path[1:]))
+                    for arc in arcs:
+                        self.assertIn(arc, arc_weights, (start, end))
+                    self.assertAlmostEqual(sum(arc_weights[arc] for arc in arcs), cost)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            fname = os.path.join(tmp, "graph.json.ch")
+            GraphIO.saveHierarchy(fname, graph.hierarchy)
+            loaded = GraphIO.loadHierarchy(fname, graph)
+        self.assertIsNotNone(loaded)
+        self.assertEqual(loaded.query("1", "9"), graph.hierarchy.query("1", "9"))
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file